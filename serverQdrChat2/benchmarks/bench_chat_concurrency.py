@@ -0,0 +1,89 @@
+"""
+/chat 동시성 벤치마크 (로컬 대역 사용, 네트워크/Firebase 불필요)
+
+동시 요청 수를 늘려가며 처리량과 지연, 부하 중 / 헬스 체크 지연을 측정
+- 기본: 현재 비동기 경로 → 처리량이 동시 요청 수에 비례해 늘어야 함
+- --blocking: 검색을 이벤트 루프에서 동기로 호출하던 이전 구조 흉내 → 처리량이 1/지연에 묶임
+
+실행: python benchmarks/bench_chat_concurrency.py [--blocking] [--latency 0.5] [--requests 64]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+
+import main
+from benchmarks import standins
+
+async def probe_health(client: httpx.AsyncClient, stop: asyncio.Event, samples: list):
+    """부하 중 / 응답 지연 측정 - 예정 시각부터 재므로 이벤트 루프가 막힌 시간도 포함됨"""
+    interval = 0.05
+    while not stop.is_set():
+        scheduled = time.perf_counter() + interval
+        await asyncio.sleep(interval)
+        await client.get("/")
+        samples.append(time.perf_counter() - scheduled)
+
+async def run_level(client: httpx.AsyncClient, concurrency: int, total: int) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(i: int):
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.post("/chat", json={
+                "message": f"강남 맛집 추천 {i}",
+                "token": f"bench-user-{i % 16}",
+                "conversationHistory": []
+            })
+            response.raise_for_status()
+            assert response.json()["success"], response.json()
+            latencies.append(time.perf_counter() - start)
+
+    stop = asyncio.Event()
+    health_samples: list = []
+    prober = asyncio.create_task(probe_health(client, stop, health_samples))
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await prober
+
+    latencies.sort()
+    return {
+        "concurrency": concurrency,
+        "throughput": total / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+        "health_max_ms": max(health_samples) * 1000 if health_samples else 0.0
+    }
+
+async def main_async(args):
+    standins.install(main, search_latency=args.latency, blocking_search=args.blocking)
+    transport = httpx.ASGITransport(app=main.app)
+    async with main.lifespan(main.app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            mode = "blocking (이전 구조)" if args.blocking else "async"
+            print(f"/chat 동시성 벤치마크 - {mode}, 검색 지연 {args.latency}s, 요청 {args.requests}개")
+            print(f"{'동시 요청':>8} {'처리량(req/s)':>14} {'p50(ms)':>9} {'p95(ms)':>9} {'헬스 최대(ms)':>14}")
+            for concurrency in args.levels:
+                result = await run_level(client, concurrency, args.requests)
+                print(f"{result['concurrency']:>8} {result['throughput']:>14.1f} {result['p50_ms']:>9.0f} "
+                      f"{result['p95_ms']:>9.0f} {result['health_max_ms']:>14.0f}")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="/chat 동시성 벤치마크")
+    parser.add_argument("--blocking", action="store_true", help="검색을 이벤트 루프에서 동기로 실행 (비교용)")
+    parser.add_argument("--latency", type=float, default=0.5, help="대역 검색 지연(초)")
+    parser.add_argument("--requests", type=int, default=64, help="동시성 단계별 요청 수")
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 4, 16, 64], help="동시 요청 수 단계")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    asyncio.run(main_async(parse_args()))
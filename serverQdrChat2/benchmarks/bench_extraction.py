@@ -0,0 +1,101 @@
+"""
+본문 추출 벤치마크: 스레드 추출(이전 방식) vs 프로세스 풀 (extract_pool.ExtractionPool)
+
+동시 검색 N개가 각각 페이지 10개를 추출(동시 5개, scrape_multiple_pages_async와 같은 방식)하는 동안
+- 검색 1회의 추출 단계 지연 (p50/p95/max)
+- 처리량 (페이지/초)
+- 이벤트 루프 지연: 10ms마다 깨어나는 작업이 늦게 깨어난 정도 (다른 요청/SSE 전송이 겪는 지연)
+을 측정. 스레드 방식은 trafilatura가 GIL을 잡는 동안 이벤트 루프도 멈추는 것이 주 비용
+(CPU가 1개인 환경에서는 프로세스 풀도 처리량은 비슷하고 이벤트 루프 지연만 줄어듦)
+
+실행: python benchmarks/bench_extraction.py [--levels 1 4 16] [--workers 2] [--paragraphs 200]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+from benchmarks import standins
+from benchmarks.bench_search_pipeline import percentile
+from extract_pool import ExtractionPool
+
+PAGES_PER_QUERY = 10
+PAGE_CONCURRENCY = 5
+
+def make_pages(count: int, paragraphs: int) -> List[bytes]:
+    provider = standins.ProviderStandIns(standins.default_profiles(), page_paragraphs=paragraphs)
+    return [provider.page_html(f"https://page{i}.example.com/post/{i}").encode("utf-8") for i in range(count)]
+
+async def loop_lag_monitor(samples: List[float], stop: asyncio.Event, interval: float = 0.01):
+    while not stop.is_set():
+        expected = time.perf_counter() + interval
+        await asyncio.sleep(interval)
+        samples.append(max(time.perf_counter() - expected, 0.0))
+
+async def run_level(pool: ExtractionPool, pages: List[bytes], concurrency: int, queries: int) -> dict:
+    latencies, lags = [], []
+    stop = asyncio.Event()
+    monitor = asyncio.create_task(loop_lag_monitor(lags, stop))
+    query_slots = asyncio.Semaphore(concurrency)
+    failures = 0
+
+    async def one_query(q: int):
+        nonlocal failures
+        async with query_slots:
+            page_slots = asyncio.Semaphore(PAGE_CONCURRENCY)
+
+            async def one_page(i: int):
+                async with page_slots:
+                    content = pages[(q * PAGES_PER_QUERY + i) % len(pages)]
+                    return await pool.extract_async(f"https://bench/{q}/{i}", content, "utf-8")
+
+            start = time.perf_counter()
+            results = await asyncio.gather(*(one_page(i) for i in range(PAGES_PER_QUERY)))
+            latencies.append(time.perf_counter() - start)
+            failures += sum(not r["success"] for r in results)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one_query(q) for q in range(queries)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await monitor
+    return {"elapsed": elapsed, "latencies": latencies, "lags": lags, "failures": failures}
+
+async def main_async(args):
+    pages = make_pages(50, args.paragraphs)
+    print(f"페이지 {len(pages)}개, 평균 {sum(map(len, pages)) // len(pages) // 1024}KB, CPU {os.cpu_count()}개")
+    modes = [("thread", ExtractionPool(workers=0)), (f"process×{args.workers}", ExtractionPool(workers=args.workers))]
+    print(f"{'방식':>12} {'동시':>5} {'페이지/s':>9} {'p50(ms)':>8} {'p95(ms)':>8} {'max(ms)':>8} "
+          f"{'루프지연p99':>11} {'루프지연max':>11} {'실패':>5}")
+    for name, pool in modes:
+        pool.start()
+        try:
+            # 워밍업 (trafilatura/lxml 초기화)
+            await run_level(pool, pages, 2, 2)
+            for concurrency in args.levels:
+                queries = max(args.queries, concurrency * 2)
+                result = await run_level(pool, pages, concurrency, queries)
+                latencies, lags = result["latencies"], result["lags"]
+                print(f"{name:>12} {concurrency:>5} {queries * PAGES_PER_QUERY / result['elapsed']:>9.1f} "
+                      f"{percentile(latencies, 50) * 1000:>8.0f} {percentile(latencies, 95) * 1000:>8.0f} "
+                      f"{max(latencies) * 1000:>8.0f} {percentile(lags, 99) * 1000:>11.1f} "
+                      f"{max(lags, default=0) * 1000:>11.1f} {result['failures']:>5}")
+        finally:
+            pool.shutdown()
+        print(f"{'':>12} 통계: {pool.get_stats()}")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="본문 추출 스레드 vs 프로세스 풀 벤치마크")
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 4, 16], help="동시 검색 수 단계")
+    parser.add_argument("--queries", type=int, default=8, help="단계별 최소 검색 수")
+    parser.add_argument("--workers", type=int, default=max(2, os.cpu_count() or 1), help="프로세스 풀 워커 수")
+    parser.add_argument("--paragraphs", type=int, default=200, help="페이지당 문단 수 (페이지 크기)")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    asyncio.run(main_async(parse_args()))
@@ -0,0 +1,122 @@
+"""
+키워드 매칭 마이크로 벤치마크 (선형 스캔 vs KeywordMatcher)
+
+실행: python benchmarks/bench_keyword_matcher.py [--iterations 2000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fag_data import FAQ_DATA
+from keyword_matcher import KeywordMatcher
+from search_api import CATEGORY_KEYWORDS, SearchCategory, score_categories
+
+QUERIES = [
+    "강남 맛집 추천해줘",
+    "요즘 인기있는 유튜브 영상 알려줘",
+    "제주도 펜션 찾아줘",
+    "아이폰 16 가격 비교",
+    "오늘 경제 뉴스",
+    "주말에 갈만한 전시회",
+    "비 오는 날 듣기 좋은 노래",
+    "성수동 카페 디저트",
+    "파이썬 비동기 프로그래밍 설명해줘",
+    "모두트리 사연 투표는 어떻게 만들어요?",
+    "일기 저장이 가능한가요",
+    "오늘 기분이 좀 우울해",
+]
+
+def linear_category(q: str) -> SearchCategory:
+    """기존 방식: 카테고리 순서대로 any() 선형 스캔"""
+    for category, kws in CATEGORY_KEYWORDS.items():
+        if any(kw in q for kw in kws):
+            return category
+    return SearchCategory.GENERAL
+
+def automaton_category(q: str) -> SearchCategory:
+    scores = score_categories(q)
+    return next(iter(scores)) if scores else SearchCategory.GENERAL
+
+def build_faq_keyword_map() -> dict:
+    """main.build_faq_keyword_map과 같은 맵 (main은 Firebase 초기화가 필요해 직접 임포트하지 않음)"""
+    keyword_map = {}
+    for faq in FAQ_DATA:
+        for keyword in faq["keywords"]:
+            keyword_map[keyword] = faq["answer"]
+            keyword_map[keyword.replace(" ", "")] = faq["answer"]
+    return keyword_map
+
+def synthetic_keywords(count: int, seed: int = 42) -> list:
+    """키워드 수 증가 시 비용 비교용 임의 한글 키워드 (2~4글자)"""
+    rng = random.Random(seed)
+    return [
+        "".join(chr(rng.randint(0xAC00, 0xD7A3)) for _ in range(rng.randint(2, 4)))
+        for _ in range(count)
+    ]
+
+def run(label: str, func, queries, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for q in queries:
+            func(q)
+    elapsed = time.perf_counter() - start
+    per_call_us = elapsed / (iterations * len(queries)) * 1e6
+    print(f"  {label:<12} {per_call_us:8.2f} µs/쿼리")
+    return per_call_us
+
+def main(iterations: int):
+    queries = [q.lower() for q in QUERIES]
+
+    faq_map = build_faq_keyword_map()
+    faq_matcher = KeywordMatcher(faq_map.items())
+
+    def linear_faq(q: str):
+        for keyword, answer in faq_map.items():
+            if keyword in q:
+                return answer
+        return None
+
+    # 결과가 같은지 먼저 확인
+    for q in queries:
+        assert linear_category(q) == automaton_category(q), q
+        assert linear_faq(q) == faq_matcher.first_value(q), q
+
+    keyword_count = sum(len(kws) for kws in CATEGORY_KEYWORDS.values())
+    print(f"카테고리 분류 (키워드 {keyword_count}개, 반복 {iterations}회)")
+    before = run("선형 스캔", linear_category, queries, iterations)
+    after = run("매처", automaton_category, queries, iterations)
+    print(f"  → {before / after:.1f}배")
+
+    print(f"FAQ 의도 파악 (키워드 {len(faq_map)}개)")
+    before = run("선형 스캔", linear_faq, queries, iterations)
+    after = run("매처", faq_matcher.first_value, queries, iterations)
+    print(f"  → {before / after:.1f}배")
+
+    # 키워드가 늘어날 때: 선형 스캔은 키워드 수에 비례, 매처는 쿼리 길이에만 비례
+    print("키워드 수 증가 (FAQ 방식, 매치 없는 쿼리 포함)")
+    for count in (30, 300, 3000):
+        keyword_map = {kw: kw for kw in synthetic_keywords(count)}
+        matcher = KeywordMatcher(keyword_map.items())
+
+        def linear(q: str, keyword_map=keyword_map):
+            for keyword, answer in keyword_map.items():
+                if keyword in q:
+                    return answer
+            return None
+
+        print(f" 키워드 {count}개")
+        before = run("선형 스캔", linear, queries, max(iterations // 10, 1))
+        after = run("매처", matcher.first_value, queries, max(iterations // 10, 1))
+        print(f"  → {before / after:.1f}배")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="키워드 매칭 선형 스캔 vs KeywordMatcher 벤치마크")
+    parser.add_argument("--iterations", type=int, default=2000, help="쿼리 목록 반복 횟수")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    main(parse_args().iterations)
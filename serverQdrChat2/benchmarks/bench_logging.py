@@ -0,0 +1,101 @@
+"""
+요청 경로 로깅 비용 벤치마크 (이전 print vs structured_log)
+
+검색 1회에 해당하는 로그를 남기는 데 요청 스레드가 쓰는 시간을 비교
+- print: 이전 perform_search처럼 raw_results를 indent=2 JSON으로 stdout에 출력 + 단계별 print
+- structured_log (INFO): DEBUG 이벤트는 레벨 확인에서 바로 버려짐
+- structured_log (DEBUG, 전부 기록): 큐에 넣기만 하고 직렬화/쓰기는 리스너 스레드에서
+
+stdout은 /dev/null로 보내 터미널 속도 영향은 제외 (실서비스에서는 print 쪽 비용이 더 큼)
+
+실행: python benchmarks/bench_logging.py [--iterations 500]
+"""
+import argparse
+import contextlib
+import json
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import structured_log
+from structured_log import fields, get_logger
+
+def sample_raw_results() -> list:
+    """공급자 응답 크기 흉내 (네이버 10개 + 구글 10개, 약 20KB)"""
+    naver = {"items": [{
+        "title": f"<b>강남</b> 맛집 {i}", "link": f"https://example.com/naver/{i}", "category": "한식>고기",
+        "description": "숯불 고기 전문점 " * 8, "address": "서울특별시 강남구 테헤란로 123", "roadAddress": "서울 강남구 테헤란로 123",
+        "mapx": "1270276", "mapy": "374979"
+    } for i in range(10)]}
+    google = {"organic": [{
+        "title": f"강남 맛집 베스트 {i}", "link": f"https://example.com/google/{i}",
+        "snippet": "강남역 근처에서 꼭 가봐야 할 맛집을 정리했습니다. " * 6, "position": i + 1
+    } for i in range(10)]}
+    return [{"source": "naver", "data": naver}, {"source": "google", "data": google}]
+
+def old_prints(raw_results: list):
+    print("[검색] 카테고리: restaurant, 쿼리: 강남 맛집")
+    print("🚀 검색 소스: ['naver', 'google']")
+    for source in ("naver", "google"):
+        print(f"🔍 {source.upper()} 검색 시도: '강남 맛집' (naver_id: True, serper_key: True)")
+        print(f"✅ {source} 검색 성공: 10개 결과")
+    print(f"📦 raw_results: {json.dumps(raw_results, ensure_ascii=False, indent=2)}")
+    print("✅ cleaned 결과: 20개")
+    for i in range(10):
+        print(f"💾 캐시 저장: '강남 맛집 {i}' (총 {i}개, {i * 1000}B)")
+
+def structured(logger: logging.Logger, raw_results: list):
+    logger.info("검색 시작", extra=fields(category="restaurant", query="강남 맛집"))
+    logger.debug("🚀 검색 소스", extra=fields(sources=["naver", "google"]))
+    for source in ("naver", "google"):
+        logger.debug("🔍 공급자 검색 시도", extra=fields(source=source, query="강남 맛집"))
+        logger.debug("✅ 검색 성공", extra=fields(source=source, items=10))
+    logger.debug("📦 공급자 원본 응답", extra=fields(raw_results=raw_results))
+    logger.debug("✅ 필터링 결과", extra=fields(cleaned=20))
+    for i in range(10):
+        logger.debug("💾 캐시 저장", extra=fields(query=f"강남 맛집 {i}", entries=i, bytes=i * 1000))
+
+def measure(label: str, fn, iterations: int):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    elapsed = (time.perf_counter() - start) / iterations * 1e6
+    print(f"{label:<40} {elapsed:>10.1f}µs/검색", file=sys.stderr)
+
+def main(iterations: int):
+    raw_results = sample_raw_results()
+    logger = get_logger("bench")
+    # 리스너 출력도 /dev/null로 (요청 스레드 비용만 비교)
+    devnull = open(os.devnull, "w")
+    structured_log._listener.handlers[0].setStream(devnull)
+
+    print(f"검색 {iterations}회 기준 요청 스레드 소요 시간 (raw_results {len(json.dumps(raw_results, ensure_ascii=False))}자)",
+          file=sys.stderr)
+    with contextlib.redirect_stdout(devnull):
+        measure("print (이전)", lambda: old_prints(raw_results), iterations)
+
+    structured_log._root.setLevel(logging.INFO)
+    measure("structured_log INFO", lambda: structured(logger, raw_results), iterations)
+
+    structured_log._root.setLevel(logging.DEBUG)
+    structured_log._sampler.sample_rate = 0.01
+    measure("structured_log DEBUG (1% 샘플링)", lambda: structured(logger, raw_results), iterations)
+
+    structured_log._sampler.sample_rate = 1.0
+    measure("structured_log DEBUG (전부 기록)", lambda: structured(logger, raw_results), iterations)
+
+    drain_start = time.perf_counter()
+    structured_log.shutdown_logging()
+    print(f"리스너 스레드 잔여 처리: {(time.perf_counter() - drain_start) * 1000:.0f}ms "
+          f"(dropped {structured_log.get_stats()['dropped']})", file=sys.stderr)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="요청 경로 로깅 비용 벤치마크 (print vs structured_log)")
+    parser.add_argument("--iterations", type=int, default=500, help="검색 횟수")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    main(parse_args().iterations)
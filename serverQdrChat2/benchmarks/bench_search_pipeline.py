@@ -0,0 +1,238 @@
+"""
+검색 파이프라인 오프라인 벤치마크 (로컬 공급자 대역 사용, 네트워크/API 키 불필요)
+
+네이버 로컬/Serper/유튜브 검색/스크래핑 페이지/Gemini를 로컬 HTTP 대역 서버로 대신하고,
+동시 요청 수를 늘려가며 처리량과 p50/p95/p99 지연, 단계별 지연(metrics 히스토그램과 같은 지점)을 측정
+
+모드
+- async:    perform_search_async (파이프라인 모드)
+- barrier:  perform_search_async (pipelined=False, 공급자 전부 → 스크래핑 전부)
+- sync:     perform_search (스레드 풀 + scrape_multiple_pages, Flask 경로)
+- stream:   FastAPI /stream (SSE, 첫 요약 청크까지의 시간 포함)
+
+지연/실패 분포는 공급자별로 'median[,spread[,failure_rate[,hang_rate]]]' 형식으로 지정
+  예) --page 0.3,0.7,0.05,0.02 → 중앙값 300ms 로그정규, 5% 503, 2% 무응답(스크래핑 타임아웃)
+
+실행: python benchmarks/bench_search_pipeline.py [--modes async barrier] [--levels 1 8 32] [--requests 64]
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# 스크래핑 실패 등 INFO 로그가 결과 표를 가리지 않도록 (LOG_LEVEL로 덮어쓸 수 있음)
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+import httpx
+
+import metrics
+import search_api
+from benchmarks import standins
+from provider_guard import provider_guard
+from scrape_health import scrape_health
+
+QUERIES = [
+    "강남 맛집 추천해줘",
+    "성수동 카페 디저트",
+    "제주도 펜션 찾아줘",
+    "요즘 인기있는 유튜브 영상 알려줘",
+    "비 오는 날 듣기 좋은 노래",
+    "아이폰 16 가격 비교",
+]
+
+def percentile(values: List[float], p: float) -> float:
+    """최근접 순위 백분위수"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(p / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+class StageRecorder:
+    """metrics 히스토그램 observe()를 가로채 단계별 원시 샘플을 보관 (버킷 대신 정확한 백분위수 계산용)"""
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+        self.hooks = [
+            (metrics.SEARCH_STAGE_SECONDS, lambda labels: f"stage:{labels.get('stage')}"),
+            (metrics.PROVIDER_FETCH_SECONDS, lambda labels: f"provider:{labels.get('source')}:{labels.get('outcome')}"),
+            (metrics.SCRAPE_SECONDS, lambda labels: f"scrape:{labels.get('outcome')}"),
+            (metrics.LLM_SECONDS, lambda labels: f"llm:{labels.get('outcome')}"),
+            (metrics.LLM_FIRST_CHUNK_SECONDS, lambda labels: "llm:first_chunk"),
+        ]
+        for histogram, key in self.hooks:
+            original = histogram.observe
+
+            def observe(value, _original=original, _key=key, **labels):
+                self.samples[_key(labels)].append(value)
+                _original(value, **labels)
+
+            histogram.observe = observe
+
+    def reset(self):
+        self.samples.clear()
+
+def search_args() -> Tuple:
+    # 대역 서버는 키를 확인하지 않지만 소스 선택(_select_search_sources)에는 키가 필요
+    return None, "standin-naver-id", "standin-naver-secret", "standin-serper-key"
+
+def make_query(i: int, distinct: int) -> str:
+    """distinct가 0이면 요청마다 다른 쿼리, 아니면 distinct개 쿼리를 돌려 씀 (캐시 히트 포함)"""
+    n = i % distinct if distinct else i
+    return f"{QUERIES[n % len(QUERIES)]} {n}"
+
+def reset_caches():
+    """단계마다 같은 조건에서 시작하도록 캐시와 공급자/도메인 학습 상태 초기화"""
+    search_api.provider_cache.clear()
+    search_api.scrape_cache.clear()
+    provider_guard.reset()
+    scrape_health.clear()
+
+async def run_async_level(concurrency: int, total: int, distinct: int, pipelined: bool) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, failures = [], 0
+
+    async def one(i: int):
+        nonlocal failures
+        async with semaphore:
+            start = time.perf_counter()
+            result = await search_api.perform_search_async(make_query(i, distinct), *search_args(), pipelined=pipelined)
+            latencies.append(time.perf_counter() - start)
+            failures += not result.get("success")
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    return {"elapsed": time.perf_counter() - start, "latencies": latencies, "failures": failures}
+
+def run_sync_level(concurrency: int, total: int, distinct: int) -> dict:
+    latencies, failures = [], 0
+
+    def one(i: int):
+        nonlocal failures
+        start = time.perf_counter()
+        result = search_api.perform_search(make_query(i, distinct), *search_args())
+        latencies.append(time.perf_counter() - start)
+        failures += not result.get("success")
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(one, range(total)))
+    return {"elapsed": time.perf_counter() - start, "latencies": latencies, "failures": failures}
+
+async def run_stream_level(client: httpx.AsyncClient, concurrency: int, total: int, distinct: int) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, first_chunks, failures = [], [], 0
+
+    async def one(i: int):
+        nonlocal failures
+        async with semaphore:
+            start = time.perf_counter()
+            first_chunk = None
+            complete = False
+            async with client.stream("POST", "/stream", json={"query": make_query(i, distinct)}) as response:
+                async for line in response.aiter_lines():
+                    if not line.startswith("data: "):
+                        continue
+                    event = json.loads(line[6:])
+                    if first_chunk is None and event.get("stage") == "synthesis":
+                        first_chunk = time.perf_counter() - start
+                    complete = complete or event.get("stage") == "complete"
+            latencies.append(time.perf_counter() - start)
+            if first_chunk is not None:
+                first_chunks.append(first_chunk)
+            failures += not complete
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    return {"elapsed": time.perf_counter() - start, "latencies": latencies, "failures": failures,
+            "first_chunks": first_chunks}
+
+def report_level(mode: str, concurrency: int, total: int, result: dict, recorder: StageRecorder, show_stages: bool):
+    latencies = result["latencies"]
+    print(f"{mode:>8} {concurrency:>6} {total / result['elapsed']:>10.1f} "
+          f"{percentile(latencies, 50) * 1000:>8.0f} {percentile(latencies, 95) * 1000:>8.0f} "
+          f"{percentile(latencies, 99) * 1000:>8.0f} {result['failures']:>6}")
+    if result.get("first_chunks"):
+        chunks = result["first_chunks"]
+        print(f"{'':>17}첫 요약 청크: p50 {percentile(chunks, 50) * 1000:.0f}ms / "
+              f"p95 {percentile(chunks, 95) * 1000:.0f}ms / p99 {percentile(chunks, 99) * 1000:.0f}ms")
+    if show_stages:
+        for key in sorted(recorder.samples):
+            values = recorder.samples[key]
+            print(f"{'':>17}{key:<28} n={len(values):<5} p50 {percentile(values, 50) * 1000:>7.0f}ms "
+                  f"p95 {percentile(values, 95) * 1000:>7.0f}ms p99 {percentile(values, 99) * 1000:>7.0f}ms")
+
+async def main_async(args, provider: standins.ProviderStandIns):
+    recorder = StageRecorder()
+    stream_client = None
+    server = server_task = None
+    main = None
+    if "stream" in args.modes:
+        # /stream은 키를 환경 변수에서 읽음
+        _, naver_id, naver_secret, serper_key = search_args()
+        os.environ.setdefault("NAVER_CLIENT_ID", naver_id)
+        os.environ.setdefault("NAVER_CLIENT_SECRET", naver_secret)
+        os.environ.setdefault("SERPER_KEY", serper_key)
+        import uvicorn
+        import main
+        # httpx ASGITransport는 응답 본문을 모아서 돌려주므로 첫 청크 시간을 재려면 실제 서버로 실행
+        server = uvicorn.Server(uvicorn.Config(main.app, host="127.0.0.1", port=0, log_level="warning",
+                                               access_log=False))
+        server_task = asyncio.create_task(server.serve())
+        while not server.started:
+            if server_task.done():
+                server_task.result()
+            await asyncio.sleep(0.01)
+        port = server.servers[0].sockets[0].getsockname()[1]
+        stream_client = httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=None,
+                                          limits=httpx.Limits(max_connections=None))
+
+    print(f"{'모드':>8} {'동시':>6} {'req/s':>10} {'p50(ms)':>8} {'p95(ms)':>8} {'p99(ms)':>8} {'실패':>6}")
+    try:
+        for mode in args.modes:
+            for concurrency in args.levels:
+                reset_caches()
+                recorder.reset()
+                if mode == "stream":
+                    main.memory_cache.clear()
+                    result = await run_stream_level(stream_client, concurrency, args.requests, args.distinct)
+                elif mode == "sync":
+                    result = await asyncio.to_thread(run_sync_level, concurrency, args.requests, args.distinct)
+                else:
+                    result = await run_async_level(concurrency, args.requests, args.distinct, mode == "async")
+                report_level(mode, concurrency, args.requests, result, recorder, not args.no_stages)
+    finally:
+        if stream_client is not None:
+            await stream_client.aclose()
+            server.should_exit = True
+            await server_task
+    print(f"대역 서버 요청 수: {dict(sorted(provider.requests.items()))}")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="검색 파이프라인 오프라인 벤치마크")
+    parser.add_argument("--modes", nargs="+", default=["async", "barrier"], choices=["async", "barrier", "sync", "stream"])
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 8, 32], help="동시 요청 수 단계")
+    parser.add_argument("--requests", type=int, default=48, help="단계별 요청 수")
+    parser.add_argument("--distinct", type=int, default=0, help="서로 다른 쿼리 수 (0: 전부 다름 → 캐시 미스)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--no-stages", action="store_true", help="단계별 지연 출력 생략")
+    for name, profile in standins.default_profiles().items():
+        parser.add_argument(f"--{name.replace('_', '-')}", type=standins.LatencyProfile.parse, default=profile,
+                            help=f"{name} 지연 분포 (기본값: {profile.median},{profile.spread},"
+                                 f"{profile.failure_rate},{profile.hang_rate})")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_args()
+    profiles = {name: getattr(args, name) for name in standins.default_profiles()}
+    provider = standins.ProviderStandIns(profiles, seed=args.seed).start()
+    standins.install_providers(provider)
+    try:
+        asyncio.run(main_async(args, provider))
+    finally:
+        provider.stop()
@@ -0,0 +1,277 @@
+"""
+/chat, /stream 부하 테스트 (개방 루프: 고정 도착률, Firebase/검색 공급자 없이 실행)
+
+서버는 별도 프로세스에서 main.app을 uvicorn으로 실행하고 다음 대역을 설치
+- 토큰 검증: 토큰 문자열을 uid로 쓰는 standin_verify_token
+- Firestore: 메모리 대역(StandInFirestore + StandInLimiter, 기본) 또는 --firestore emulator
+  (FIRESTORE_EMULATOR_HOST로 실행 중인 Firestore 에뮬레이터에 실제 AsyncClient로 연결)
+- 검색: --search standin(고정 지연 대역, 앱 자체 오버헤드 측정) 또는 pipeline(공급자 대역 + 실제 검색 파이프라인)
+
+부하는 응답을 기다리지 않고 예정 시각마다 요청을 보내며(개방 루프), 지연은 예정 시각부터 잼
+→ 서버가 밀려도 요청 간격이 늘어나지 않으므로 대기열 지연이 그대로 드러남 (coordinated omission 방지)
+
+시나리오 = 엔드포인트(chat | stream) × 캐시(hot | cold)
+- hot: 적은 수의 쿼리를 미리 한 번씩 보내 캐시를 데운 뒤 같은 쿼리로 부하
+- cold: 요청마다 다른 쿼리 (검색/공급자/스크래핑 캐시 모두 미스)
+
+실행: python benchmarks/loadtest.py [--rate 20] [--duration 10] [--endpoints chat stream] [--caches hot cold]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from collections import Counter
+from typing import List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+
+from benchmarks import standins
+
+HOT_QUERIES = [
+    "강남 맛집 추천해줘", "성수동 카페 디저트", "제주도 펜션 찾아줘", "부산 해운대 숙소",
+    "요즘 인기있는 유튜브 영상 알려줘", "비 오는 날 듣기 좋은 노래", "아이폰 16 가격 비교", "홍대 술집 추천",
+]
+
+def percentile(values: List[float], p: float) -> float:
+    """최근접 순위 백분위수"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(p / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+# ===== 서버 프로세스 =====
+
+def serve(args):
+    """대역을 설치하고 main.app 실행 (--serve로 호출되는 자식 프로세스)"""
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    os.environ.setdefault("NAVER_CLIENT_ID", "standin-naver-id")
+    os.environ.setdefault("NAVER_CLIENT_SECRET", "standin-naver-secret")
+    os.environ.setdefault("SERPER_KEY", "standin-serper-key")
+    import uvicorn
+    import main
+
+    if args.search == "pipeline":
+        profiles = {name: getattr(args, name) for name in standins.default_profiles()}
+        provider = standins.ProviderStandIns(profiles, seed=args.seed).start()
+        standins.install_providers(provider)
+    standins.install(main, firestore_latency=args.firestore_latency, search_latency=args.search_latency,
+                     daily_limit=args.daily_limit, stub_search=args.search == "standin")
+
+    if args.firestore == "emulator":
+        if not os.environ.get("FIRESTORE_EMULATOR_HOST"):
+            raise SystemExit("--firestore emulator에는 FIRESTORE_EMULATOR_HOST 환경 변수가 필요합니다")
+        from google.cloud import firestore as gcloud_firestore
+        from chat_limiter import LeasedChatLimiter
+        from chat_store import ChatWriteBehind
+        db = gcloud_firestore.AsyncClient(project=os.environ.get("GCLOUD_PROJECT", "modoo-loadtest"))
+        main.db = db
+        main.chat_writer = ChatWriteBehind(db)
+        main.chat_limiter = LeasedChatLimiter(db, args.daily_limit or main.DAILY_CHAT_LIMIT)
+
+    uvicorn.run(main.app, host="127.0.0.1", port=args.port, log_level="warning", access_log=False)
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def start_server(args) -> Tuple[subprocess.Popen, str]:
+    port = _free_port()
+    command = [sys.executable, os.path.abspath(__file__), "--serve", "--port", str(port),
+               "--search", args.search, "--firestore", args.firestore,
+               "--search-latency", str(args.search_latency), "--firestore-latency", str(args.firestore_latency),
+               "--seed", str(args.seed)]
+    if args.daily_limit:
+        command += ["--daily-limit", str(args.daily_limit)]
+    for name in standins.default_profiles():
+        profile = getattr(args, name)
+        command += [f"--{name.replace('_', '-')}",
+                    f"{profile.median},{profile.spread},{profile.failure_rate},{profile.hang_rate}"]
+    process = subprocess.Popen(command)
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"서버 프로세스 종료 (code {process.returncode})")
+        try:
+            if httpx.get(f"{base_url}/", timeout=1).status_code == 200:
+                return process, base_url
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("서버 시작 시간 초과")
+
+# ===== 부하 생성 =====
+
+class Scenario:
+    def __init__(self, endpoint: str, cache: str, users: int, replay_pace: str):
+        self.endpoint = endpoint
+        self.cache = cache
+        self.users = users
+        self.replay_pace = replay_pace
+        self.run_id = f"{random.randrange(16 ** 6):06x}"
+
+    @property
+    def name(self) -> str:
+        return f"{self.endpoint}/{self.cache}"
+
+    def query(self, i: int) -> str:
+        if self.cache == "hot":
+            return HOT_QUERIES[i % len(HOT_QUERIES)]
+        return f"{HOT_QUERIES[i % len(HOT_QUERIES)]} {self.run_id}-{i}"
+
+    async def send(self, client: httpx.AsyncClient, i: int, scheduled: float) -> dict:
+        """요청 1건 → {latency, first_chunk, error} (시간은 모두 예정 시각 기준)"""
+        loop = asyncio.get_running_loop()
+        result = {"latency": None, "first_chunk": None, "error": None}
+        try:
+            if self.endpoint == "chat":
+                response = await client.post("/chat", json={
+                    "message": self.query(i), "token": f"loadtest-user-{i % self.users}", "conversationHistory": []
+                })
+                if response.status_code != 200:
+                    result["error"] = f"http_{response.status_code}"
+                elif not response.json().get("success"):
+                    result["error"] = "app_error"
+            else:
+                complete = False
+                async with client.stream("POST", "/stream", json={
+                    "query": self.query(i), "replay_pace": self.replay_pace
+                }) as response:
+                    if response.status_code != 200:
+                        result["error"] = f"http_{response.status_code}"
+                    async for line in response.aiter_lines():
+                        if not line.startswith("data: "):
+                            continue
+                        event = json.loads(line[6:])
+                        stage = event.get("stage")
+                        if result["first_chunk"] is None and stage == "synthesis":
+                            result["first_chunk"] = loop.time() - scheduled
+                        if stage == "error" or event.get("category") == "error":
+                            result["error"] = "app_error"
+                        complete = complete or stage == "complete"
+                if not complete and result["error"] is None:
+                    result["error"] = "incomplete"
+        except httpx.TimeoutException:
+            result["error"] = "timeout"
+        except httpx.HTTPError as e:
+            result["error"] = type(e).__name__
+        result["latency"] = loop.time() - scheduled
+        return result
+
+    async def warm_up(self, client: httpx.AsyncClient):
+        """hot: 쿼리마다 한 번씩 보내 검색 캐시(/stream) 또는 공급자/스크래핑 캐시(/chat)를 채움"""
+        if self.cache == "hot":
+            loop = asyncio.get_running_loop()
+            await asyncio.gather(*(self.send(client, i, loop.time()) for i in range(len(HOT_QUERIES))))
+
+def arrival_offsets(rate: float, duration: float, arrivals: str, rng: random.Random) -> List[float]:
+    """요청 예정 시각(시작 기준 초) - uniform: 고정 간격, poisson: 지수 분포 간격"""
+    offsets, t = [], 0.0
+    while True:
+        t += rng.expovariate(rate) if arrivals == "poisson" else 1.0 / rate
+        if t > duration:
+            return offsets
+        offsets.append(t)
+
+async def run_open_loop(client: httpx.AsyncClient, scenario: Scenario, offsets: List[float]) -> dict:
+    loop = asyncio.get_running_loop()
+    tasks = []
+    max_lag = 0.0
+    start = loop.time() + 0.05
+    for i, offset in enumerate(offsets):
+        scheduled = start + offset
+        delay = scheduled - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        # 발송 지연이 크면 부하 생성기 자체가 포화된 것 (결과 해석 시 주의)
+        max_lag = max(max_lag, loop.time() - scheduled)
+        tasks.append(asyncio.create_task(scenario.send(client, i, scheduled)))
+    results = await asyncio.gather(*tasks)
+    return {"results": results, "elapsed": loop.time() - start, "max_lag": max_lag}
+
+def report(scenario: Scenario, rate: float, run: dict):
+    results = run["results"]
+    ok = [r for r in results if r["error"] is None]
+    errors = Counter(r["error"] for r in results if r["error"] is not None)
+    latencies = [r["latency"] for r in ok]
+    ms = lambda v: f"{v * 1000:>8.0f}"
+    print(f"{scenario.name:<12} {rate:>6.1f} {len(results):>6} {len(results) / run['elapsed']:>8.1f} "
+          f"{sum(errors.values()) / max(len(results), 1) * 100:>6.1f} "
+          f"{ms(percentile(latencies, 50))} {ms(percentile(latencies, 90))} {ms(percentile(latencies, 99))} "
+          f"{ms(percentile(latencies, 99.9))} {ms(max(latencies, default=0.0))} {run['max_lag'] * 1000:>7.0f}")
+    first_chunks = [r["first_chunk"] for r in ok if r["first_chunk"] is not None]
+    if first_chunks:
+        print(f"{'':<13}첫 요약 청크 p50 {percentile(first_chunks, 50) * 1000:.0f}ms / "
+              f"p90 {percentile(first_chunks, 90) * 1000:.0f}ms / p99 {percentile(first_chunks, 99) * 1000:.0f}ms")
+    if errors:
+        print(f"{'':<13}오류: {dict(errors)}")
+
+async def drive(args, base_url: str):
+    rng = random.Random(args.seed)
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=200)
+    async with httpx.AsyncClient(base_url=base_url, timeout=args.timeout, limits=limits) as client:
+        print(f"개방 루프 부하 - 도착 {args.arrivals}, {args.duration}초, 검색 {args.search}, Firestore {args.firestore}")
+        print(f"{'시나리오':<12} {'목표/s':>6} {'요청':>6} {'처리/s':>8} {'오류%':>6} {'p50':>8} {'p90':>8} {'p99':>8} "
+              f"{'p99.9':>8} {'max':>8} {'발송지연':>7}")
+        for endpoint in args.endpoints:
+            for cache in args.caches:
+                scenario = Scenario(endpoint, cache, args.users, args.replay_pace)
+                await scenario.warm_up(client)
+                for rate in args.rate:
+                    run = await run_open_loop(client, scenario, arrival_offsets(rate, args.duration, args.arrivals, rng))
+                    report(scenario, rate, run)
+        health = (await client.get("/health")).json()
+    writer, limiter = health.get("chat_writer", {}), health.get("chat_limiter", {})
+    print(f"서버 통계: 대화 저장 {writer.get('written')}건 / 배치 {writer.get('batches')}회 / 실패 배치 "
+          f"{writer.get('failed_batches')}, 한도 거절 {limiter.get('denied')}, 캐시 {health.get('cache', {}).get('hits')}히트")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="/chat, /stream 개방 루프 부하 테스트")
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, default=0, help=argparse.SUPPRESS)
+    parser.add_argument("--endpoints", nargs="+", default=["chat", "stream"], choices=["chat", "stream"])
+    parser.add_argument("--caches", nargs="+", default=["hot", "cold"], choices=["hot", "cold"])
+    parser.add_argument("--rate", type=float, nargs="+", default=[20.0], help="초당 도착 요청 수 (여러 개면 단계별 실행)")
+    parser.add_argument("--duration", type=float, default=10.0, help="단계별 부하 시간(초)")
+    parser.add_argument("--arrivals", choices=["uniform", "poisson"], default="poisson")
+    parser.add_argument("--users", type=int, default=50, help="토큰(uid) 수")
+    parser.add_argument("--timeout", type=float, default=30.0, help="클라이언트 타임아웃(초)")
+    parser.add_argument("--replay-pace", default="instant", help="/stream 캐시 히트 재생 속도 (instant | fast | typing)")
+    parser.add_argument("--search", choices=["standin", "pipeline"], default="standin")
+    parser.add_argument("--search-latency", type=float, default=0.5, help="--search standin의 검색 지연(초)")
+    parser.add_argument("--firestore", choices=["standin", "emulator"], default="standin")
+    parser.add_argument("--firestore-latency", type=float, default=0.02, help="메모리 Firestore 대역 지연(초)")
+    parser.add_argument("--daily-limit", type=int, default=0, help="일일 채팅 한도 (0: 사실상 무제한)")
+    parser.add_argument("--seed", type=int, default=42)
+    for name, profile in standins.default_profiles().items():
+        parser.add_argument(f"--{name.replace('_', '-')}", type=standins.LatencyProfile.parse, default=profile,
+                            help=f"--search pipeline의 {name} 지연 분포 'median,spread,failure_rate,hang_rate'")
+    return parser.parse_args()
+
+def main_cli():
+    args = parse_args()
+    if args.serve:
+        serve(args)
+        return
+    process, base_url = start_server(args)
+    try:
+        asyncio.run(drive(args, base_url))
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,428 @@
+"""
+벤치마크용 로컬 대역 (Firebase/검색 공급자 없이 main.app을 그대로 실행)
+
+- StandInFirestore: chat_store.ChatWriteBehind가 쓰는 AsyncClient API 일부 (collection/document/batch)
+- StandInLimiter: 임대 트랜잭션을 메모리 카운터로 대신하는 LeasedChatLimiter
+- standin_verify_token: 서명 검증 대신 일정 시간 CPU를 쓰는 동기 함수
+- install(): main/search_api의 해당 객체를 대역으로 교체
+- ProviderStandIns: 네이버 로컬/Serper/유튜브 검색/임의 HTML 페이지/Gemini를 흉내 내는 로컬 HTTP 서버
+  install_providers()로 search_api의 외부 요청을 모두 이 서버로 보냄 (네트워크 불필요)
+"""
+import asyncio
+import hashlib
+import json
+import math
+import os
+import random
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from firebase_admin import firestore
+
+from chat_limiter import LeasedChatLimiter
+
+class _StandInDocument:
+    def __init__(self, store: "StandInFirestore", path: str):
+        self.store = store
+        self.path = path
+
+    def collection(self, name: str) -> "_StandInCollection":
+        return _StandInCollection(self.store, f"{self.path}/{name}")
+
+class _StandInCollection:
+    def __init__(self, store: "StandInFirestore", path: str):
+        self.store = store
+        self.path = path
+
+    def document(self, doc_id: str) -> _StandInDocument:
+        return _StandInDocument(self.store, f"{self.path}/{doc_id}")
+
+class _StandInBatch:
+    def __init__(self, store: "StandInFirestore"):
+        self.store = store
+        self.writes = []
+
+    def set(self, ref: _StandInDocument, data: dict, merge: bool = False):
+        self.writes.append((ref.path, data, merge))
+
+    async def commit(self):
+        await asyncio.sleep(self.store.latency)
+        for path, data, merge in self.writes:
+            doc = dict(self.store.docs.get(path, {})) if merge else {}
+            for field, value in data.items():
+                if isinstance(value, firestore.ArrayUnion):
+                    current = list(doc.get(field, []))
+                    doc[field] = current + [item for item in value.values if item not in current]
+                elif isinstance(value, firestore.Increment):
+                    doc[field] = doc.get(field, 0) + value.value
+                else:
+                    doc[field] = value
+            self.store.docs[path] = doc
+        self.store.commits += 1
+
+class StandInFirestore:
+    """메모리 문서 저장소 (커밋마다 latency초 지연)"""
+    def __init__(self, latency: float = 0.02):
+        self.latency = latency
+        self.docs: Dict[str, dict] = {}
+        self.commits = 0
+
+    def collection(self, name: str) -> _StandInCollection:
+        return _StandInCollection(self, name)
+
+    def batch(self) -> _StandInBatch:
+        return _StandInBatch(self)
+
+class StandInLimiter(LeasedChatLimiter):
+    """Firestore 트랜잭션 대신 메모리 카운터로 임대 (latency초 지연)"""
+    def __init__(self, daily_limit: int, latency: float = 0.03, **kwargs):
+        super().__init__(object(), daily_limit, **kwargs)
+        self.latency = latency
+        self.counts: Dict[str, int] = {}
+
+    async def _lease_in_transaction(self, uid: str, date_key: str, want: int):
+        await asyncio.sleep(self.latency)
+        count = self.counts.get(uid, 0)
+        granted = max(0, min(want, self.daily_limit - count))
+        self.counts[uid] = count + granted
+        return granted, count + granted
+
+    async def _return_unused(self, uid: str, lease):
+        await asyncio.sleep(self.latency)
+        self.counts[uid] = self.counts.get(uid, 0) - lease.available
+        self.returned += lease.available
+
+def standin_verify_token(cpu_seconds: float = 0.002):
+    """토큰 문자열을 uid로 쓰는 검증 함수 (서명 검증 비용만큼 CPU 사용)"""
+    def verify(id_token: str) -> dict:
+        deadline = time.perf_counter() + cpu_seconds
+        while time.perf_counter() < deadline:
+            pass
+        return {"uid": id_token, "sub": id_token, "exp": time.time() + 3600}
+    return verify
+
+def standin_search(latency: float = 0.5, blocking: bool = False):
+    """
+    perform_search_async 대역 (공급자 호출 + 요약에 latency초)
+    - blocking=True: 동기 검색을 이벤트 루프에서 직접 호출하던 이전 구조를 흉내 (time.sleep)
+    """
+    async def perform_search_async(query: str, *args, on_chunk=None, **kwargs) -> dict:
+        if blocking:
+            time.sleep(latency)
+        else:
+            await asyncio.sleep(latency)
+        summary = f"'{query}' 검색 결과 요약입니다."
+        if on_chunk:
+            on_chunk(summary)
+        return {
+            "success": True,
+            "summary": summary,
+            "sources": [{"title": "대역 출처", "url": "https://example.com", "snippet": summary}]
+        }
+    return perform_search_async
+
+def install(main_module, firestore_latency: float = 0.02, search_latency: float = 0.5,
+            blocking_search: bool = False, daily_limit: Optional[int] = None, stub_search: bool = True):
+    """
+    main 모듈의 Firebase/검색 의존 객체를 대역으로 교체하고 대역 저장소 반환
+    - stub_search=False: 검색은 실제 파이프라인 사용 (install_providers()로 공급자 대역을 따로 설치)
+    """
+    import search_api
+    from chat_store import ChatWriteBehind
+
+    store = StandInFirestore(firestore_latency)
+    main_module.db = store
+    main_module.chat_writer = ChatWriteBehind(store, flush_interval=0.05)
+    main_module.chat_limiter = StandInLimiter(daily_limit or 10 ** 9, latency=firestore_latency)
+    main_module.token_cache.verify = standin_verify_token()
+    main_module.token_cache.clear()
+    if stub_search:
+        search_api.perform_search_async = standin_search(search_latency, blocking_search)
+    return store
+
+# ===== 검색 공급자 대역 (로컬 HTTP 서버) =====
+
+@dataclass
+class LatencyProfile:
+    """
+    응답 지연/실패 분포
+    - 지연: 중앙값 median초의 로그정규 분포 (spread = 로그 표준편차, 0이면 고정)
+    - failure_rate: 503 응답 비율, hang_rate: 응답하지 않고 hang_seconds 동안 붙잡는 비율 (클라이언트 타임아웃 유발)
+    """
+    median: float = 0.1
+    spread: float = 0.4
+    failure_rate: float = 0.0
+    hang_rate: float = 0.0
+    hang_seconds: float = 30.0
+
+    def sample_delay(self, rng: random.Random) -> float:
+        if self.spread <= 0:
+            return self.median
+        return self.median * math.exp(rng.gauss(0.0, self.spread))
+
+    def sample_outcome(self, rng: random.Random) -> str:
+        roll = rng.random()
+        if roll < self.hang_rate:
+            return "hang"
+        if roll < self.hang_rate + self.failure_rate:
+            return "fail"
+        return "ok"
+
+    @classmethod
+    def parse(cls, spec: str) -> "LatencyProfile":
+        """'median[,spread[,failure_rate[,hang_rate]]]' 형식 (예: '0.12,0.5,0.02,0.01')"""
+        values = [float(v) for v in spec.split(",") if v.strip()]
+        return cls(*values[:4])
+
+def default_profiles() -> Dict[str, LatencyProfile]:
+    """실서비스에서 관찰되는 대략적인 지연 (naver/serper ~100-300ms, 페이지 ~300ms, Gemini 첫 청크 ~600ms)"""
+    return {
+        "naver": LatencyProfile(0.12, 0.4),
+        "serper": LatencyProfile(0.25, 0.4),
+        "youtube": LatencyProfile(0.4, 0.5),
+        "page": LatencyProfile(0.3, 0.7, failure_rate=0.05, hang_rate=0.02),
+        "gemini": LatencyProfile(0.6, 0.3),
+        "gemini_chunk": LatencyProfile(0.05, 0.3),
+    }
+
+NAVER_HOST = "openapi.naver.com"
+SERPER_HOST = "google.serper.dev"
+YOUTUBE_SEARCH_URL = "https://www.youtube.com/results"
+GEMINI_URL = "https://generativelanguage.googleapis.com/v1beta/models/standin:generateContent"
+
+_PARAGRAPH = ("강남역 근처에서 오래 사랑받아 온 가게입니다. 점심시간에는 대기 줄이 길고, 저녁에는 예약을 권합니다. "
+              "대표 메뉴는 숯불 구이와 된장찌개이며 가격은 1인 2만 원 안팎입니다. 주차는 건물 지하를 이용할 수 있습니다. ")
+
+def _seed(*parts) -> int:
+    return int(hashlib.md5("|".join(str(p) for p in parts).encode("utf-8")).hexdigest()[:8], 16)
+
+class ProviderStandIns:
+    """
+    외부 공급자 대역 서버 (Starlette + uvicorn, 별도 스레드의 이벤트 루프에서 실행)
+    - 요청의 Host 헤더로 공급자를 구분: openapi.naver.com / google.serper.dev / www.youtube.com/results /
+      generativelanguage.googleapis.com / 그 외 모든 호스트는 HTML 페이지
+    - 응답 내용은 쿼리/URL로 결정되고(재현 가능), 지연과 실패만 profiles 분포를 따름
+    """
+    def __init__(self, profiles: Optional[Dict[str, LatencyProfile]] = None, seed: int = 42,
+                 page_paragraphs: int = 30, links_per_provider: int = 10):
+        self.profiles = {**default_profiles(), **(profiles or {})}
+        self.rng = random.Random(seed)
+        self.page_paragraphs = page_paragraphs
+        self.links_per_provider = links_per_provider
+        self.requests: Dict[str, int] = {}
+        self.port: Optional[int] = None
+        self._server = None
+        self._thread: Optional[threading.Thread] = None
+
+    # --- 응답 생성 ---
+    def _links(self, query: str, kind: str):
+        rng = random.Random(_seed(kind, query))
+        return [
+            (f"{kind} {query} {i + 1}", f"https://site{rng.randrange(20)}.example.com/{kind}/{_seed(query, i):08x}")
+            for i in range(self.links_per_provider)
+        ]
+
+    def naver_payload(self, query: str) -> dict:
+        return {"items": [
+            {"title": f"<b>{title}</b>", "link": link, "description": _PARAGRAPH[:80],
+             "address": "서울특별시 강남구 테헤란로 123", "category": "한식>고기"}
+            for title, link in self._links(query, "naver")
+        ]}
+
+    def serper_payload(self, query: str) -> dict:
+        return {"organic": [
+            {"title": title, "link": link, "snippet": _PARAGRAPH[:120], "position": i + 1}
+            for i, (title, link) in enumerate(self._links(query, "google"))
+        ]}
+
+    def youtube_payload(self, query: str) -> dict:
+        return {"videos": [
+            {"id": f"{_seed(query, i):011x}"[:11], "title": f"{query} 영상 {i + 1}", "channel": "대역 채널",
+             "duration": "10:24", "views": "12만회", "url_suffix": f"/watch?v={_seed(query, i):011x}"[:20]}
+            for i in range(self.links_per_provider)
+        ]}
+
+    def page_html(self, url: str) -> str:
+        rng = random.Random(_seed(url))
+        paragraphs = "".join(
+            f"<p>{_PARAGRAPH * rng.randint(1, 3)}</p>" for _ in range(max(1, self.page_paragraphs + rng.randint(-5, 5)))
+        )
+        nav = "".join(f'<li><a href="/menu/{i}">메뉴 {i}</a></li>' for i in range(20))
+        return (f"<html><head><title>{url}</title></head><body><nav><ul>{nav}</ul></nav>"
+                f"<article><h1>{url}</h1>{paragraphs}</article><footer>© 대역 페이지</footer></body></html>")
+
+    def gemini_text(self, prompt: str) -> str:
+        rng = random.Random(_seed(prompt[:200]))
+        return "".join(f"{_PARAGRAPH[:rng.randint(40, 90)]}\n" for _ in range(8))
+
+    # --- 서버 ---
+    async def _delay(self, kind: str):
+        """지연/실패 적용 → None(정상) 또는 실패 응답"""
+        from starlette.responses import PlainTextResponse
+        profile = self.profiles[kind]
+        self.requests[kind] = self.requests.get(kind, 0) + 1
+        outcome = profile.sample_outcome(self.rng)
+        if outcome == "hang":
+            await asyncio.sleep(profile.hang_seconds)
+        await asyncio.sleep(profile.sample_delay(self.rng))
+        if outcome != "ok":
+            return PlainTextResponse("stand-in failure", status_code=503)
+        return None
+
+    def _build_app(self):
+        from starlette.applications import Starlette
+        from starlette.requests import ClientDisconnect
+        from starlette.responses import HTMLResponse, JSONResponse, PlainTextResponse, StreamingResponse
+        from starlette.routing import Route
+
+        async def dispatch(request):
+            try:
+                return await route(request)
+            except ClientDisconnect:
+                # 호출 측 타임아웃/헤징 취소로 본문을 다 받기 전에 끊긴 요청 (부하 테스트에서 정상)
+                return PlainTextResponse("client disconnected", status_code=499)
+
+        async def route(request):
+            host = request.headers.get("host", "").split(":")[0]
+            if host == NAVER_HOST:
+                failed = await self._delay("naver")
+                return failed or JSONResponse(self.naver_payload(request.query_params.get("query", "")))
+            if host == SERPER_HOST:
+                body = await request.json()
+                failed = await self._delay("serper")
+                return failed or JSONResponse(self.serper_payload(body.get("q", "")))
+            if host == "www.youtube.com" and request.url.path == "/results":
+                failed = await self._delay("youtube")
+                return failed or JSONResponse(self.youtube_payload(request.query_params.get("search_query", "")))
+            if host == "generativelanguage.googleapis.com":
+                body = await request.json()
+                failed = await self._delay("gemini")
+                if failed:
+                    return failed
+                text = self.gemini_text(body.get("prompt", ""))
+                if not body.get("stream"):
+                    return JSONResponse({"text": text})
+
+                async def chunks():
+                    lines = text.splitlines(keepends=True)
+                    for i, line in enumerate(lines):
+                        if i:
+                            await asyncio.sleep(self.profiles["gemini_chunk"].sample_delay(self.rng))
+                        yield json.dumps({"text": line}, ensure_ascii=False) + "\n"
+                return StreamingResponse(chunks(), media_type="application/x-ndjson")
+            failed = await self._delay("page")
+            return failed or HTMLResponse(self.page_html(f"{host}{request.url.path}"))
+
+        return Starlette(routes=[Route("/{path:path}", dispatch, methods=["GET", "POST"])])
+
+    def start(self) -> "ProviderStandIns":
+        import uvicorn
+        config = uvicorn.Config(self._build_app(), host="127.0.0.1", port=0, log_level="warning",
+                                access_log=False, lifespan="off")
+        self._server = uvicorn.Server(config)
+        self._thread = threading.Thread(target=self._server.run, name="provider-standins", daemon=True)
+        self._thread.start()
+        deadline = time.time() + 10
+        while not self._server.started:
+            if time.time() > deadline or not self._thread.is_alive():
+                raise RuntimeError("공급자 대역 서버 시작 실패")
+            time.sleep(0.01)
+        self.port = self._server.servers[0].sockets[0].getsockname()[1]
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.should_exit = True
+            self._thread.join(timeout=5)
+
+class _RedirectTransport:
+    """httpx 요청의 URL만 대역 서버로 바꿈 (Host 헤더는 원래 호스트 유지 → 대역 서버가 공급자 구분)"""
+    def __init__(self, port: int):
+        import httpx
+        self.port = port
+        self.inner = httpx.AsyncHTTPTransport(limits=httpx.Limits(max_connections=200, max_keepalive_connections=100))
+
+    async def handle_async_request(self, request):
+        request.url = request.url.copy_with(scheme="http", host="127.0.0.1", port=self.port)
+        return await self.inner.handle_async_request(request)
+
+    async def aclose(self):
+        await self.inner.aclose()
+
+def _redirect_adapter(port: int):
+    """requests 세션용 어댑터 (동기 perform_search/scrape_page 경로)"""
+    from urllib.parse import urlsplit, urlunsplit
+    from requests.adapters import HTTPAdapter
+
+    class RedirectAdapter(HTTPAdapter):
+        def send(self, request, **kwargs):
+            parts = urlsplit(request.url)
+            request.headers["Host"] = parts.hostname
+            request.url = urlunsplit(("http", f"127.0.0.1:{port}", parts.path, parts.query, parts.fragment))
+            return super().send(request, **kwargs)
+
+    return RedirectAdapter(pool_connections=20, pool_maxsize=100)
+
+class _Chunk:
+    def __init__(self, text: str):
+        self.text = text
+
+class StandInGeminiModel:
+    """genai.GenerativeModel 대역 - 대역 서버의 Gemini 엔드포인트를 실제 HTTP로 호출"""
+    model_name = "models/standin-gemini"
+
+    def generate_content(self, prompt: str, stream: bool = False):
+        import search_api
+        response = search_api._http_session.post(GEMINI_URL, json={"prompt": prompt, "stream": stream},
+                                                  timeout=30, stream=stream)
+        response.raise_for_status()
+        if not stream:
+            return _Chunk(response.json()["text"])
+        return (_Chunk(json.loads(line)["text"]) for line in response.iter_lines(decode_unicode=True) if line)
+
+    async def generate_content_async(self, prompt: str, stream: bool = False):
+        import search_api
+        client = search_api.get_async_client()
+        if not stream:
+            response = await client.post(GEMINI_URL, json={"prompt": prompt, "stream": False}, timeout=30)
+            response.raise_for_status()
+            return _Chunk(response.json()["text"])
+
+        async def chunks():
+            async with client.stream("POST", GEMINI_URL, json={"prompt": prompt, "stream": True}, timeout=30) as response:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    if line:
+                        yield _Chunk(json.loads(line)["text"])
+        return chunks()
+
+def install_providers(standins: ProviderStandIns):
+    """search_api의 외부 HTTP 호출(httpx/requests)과 유튜브 검색/Gemini 모델을 대역 서버로 교체"""
+    import httpx
+    import search_api
+
+    search_api.HAS_TRAFILATURA = True
+    search_api._http_session.mount("https://", _redirect_adapter(standins.port))
+    search_api._http_session.mount("http://", _redirect_adapter(standins.port))
+    search_api._async_client = httpx.AsyncClient(
+        transport=_RedirectTransport(standins.port), follow_redirects=True,
+        timeout=httpx.Timeout(5.0, connect=3.0)
+    )
+    # 공유 클라이언트가 닫히면(앱 종료 등) 같은 대역 전송 계층으로 다시 생성
+    search_api.get_async_client = lambda: (
+        search_api._async_client if not search_api._async_client.is_closed else install_providers(standins)
+    )
+
+    def youtube_search(query: str) -> dict:
+        response = search_api._http_session.get(YOUTUBE_SEARCH_URL, params={"search_query": query}, timeout=5)
+        response.raise_for_status()
+        return {"source": "youtube", "data": response.json()}
+
+    search_api._youtube_search = youtube_search
+    search_api._create_synthesis_model = StandInGeminiModel
+    return search_api._async_client
@@ -0,0 +1,215 @@
+import asyncio
+import time
+from datetime import date, datetime, timezone
+from typing import Dict, Optional, Set, Tuple
+
+from firebase_admin import firestore
+from google.cloud.firestore import async_transactional
+
+from metrics import FIRESTORE_SECONDS
+from structured_log import fields, get_logger
+
+logger = get_logger("chat_limiter")
+
+# ===== 일일 채팅 한도 (임대 방식) =====
+# Firestore 트랜잭션은 요청마다가 아니라 uid별로 block_size회분을 "임대"할 때만 실행하고,
+# 임대받은 횟수는 워커 메모리에서 차감 → 한도 확인이 요청 경로에서 Firestore를 기다리지 않음
+#
+# users/{uid}/limits/{날짜}.count = 사용한 횟수 + 각 워커가 임대해 간 미사용분
+# - 한동안 쓰지 않은 임대분은 백그라운드에서 Increment(-미사용분)으로 반납
+#   남은 임대분이 없는(한도 소진/초과) 임대는 날짜가 바뀔 때까지 메모리에 유지 → 다시 임대하지 않고 거절
+# - 초과 허용(overshoot): 워커가 그날 처음 보는 uid의 첫 요청은 임대를 기다리지 않고 허용하고
+#   임대분에서 차감함 → 이미 한도를 다 쓴 uid라도 워커당 하루 최대 1회까지 초과될 수 있음
+#   (먼저 허용한 uid는 날짜별로 기억 → 임대가 반납/제거된 뒤에도 그날은 다시 먼저 허용하지 않음)
+# - 반대로 다른 워커가 임대해 간 미사용분은 반납(idle_seconds) 전까지 이 워커에서 쓸 수 없어
+#   한도 직전에는 최대 (워커 수 - 1) × block_size회가 잠시 거절될 수 있음
+
+class _QuotaLease:
+    __slots__ = ("date_key", "available", "server_count", "debt", "exhausted_until", "last_used", "leasing")
+
+    def __init__(self, date_key: str):
+        self.date_key = date_key
+        self.available = 0                       # 임대받고 아직 쓰지 않은 횟수
+        self.server_count: Optional[int] = None  # 마지막 임대 직후 Firestore count (None: 아직 임대 전)
+        self.debt = 0                            # 임대 전에 먼저 허용한 횟수 (다음 임대분에서 차감)
+        self.exhausted_until = 0.0               # Firestore에 남은 한도가 없음 → 이 시각까지 다시 임대하지 않음
+        self.last_used = time.time()
+        self.leasing: Optional[asyncio.Task] = None
+
+class LeasedChatLimiter:
+    """
+    uid별 일일 채팅 한도 - Firestore에서 block_size회씩 임대받아 로컬에서 차감
+    - 남은 임대분이 low_water 이하가 되면 다음 블록을 미리 백그라운드로 임대
+    - reconcile_loop()가 idle_seconds 동안 쓰지 않은 임대분을 반납하고 메모리에서 제거
+      (남은 임대분이 없는 오늘 임대는 날짜가 바뀔 때까지 유지)
+    """
+    def __init__(self, db, daily_limit: int, block_size: int = 10, low_water: int = 3,
+                 idle_seconds: int = 120, reconcile_interval: int = 30):
+        self.db = db
+        self.daily_limit = daily_limit
+        self.block_size = max(1, block_size)
+        self.low_water = min(low_water, self.block_size - 1)
+        self.idle_seconds = idle_seconds
+        self.reconcile_interval = reconcile_interval
+        self.leases: Dict[str, _QuotaLease] = {}
+        self.optimistic_date = ""                 # optimistic_uids의 날짜
+        self.optimistic_uids: Set[str] = set()    # 오늘 이미 먼저 허용한 uid
+        self.local_grants = 0
+        self.optimistic_grants = 0
+        self.lease_requests = 0
+        self.lease_errors = 0
+        self.returned = 0
+        self.overshoot = 0
+        self.denied = 0
+
+    def _limit_ref(self, uid: str, date_key: str):
+        return self.db.collection('users').document(uid).collection('limits').document(date_key)
+
+    def _remaining(self, lease: _QuotaLease) -> int:
+        """남은 횟수 추정치 (다른 워커의 미사용 임대분은 사용한 것으로 계산)"""
+        if lease.server_count is None:
+            return max(self.daily_limit - lease.debt, 0)
+        return max(self.daily_limit - lease.server_count + lease.available, 0)
+
+    def _first_optimistic(self, uid: str, date_key: str) -> bool:
+        """오늘 이 uid를 처음 먼저 허용하는지 (날짜가 바뀌면 기록을 비움)"""
+        if self.optimistic_date != date_key:
+            self.optimistic_date = date_key
+            self.optimistic_uids = set()
+        if uid in self.optimistic_uids:
+            return False
+        self.optimistic_uids.add(uid)
+        return True
+
+    async def acquire(self, uid: str) -> dict:
+        """일일 채팅 한도 확인 및 1회 차감 → {"canChat", "remainingChats"}"""
+        if not self.db:
+            return {"canChat": True, "remainingChats": self.daily_limit}
+
+        today = date.today().isoformat()
+        lease = self.leases.get(uid)
+        if lease is None or lease.date_key != today:
+            # 날짜가 바뀌면 어제 임대분은 버림 (어제 문서에 반납할 필요 없음)
+            lease = self.leases[uid] = _QuotaLease(today)
+        lease.last_used = time.time()
+
+        if lease.available <= 0 and lease.exhausted_until <= lease.last_used:
+            if lease.server_count is None and lease.debt == 0 and self._first_optimistic(uid, today):
+                # 이 워커에서 오늘 처음 보는 uid: 먼저 허용하고 임대는 백그라운드로
+                lease.debt += 1
+                self.optimistic_grants += 1
+                self._schedule_lease(uid, lease)
+                return {"canChat": True, "remainingChats": self._remaining(lease)}
+            # 미리 임대가 따라오지 못한 경우에만 요청 경로에서 임대를 기다림
+            await asyncio.shield(self._schedule_lease(uid, lease))
+
+        if lease.available > 0:
+            lease.available -= 1
+            self.local_grants += 1
+            if lease.available <= self.low_water and lease.exhausted_until <= lease.last_used:
+                self._schedule_lease(uid, lease)
+            return {"canChat": True, "remainingChats": self._remaining(lease)}
+
+        self.denied += 1
+        return {"canChat": False, "remainingChats": 0}
+
+    def _schedule_lease(self, uid: str, lease: _QuotaLease) -> asyncio.Task:
+        """uid당 임대 요청은 한 번에 하나만 진행"""
+        if lease.leasing is None:
+            lease.leasing = asyncio.create_task(self._lease(uid, lease))
+        return lease.leasing
+
+    async def _lease(self, uid: str, lease: _QuotaLease):
+        start = time.perf_counter()
+        try:
+            self.lease_requests += 1
+            granted, server_count = await self._lease_in_transaction(uid, lease.date_key, self.block_size)
+        except Exception as e:
+            # 다음 요청에서 다시 임대 시도, 그동안 임대분이 없으면 거절 (기존 트랜잭션 실패 시와 동일)
+            FIRESTORE_SECONDS.observe(time.perf_counter() - start, op="limit_lease", outcome="error")
+            self.lease_errors += 1
+            logger.warning("⚠️ 채팅 한도 임대 실패", extra=fields(uid=uid, error=str(e)))
+            return
+        finally:
+            lease.leasing = None
+
+        FIRESTORE_SECONDS.observe(time.perf_counter() - start, op="limit_lease", outcome="ok")
+        lease.server_count = server_count
+        usable = granted - lease.debt
+        if usable < 0:
+            self.overshoot += -usable
+            usable = 0
+        lease.debt = 0
+        lease.available += usable
+        if granted < self.block_size:
+            # 다른 워커가 미사용분을 반납할 수 있으므로 idle_seconds 뒤에 다시 확인
+            lease.exhausted_until = time.time() + self.idle_seconds
+
+    async def _lease_in_transaction(self, uid: str, date_key: str, want: int) -> Tuple[int, int]:
+        """남은 한도 안에서 최대 want회 임대 → (임대받은 횟수, 임대 후 count)"""
+        limit_ref = self._limit_ref(uid, date_key)
+
+        @async_transactional
+        async def update_in_transaction(transaction):
+            doc = await limit_ref.get(transaction=transaction)
+            count = (doc.to_dict() or {}).get('count', 0) if doc.exists else 0
+            granted = max(0, min(want, self.daily_limit - count))
+            if granted:
+                now = datetime.now(timezone.utc)
+                data = {'count': count + granted, 'last_chat': now}
+                if not doc.exists:
+                    data['created_at'] = now
+                transaction.set(limit_ref, data, merge=True)
+            return granted, count + granted
+
+        return await update_in_transaction(self.db.transaction())
+
+    async def _return_unused(self, uid: str, lease: _QuotaLease):
+        """미사용 임대분 반납"""
+        await self._limit_ref(uid, lease.date_key).update({'count': firestore.Increment(-lease.available)})
+        self.returned += lease.available
+
+    async def reconcile(self, force: bool = False):
+        """
+        날짜가 지난 임대와 오래 쓰지 않은 미사용분이 있는 임대를 정리하고 미사용분 반납 (force: 전부)
+        - 남은 임대분이 없는 오늘 임대는 유지: 제거하면 다음 요청이 다시 임대/초과 허용을 받게 됨
+        """
+        now = time.time()
+        today = date.today().isoformat()
+        for uid, lease in list(self.leases.items()):
+            if lease.leasing is not None:
+                continue
+            if not force and lease.date_key == today and (
+                    lease.available <= 0 or now - lease.last_used < self.idle_seconds):
+                continue
+            self.leases.pop(uid, None)
+            if lease.available > 0 and lease.date_key == today:
+                start = time.perf_counter()
+                try:
+                    await self._return_unused(uid, lease)
+                    FIRESTORE_SECONDS.observe(time.perf_counter() - start, op="limit_return", outcome="ok")
+                except Exception as e:
+                    FIRESTORE_SECONDS.observe(time.perf_counter() - start, op="limit_return", outcome="error")
+                    logger.warning("⚠️ 채팅 한도 임대분 반납 실패", extra=fields(uid=uid, error=str(e)))
+
+    async def reconcile_loop(self):
+        while True:
+            await asyncio.sleep(self.reconcile_interval)
+            try:
+                await self.reconcile()
+            except Exception as e:
+                logger.warning("⚠️ 채팅 한도 정리 오류", extra=fields(error=str(e)))
+
+    def get_stats(self) -> dict:
+        return {
+            "active_leases": len(self.leases),
+            "optimistic_uids": len(self.optimistic_uids),
+            "block_size": self.block_size,
+            "local_grants": self.local_grants,
+            "optimistic_grants": self.optimistic_grants,
+            "lease_requests": self.lease_requests,
+            "lease_errors": self.lease_errors,
+            "returned": self.returned,
+            "overshoot": self.overshoot,
+            "denied": self.denied
+        }
@@ -0,0 +1,302 @@
+import asyncio
+import os
+import time
+from collections import OrderedDict, deque
+from datetime import date, datetime, timezone
+from typing import Deque, Dict, List, Optional
+
+from firebase_admin import firestore
+
+from metrics import FIRESTORE_SECONDS
+from structured_log import fields, get_logger
+
+logger = get_logger("chat_store")
+
+# ===== dailyChats 대화 저장 (write-behind) =====
+# /chat 요청은 메시지를 큐에 넣기만 하고, 백그라운드 작업이 모아서 한 번의 배치로 기록 (Firestore AsyncClient)
+# 문서를 읽지 않고 ArrayUnion으로 추가하므로 요청당 Firestore 왕복이 응답 경로에서 빠짐
+
+# 전달 보장 수준
+AT_MOST_ONCE = "at_most_once"     # 큐에 넣고 바로 반환, 실패 배치/큐 초과분은 버림
+AT_LEAST_ONCE = "at_least_once"   # 큐에 넣고 바로 반환, 실패 배치는 성공할 때까지 재시도, 큐가 차면 대기
+CONFIRMED = "confirmed"           # AT_LEAST_ONCE + 요청이 자기 메시지의 커밋을 기다림 (그룹 커밋)
+DELIVERY_GUARANTEES = (AT_MOST_ONCE, AT_LEAST_ONCE, CONFIRMED)
+
+FIRESTORE_BATCH_LIMIT = 500  # WriteBatch 1회 최대 쓰기 수
+
+# 저장 레이아웃
+# - array: 헤더 문서의 messages 배열에 추가 (프론트엔드가 직접 읽는 기존 구조)
+# - chunked: dailyChats/{날짜}_{uid}/chunks/{청크 ID}에 추가 전용으로 기록, 헤더 문서에는 카운터만 유지
+#   → 대화가 길어져도 쓰기 비용이 일정하고 문서 1MiB 제한에 걸리지 않음
+LAYOUT_ARRAY = "array"
+LAYOUT_CHUNKED = "chunked"
+STORAGE_LAYOUTS = (LAYOUT_ARRAY, LAYOUT_CHUNKED)
+CHUNKS_SUBCOLLECTION = "chunks"
+
+class _ChunkIdGenerator:
+    """시간순으로 정렬되는 청크 문서 ID (나노초 시각-pid-순번, 프로세스 안에서 단조 증가)"""
+    def __init__(self):
+        self.last_ns = 0
+        self.seq = 0
+
+    def next(self) -> str:
+        now_ns = max(time.time_ns(), self.last_ns + 1)
+        self.last_ns = now_ns
+        self.seq += 1
+        return f"{now_ns:020d}-{os.getpid()}-{self.seq}"
+
+class _PendingChat:
+    __slots__ = ("doc_id", "uid", "date_key", "message", "future", "chunk_id")
+
+    def __init__(self, doc_id: str, uid: str, date_key: str, message: dict,
+                 future: Optional[asyncio.Future] = None):
+        self.doc_id = doc_id
+        self.uid = uid
+        self.date_key = date_key
+        self.message = message
+        self.future = future
+        self.chunk_id: Optional[str] = None  # chunked 레이아웃: 첫 커밋 시도에서 정한 청크 (재시도 시 같은 문서를 덮어씀)
+
+class ChatWriteBehind:
+    """
+    dailyChats/{날짜}_{uid} 메시지 write-behind 큐
+    - flush_interval초 동안 모인 메시지(최대 max_batch개)를 문서별로 묶어 WriteBatch 한 번으로 커밋
+    - 같은 문서의 메시지는 순서대로 ArrayUnion 한 번에 추가 (문서 읽기/배열 재전송 없음)
+    - ArrayUnion은 이미 있는 동일 원소를 다시 넣지 않으므로 커밋 재시도에도 메시지가 중복되지 않음
+    - chunked 레이아웃에서는 문서별 메시지를 새 청크 문서(최대 chunk_size개)로 추가하고
+      헤더 문서의 messageCount/chunkCount만 Increment로 갱신
+      (결과가 불확실한 커밋을 재시도하면 청크는 덮어쓰지만 카운터는 중복 증가할 수 있음 → 표시용 값)
+    - 종료 시 drain()으로 남은 메시지를 기록
+    """
+    def __init__(self, db, guarantee: str = AT_LEAST_ONCE, flush_interval: float = 0.5,
+                 max_batch: int = 200, max_pending: int = 10000, confirm_timeout: float = 5.0,
+                 max_backoff: float = 30.0, layout: str = LAYOUT_ARRAY, chunk_size: int = 50):
+        if guarantee not in DELIVERY_GUARANTEES:
+            logger.warning("⚠️ 알 수 없는 대화 저장 보장 수준 → 기본값 사용", extra=fields(guarantee=guarantee, default=AT_LEAST_ONCE))
+            guarantee = AT_LEAST_ONCE
+        if layout not in STORAGE_LAYOUTS:
+            logger.warning("⚠️ 알 수 없는 대화 저장 레이아웃 → 기본값 사용", extra=fields(layout=layout, default=LAYOUT_ARRAY))
+            layout = LAYOUT_ARRAY
+        self.db = db
+        self.guarantee = guarantee
+        self.layout = layout
+        self.chunk_size = max(1, chunk_size)
+        self.chunk_ids = _ChunkIdGenerator()
+        self.flush_interval = flush_interval
+        self.max_batch = max(1, min(max_batch, FIRESTORE_BATCH_LIMIT))
+        self.max_pending = max_pending
+        self.confirm_timeout = confirm_timeout
+        self.max_backoff = max_backoff
+        self.pending: Deque[_PendingChat] = deque()
+        self.wakeup = asyncio.Event()     # 큐에 메시지가 들어옴
+        self.batch_ready = asyncio.Event()  # max_batch만큼 모임 → 대기 없이 바로 커밋
+        self.space = asyncio.Event()      # 큐에 자리가 생김 (AT_LEAST_ONCE 대기용)
+        self.task: Optional[asyncio.Task] = None
+        self.closing = False
+        self.written = 0
+        self.batches = 0
+        self.failed_batches = 0
+        self.dropped = 0
+        self.last_flush_ms = 0.0
+
+    def start(self):
+        """백그라운드 flush 작업 시작 (이벤트 루프 안에서 호출)"""
+        if self.db is not None and self.task is None:
+            self.closing = False
+            self.task = asyncio.create_task(self._flush_loop())
+
+    async def enqueue(self, uid: str, message: dict) -> bool:
+        """
+        메시지를 저장 큐에 추가
+        - CONFIRMED: 커밋될 때까지(최대 confirm_timeout초) 기다린 뒤 성공 여부 반환
+        - 그 외: 큐에 들어가면 True (실제 기록은 백그라운드)
+        """
+        if self.db is None:
+            logger.error("❌ Firestore 클라이언트가 초기화되지 않았습니다.")
+            return False
+
+        if len(self.pending) >= self.max_pending:
+            if self.guarantee == AT_MOST_ONCE:
+                self.dropped += 1
+                logger.warning("⚠️ 대화 저장 큐 초과 - 메시지 버림", extra=fields(uid=uid))
+                return False
+            # 유실 대신 흐름 제어: flush로 자리가 날 때까지 대기
+            while len(self.pending) >= self.max_pending:
+                self.space.clear()
+                await self.space.wait()
+
+        today = date.today().isoformat()  # YYYY-MM-DD
+        future = asyncio.get_running_loop().create_future() if self.guarantee == CONFIRMED else None
+        self.pending.append(_PendingChat(f"{today}_{uid}", uid, today, message, future))
+        self.wakeup.set()
+        if len(self.pending) >= self.max_batch:
+            self.batch_ready.set()
+
+        if future is None:
+            return True
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), self.confirm_timeout)
+        except asyncio.TimeoutError:
+            # 메시지는 큐에 남아 계속 재시도됨
+            logger.warning("⚠️ 대화 저장 확인 시간 초과", extra=fields(uid=uid, timeout=self.confirm_timeout))
+            return False
+
+    async def _flush_loop(self):
+        failures = 0
+        while True:
+            await self.wakeup.wait()
+            if not self.closing and len(self.pending) < self.max_batch:
+                # 그룹 커밋: 잠깐 모아서 한 번에 기록
+                try:
+                    await asyncio.wait_for(self.batch_ready.wait(), self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+
+            if await self._flush_once() or self.guarantee == AT_MOST_ONCE:
+                failures = 0
+            else:
+                # 되돌린 메시지는 지수 백오프 후 재시도
+                failures += 1
+                await asyncio.sleep(min(0.5 * 2 ** (failures - 1), self.max_backoff))
+
+            if not self.pending:
+                self.wakeup.clear()
+                self.batch_ready.clear()
+                if self.closing:
+                    return
+
+    async def _flush_once(self) -> bool:
+        """큐 앞쪽 최대 max_batch개를 커밋 (실패 시 보장 수준에 따라 다시 넣거나 버림)"""
+        items: List[_PendingChat] = []
+        while self.pending and len(items) < self.max_batch:
+            items.append(self.pending.popleft())
+        if len(self.pending) < self.max_batch:
+            self.batch_ready.clear()
+        self.space.set()
+        if not items:
+            return True
+
+        start = time.perf_counter()
+        try:
+            await self._commit(items)
+        except Exception as e:
+            FIRESTORE_SECONDS.observe(time.perf_counter() - start, op="chat_commit", outcome="error")
+            self.failed_batches += 1
+            if self.guarantee == AT_MOST_ONCE:
+                self.dropped += len(items)
+                logger.error("❌ 대화 저장 실패 - 버림", extra=fields(items=len(items), error=str(e)))
+            else:
+                # 순서를 유지한 채 큐 앞쪽으로 되돌림
+                self.pending.extendleft(reversed(items))
+                logger.warning("❌ 대화 저장 실패 - 재시도 예정", extra=fields(items=len(items), error=str(e)))
+            return False
+
+        elapsed = time.perf_counter() - start
+        FIRESTORE_SECONDS.observe(elapsed, op="chat_commit", outcome="ok")
+        self.last_flush_ms = elapsed * 1000
+        self.written += len(items)
+        self.batches += 1
+        for item in items:
+            if item.future is not None and not item.future.done():
+                item.future.set_result(True)
+        logger.debug("✅ 대화 저장", extra=fields(items=len(items), docs=len({item.doc_id for item in items}), ms=round(self.last_flush_ms)))
+        return True
+
+    async def _commit(self, items: List[_PendingChat]):
+        """문서별로 메시지를 묶어 WriteBatch 한 번으로 커밋"""
+        by_doc: "OrderedDict[str, List[_PendingChat]]" = OrderedDict()
+        for item in items:
+            by_doc.setdefault(item.doc_id, []).append(item)
+
+        batch = self.db.batch()
+        now = datetime.now(timezone.utc)
+        for doc_id, doc_items in by_doc.items():
+            first = doc_items[0]
+            header_ref = self.db.collection('dailyChats').document(doc_id)
+            messages = [item.message for item in doc_items]
+            header = {
+                'userId': first.uid,
+                'dateKey': first.date_key,
+                'lastUpdated': now
+            }
+            if self.layout == LAYOUT_CHUNKED:
+                chunks = self._assign_chunks(doc_items)
+                for chunk_id, chunk in chunks.items():
+                    batch.set(header_ref.collection(CHUNKS_SUBCOLLECTION).document(chunk_id), {
+                        'messages': chunk,
+                        'count': len(chunk),
+                        'createdAt': now
+                    })
+                header['layout'] = LAYOUT_CHUNKED
+                header['messageCount'] = firestore.Increment(len(messages))
+                header['chunkCount'] = firestore.Increment(len(chunks))
+            else:
+                header['messages'] = firestore.ArrayUnion(messages)
+            batch.set(header_ref, header, merge=True)
+        await batch.commit()
+
+    def _assign_chunks(self, doc_items: List[_PendingChat]) -> Dict[str, List[dict]]:
+        """
+        문서의 메시지를 청크(최대 chunk_size개)로 나눔
+        - 이전 시도에서 청크가 정해진 메시지는 같은 청크에 다시 기록 (결과가 불확실한 커밋을 재시도해도 중복 없음)
+        """
+        chunks: Dict[str, List[dict]] = OrderedDict()
+        current = None
+        for item in doc_items:
+            if item.chunk_id is None:
+                if current is None or len(chunks[current]) >= self.chunk_size:
+                    current = self.chunk_ids.next()
+                    chunks[current] = []
+                item.chunk_id = current
+            chunks.setdefault(item.chunk_id, []).append(item.message)
+        return chunks
+
+    async def drain(self, timeout: float = 10.0):
+        """종료 시 남은 메시지 기록 (timeout초 안에 못 끝내면 남은 건수 기록 후 중단)"""
+        if self.task is None:
+            return
+        self.closing = True
+        self.wakeup.set()
+        self.batch_ready.set()
+        try:
+            await asyncio.wait_for(self.task, timeout)
+        except asyncio.TimeoutError:
+            logger.error("⚠️ 대화 저장 큐 종료 시간 초과 - 미기록", extra=fields(pending=len(self.pending)))
+        except Exception as e:
+            logger.error("⚠️ 대화 저장 큐 종료 오류", extra=fields(error=str(e)))
+        self.task = None
+
+    def get_stats(self) -> dict:
+        return {
+            "guarantee": self.guarantee,
+            "layout": self.layout,
+            "pending": len(self.pending),
+            "written": self.written,
+            "batches": self.batches,
+            "failed_batches": self.failed_batches,
+            "dropped": self.dropped,
+            "last_flush_ms": round(self.last_flush_ms, 1)
+        }
+
+async def load_daily_chat(db, uid: str, date_key: Optional[str] = None) -> List[dict]:
+    """
+    하루치 대화를 순서대로 복원 (두 레이아웃 모두 지원)
+    - 헤더 문서의 messages 배열(기존/프론트엔드 기록) + chunks 서브컬렉션(청크 ID = 시간순)
+    - 두 곳에 모두 메시지가 있으면 timestamp 기준으로 안정 정렬
+    """
+    date_key = date_key or date.today().isoformat()
+    header_ref = db.collection('dailyChats').document(f"{date_key}_{uid}")
+    header = await header_ref.get()
+    if not header.exists:
+        return []
+
+    messages: List[dict] = list((header.to_dict() or {}).get('messages', []))
+    legacy_count = len(messages)
+    async for chunk in header_ref.collection(CHUNKS_SUBCOLLECTION).order_by('__name__').stream():
+        messages.extend((chunk.to_dict() or {}).get('messages', []))
+
+    if legacy_count and len(messages) > legacy_count and all(
+        isinstance(message, dict) and message.get('timestamp') for message in messages
+    ):
+        messages.sort(key=lambda message: message['timestamp'])
+    return messages
@@ -0,0 +1,289 @@
+import asyncio
+import multiprocessing
+import os
+import signal
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from threading import Lock
+from typing import Dict, Optional, Tuple, Union
+
+from structured_log import fields, get_logger
+
+logger = get_logger("extract_pool")
+
+try:
+    import trafilatura
+except ImportError:
+    trafilatura = None  # search_api에서 HAS_TRAFILATURA로 확인 후 호출
+
+# ===== 본문 추출 프로세스 풀 =====
+# trafilatura.extract(lxml 파싱)는 CPU 작업이라 스레드에서 돌리면 GIL을 잡아
+# 동시 검색이 몰릴 때 다른 요청과 이벤트 루프까지 느려짐 → 상주 프로세스 풀에서 실행
+# - 전달: 응답 본문 bytes와 헤더의 charset만 보냄 (부모에서 디코딩/문자 인코딩 추정을 하지 않고,
+#   bytes는 파이프로 한 번만 복사됨), 결과는 잘라낸 본문(최대 1500자)만 돌아옴
+# - 작업별 CPU 시간 제한: 워커에서 ITIMER_PROF로 EXTRACT_CPU_LIMIT초가 넘으면 중단 (추출 실패로 처리)
+#   CPU/대기 시간 초과 결과에는 "transient": True 표시 → 호출 측에서 오래 캐시하거나 도메인 실패로 세지 않음
+# - 풀을 쓸 수 없으면(EXTRACT_POOL_WORKERS=0, start() 전, 워커 비정상 종료 등) 기존처럼 스레드에서 추출,
+#   대기 작업이 EXTRACT_MAX_PENDING개를 넘는 과부하 때도 스레드에서 추출
+# - 깨진 풀은 요청 경로에서 다시 fork하지 않음 (요청 스레드들이 락을 잡고 있는 중에 fork하면 워커가 멈출 수 있음)
+#   → 손상 표시만 하고, maintain_loop()가 EXTRACT_REBUILD_INTERVAL초마다 확인해 이벤트 루프 스레드에서 새로 만듦
+# - 워커는 nice 값을 올려 실행: CPU가 부족할 때 이벤트 루프가 추출 작업에 밀리지 않음
+#   (CPU 1개 기준 bench_extraction.py 동시 검색 1개: 루프 지연 p99 28ms → 2ms)
+# - 워커는 fork로 만듦: forkserver/spawn은 `python main.py`로 실행할 때 워커마다 main.py를 다시 실행함
+#   스레드가 적은 시작 시점(lifespan)에 미리 start()해서 fork, start()를 호출하지 않는 경로(Flask 등)는 스레드에서 추출
+
+EXTRACT_POOL_WORKERS = int(os.environ.get("EXTRACT_POOL_WORKERS", str(min(2, os.cpu_count() or 1))))
+EXTRACT_CPU_LIMIT = float(os.environ.get("EXTRACT_CPU_LIMIT", "2.0"))
+EXTRACT_MAX_PENDING = int(os.environ.get("EXTRACT_MAX_PENDING", str(max(EXTRACT_POOL_WORKERS, 1) * 32)))
+EXTRACT_WAIT_TIMEOUT = float(os.environ.get("EXTRACT_WAIT_TIMEOUT", "10"))
+EXTRACT_WORKER_NICE = int(os.environ.get("EXTRACT_WORKER_NICE", "10"))
+EXTRACT_REBUILD_INTERVAL = float(os.environ.get("EXTRACT_REBUILD_INTERVAL", "30"))
+
+def extract_content(url: str, html: Union[str, bytes], max_chars: int = 500, encoding: Optional[str] = None) -> Dict:
+    """HTML에서 본문 추출 (Trafilatura, CPU 작업) - bytes는 charset이 있으면 디코딩, 없으면 trafilatura가 추정"""
+    if isinstance(html, bytes) and encoding:
+        try:
+            html = html.decode(encoding, errors="replace")
+        except LookupError:
+            pass
+
+    text = trafilatura.extract(
+        html,
+        include_comments=False,
+        include_tables=False,
+        no_fallback=False
+    )
+
+    if not text or len(text.strip()) < 50:
+        return {
+            "url": url,
+            "summary": "내용을 추출할 수 없습니다.",
+            "success": False
+        }
+
+    summary = text[:max_chars].strip()
+    if len(text) > max_chars:
+        summary += "..."
+
+    return {
+        "url": url,
+        "summary": summary,
+        "full_text": text[:1500],
+        "success": True
+    }
+
+def _failure(url: str, summary: str) -> Dict:
+    return {"url": url, "summary": summary, "success": False}
+
+def _timed_out(url: str) -> Dict:
+    """풀의 CPU/대기 시간 초과 (페이지 자체가 아니라 추출 과부하 때문일 수 있는 일시적 실패)"""
+    return {**_failure(url, "본문 추출 시간 초과"), "transient": True}
+
+class _CpuLimitExceeded(BaseException):
+    """워커의 CPU 시간 초과 (trafilatura 내부의 except Exception에 잡히지 않도록 BaseException)"""
+
+def _on_cpu_limit(signum, frame):
+    raise _CpuLimitExceeded()
+
+def _init_worker(niceness: int):
+    # Ctrl+C/종료 신호는 부모가 처리하고 풀을 정리함
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGPROF, _on_cpu_limit)
+    # CPU를 두고 경쟁할 때는 요청을 처리하는 부모 프로세스(이벤트 루프)가 먼저 실행되도록
+    if niceness:
+        try:
+            os.nice(niceness)
+        except OSError:
+            pass
+
+def _extract_in_worker(url: str, content: bytes, encoding: Optional[str], max_chars: int,
+                       cpu_limit: float) -> Tuple[Optional[Dict], float]:
+    """워커 프로세스에서 실행 → (추출 결과 또는 CPU 시간 초과 시 None, 사용한 CPU 시간)"""
+    started = time.process_time()
+    result = None
+    try:
+        signal.setitimer(signal.ITIMER_PROF, cpu_limit)
+        try:
+            result = extract_content(url, content, max_chars, encoding)
+        finally:
+            signal.setitimer(signal.ITIMER_PROF, 0)
+    except _CpuLimitExceeded:
+        pass
+    return result, time.process_time() - started
+
+class ExtractionPool:
+    """
+    trafilatura 추출용 상주 프로세스 풀 (워커 프로세스별 1개)
+    - extract(): 동기 (Flask 경로의 스크래핑 스레드에서 호출)
+    - extract_async(): 이벤트 루프에서 호출 (풀을 못 쓰면 스레드에서 추출)
+    - 워커 fork는 start()/rebuild_if_broken()에서만 (추출 호출은 fork하지 않음)
+    """
+    def __init__(self, workers: int = EXTRACT_POOL_WORKERS, cpu_limit: float = EXTRACT_CPU_LIMIT,
+                 max_pending: int = EXTRACT_MAX_PENDING, wait_timeout: float = EXTRACT_WAIT_TIMEOUT):
+        self.workers = workers
+        self.cpu_limit = cpu_limit
+        self.max_pending = max_pending
+        # 대기열 시간 포함 결과 대기 상한 (워커가 CPU 제한 신호를 처리하지 못하는 경우 대비)
+        self.wait_timeout = max(wait_timeout, cpu_limit)
+        self.executor: Optional[ProcessPoolExecutor] = None
+        self.lock = Lock()
+        self.pending = 0
+        self.pooled = 0
+        self.inline = 0
+        self.busy_fallbacks = 0
+        self.cpu_limited = 0
+        self.wait_timeouts = 0
+        self.broken = 0
+        self.rebuilt = 0
+        self.needs_rebuild = False
+        self.cpu_seconds = 0.0
+
+    def start(self) -> Optional[ProcessPoolExecutor]:
+        """풀 생성 및 워커 fork (이미 있으면 그대로 반환, 사용할 수 없으면 None)"""
+        with self.lock:
+            if self.executor is not None or self.workers <= 0:
+                return self.executor
+            try:
+                self.executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("fork"),
+                    initializer=_init_worker,
+                    initargs=(EXTRACT_WORKER_NICE,)
+                )
+                # fork 컨텍스트는 첫 작업 제출 때 워커를 모두 만듦 → 지금 fork
+                self.executor.submit(os.getpid)
+            except (OSError, ValueError) as e:
+                logger.warning("⚠️ 추출 프로세스 풀을 만들 수 없어 스레드에서 추출합니다", extra=fields(error=str(e)))
+                self.workers = 0
+                self.executor = None
+                return None
+            logger.info("✅ 추출 프로세스 풀 시작", extra=fields(workers=self.workers, cpu_limit=self.cpu_limit))
+            return self.executor
+
+    def shutdown(self):
+        with self.lock:
+            executor, self.executor = self.executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _discard(self, executor: ProcessPoolExecutor, error: BaseException):
+        """워커가 비정상 종료된 풀은 버리고 손상 표시 (다시 만들 때까지 스레드에서 추출)"""
+        with self.lock:
+            if self.executor is not executor:
+                return
+            self.executor = None
+            self.broken += 1
+            self.needs_rebuild = True
+        logger.warning("⚠️ 추출 프로세스 풀 손상 → 다시 만들 때까지 스레드에서 추출", extra=fields(error=str(error)))
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def rebuild_if_broken(self) -> bool:
+        """손상된 풀을 새로 만듦 (요청 처리 중이 아닌 maintain_loop에서 호출) → 새로 만들었으면 True"""
+        with self.lock:
+            if not self.needs_rebuild:
+                return False
+            self.needs_rebuild = False
+        if self.start() is None:
+            return False
+        with self.lock:
+            self.rebuilt += 1
+        return True
+
+    async def maintain_loop(self, interval: float = EXTRACT_REBUILD_INTERVAL):
+        """interval초마다 손상된 풀 재생성 (손상이 반복돼도 fork는 interval마다 최대 1번)"""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                self.rebuild_if_broken()
+            except Exception as e:
+                logger.warning("⚠️ 추출 프로세스 풀 재생성 오류", extra=fields(error=str(e)))
+
+    def _release(self, _future: Future):
+        with self.lock:
+            self.pending -= 1
+
+    def _submit(self, url: str, content: bytes, encoding: Optional[str], max_chars: int):
+        """풀에 작업 제출 → (executor, future), 풀이 없거나(시작 전/손상) 대기 작업이 가득 차면 None"""
+        with self.lock:
+            executor = self.executor
+            if executor is None:
+                return None
+            if self.pending >= self.max_pending:
+                self.busy_fallbacks += 1
+                return None
+            self.pending += 1
+        try:
+            future = executor.submit(_extract_in_worker, url, content, encoding, max_chars, self.cpu_limit)
+        except (BrokenProcessPool, RuntimeError) as e:
+            self._release(None)
+            self._discard(executor, e)
+            return None
+        future.add_done_callback(self._release)
+        return executor, future
+
+    def _unpack(self, url: str, outcome: Tuple[Optional[Dict], float]) -> Dict:
+        result, cpu_seconds = outcome
+        with self.lock:
+            self.pooled += 1
+            self.cpu_seconds += cpu_seconds
+            if result is None:
+                self.cpu_limited += 1
+        if result is None:
+            logger.info("⏱️ 본문 추출 CPU 시간 초과", extra=fields(url=url, cpu_limit=self.cpu_limit))
+            return _timed_out(url)
+        return result
+
+    def _wait_timed_out(self, url: str) -> Dict:
+        with self.lock:
+            self.wait_timeouts += 1
+        logger.info("⏱️ 본문 추출 대기 시간 초과", extra=fields(url=url, wait_timeout=self.wait_timeout))
+        return _timed_out(url)
+
+    def _extract_inline(self, url: str, content: bytes, encoding: Optional[str], max_chars: int) -> Dict:
+        with self.lock:
+            self.inline += 1
+        return extract_content(url, content, max_chars, encoding)
+
+    def extract(self, url: str, content: bytes, encoding: Optional[str] = None, max_chars: int = 500) -> Dict:
+        submitted = self._submit(url, content, encoding, max_chars)
+        if submitted is not None:
+            executor, future = submitted
+            try:
+                return self._unpack(url, future.result(timeout=self.wait_timeout))
+            except FutureTimeoutError:
+                return self._wait_timed_out(url)
+            except BrokenProcessPool as e:
+                self._discard(executor, e)
+        return self._extract_inline(url, content, encoding, max_chars)
+
+    async def extract_async(self, url: str, content: bytes, encoding: Optional[str] = None, max_chars: int = 500) -> Dict:
+        submitted = self._submit(url, content, encoding, max_chars)
+        if submitted is not None:
+            executor, future = submitted
+            try:
+                return self._unpack(url, await asyncio.wait_for(asyncio.wrap_future(future), self.wait_timeout))
+            except asyncio.TimeoutError:
+                return self._wait_timed_out(url)
+            except BrokenProcessPool as e:
+                self._discard(executor, e)
+        return await asyncio.to_thread(self._extract_inline, url, content, encoding, max_chars)
+
+    def get_stats(self) -> dict:
+        with self.lock:
+            return {
+                "workers": self.workers,
+                "running": self.executor is not None,
+                "pending": self.pending,
+                "pooled": self.pooled,
+                "inline": self.inline,
+                "busy_fallbacks": self.busy_fallbacks,
+                "cpu_limited": self.cpu_limited,
+                "wait_timeouts": self.wait_timeouts,
+                "broken": self.broken,
+                "rebuilt": self.rebuilt,
+                "cpu_seconds": round(self.cpu_seconds, 3)
+            }
+
+# 글로벌 추출 풀 인스턴스 (워커는 start() 때 fork, 그 전에는 스레드에서 추출)
+extract_pool = ExtractionPool()
@@ -0,0 +1,115 @@
+from collections import deque
+from typing import Any, Dict, Iterable, List, Tuple
+
+# ===== 다중 키워드 매처 (Aho-Corasick) =====
+# 키워드 표는 임포트 시 한 번만 빌드하고, 요청마다 입력 문자열을 한 번만 훑어
+# 모든 매치를 찾음 → 키워드를 추가해도 요청당 비용이 키워드 수에 비례해 늘지 않음
+
+class KeywordMatcher:
+    """
+    Aho-Corasick 오토마톤 기반 부분 문자열 매처
+    - patterns: (키워드, 값) 목록. 같은 키워드에 여러 값을 붙일 수 있음 (예: '카페' → 맛집/카페)
+    - 값의 우선순위는 patterns에 등장한 순서 (작을수록 우선)
+    """
+    def __init__(self, patterns: Iterable[Tuple[str, Any]]):
+        self.keywords: List[str] = []
+        self.values: List[List[Any]] = []
+        self.priority: List[int] = []  # 키워드별 최초 등장 순서
+        keyword_index: Dict[str, int] = {}
+
+        # 상태 0은 루트
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.output: List[List[int]] = [[]]
+
+        for order, (keyword, value) in enumerate(patterns):
+            if not keyword:
+                continue
+            index = keyword_index.get(keyword)
+            if index is None:
+                index = len(self.keywords)
+                keyword_index[keyword] = index
+                self.keywords.append(keyword)
+                self.values.append([])
+                self.priority.append(order)
+                self._insert(keyword, index)
+            if value not in self.values[index]:
+                self.values[index].append(value)
+
+        self._build_failure_links()
+
+    def _insert(self, keyword: str, index: int):
+        state = 0
+        for char in keyword:
+            next_state = self.goto[state].get(char)
+            if next_state is None:
+                next_state = len(self.goto)
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append([])
+                self.goto[state][char] = next_state
+            state = next_state
+        self.output[state].append(index)
+
+    def _build_failure_links(self):
+        """BFS로 실패 링크를 만들고, 전이표를 DFA로 펼침 (스캔 중 실패 링크를 따라가지 않도록)"""
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in list(self.goto[state].items()):
+                queue.append(next_state)
+                fallback = self.fail[state]
+                target = self.goto[fallback].get(char, 0) if state else 0
+                self.fail[next_state] = target if target != next_state else 0
+                # 실패 링크를 따라 도달하는 출력을 미리 합침
+                self.output[next_state] = self.output[next_state] + self.output[self.fail[next_state]]
+            if state:
+                # 이 상태에 없는 전이는 실패 상태의 전이를 그대로 사용 (BFS 순서라 이미 펼쳐져 있음)
+                for char, next_state in self.goto[self.fail[state]].items():
+                    self.goto[state].setdefault(char, next_state)
+        # 출력이 없는 상태는 None으로 두어 스캔 루프에서 빠르게 건너뜀
+        self.output = [out or None for out in self.output]
+
+    def find_all(self, text: str) -> List[Tuple[int, str]]:
+        """입력을 한 번 훑어 모든 매치를 (끝 위치, 키워드) 목록으로 반환"""
+        matches = []
+        state = 0
+        goto, output, keywords = self.goto, self.output, self.keywords
+        for position, char in enumerate(text):
+            state = goto[state].get(char, 0)
+            if output[state]:
+                for index in output[state]:
+                    matches.append((position, keywords[index]))
+        return matches
+
+    def matched_indices(self, text: str) -> List[int]:
+        """매치된 키워드 인덱스 (중복 제거, 우선순위 순)"""
+        found = set()
+        state = 0
+        goto, output = self.goto, self.output
+        for char in text:
+            state = goto[state].get(char, 0)
+            if output[state]:
+                found.update(output[state])
+        return sorted(found, key=self.priority.__getitem__)
+
+    def first_value(self, text: str) -> Any:
+        """우선순위가 가장 높은 매치 키워드의 첫 번째 값 (매치가 없으면 None)"""
+        best = None
+        state = 0
+        goto, output, priority = self.goto, self.output, self.priority
+        for char in text:
+            state = goto[state].get(char, 0)
+            if output[state]:
+                for index in output[state]:
+                    if best is None or priority[index] < priority[best]:
+                        best = index
+        return self.values[best][0] if best is not None else None
+
+    def score(self, text: str) -> Dict[Any, int]:
+        """값별 점수 (매치된 서로 다른 키워드 수)"""
+        scores: Dict[Any, int] = {}
+        for index in self.matched_indices(text):
+            for value in self.values[index]:
+                scores[value] = scores.get(value, 0) + 1
+        return scores
@@ -1,20 +1,23 @@
 import os
+import asyncio
 import json
 import re
 import time
-import traceback
+import zlib
+from contextlib import asynccontextmanager
 from datetime import date, datetime, timedelta, timezone
-from typing import TypedDict, List, Literal, Optional
-from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, TypedDict, List, Literal, Optional, Tuple
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
 from threading import Lock
 
 import uvicorn
 import google.generativeai as genai
 import firebase_admin
-from firebase_admin import credentials, auth, firestore
+from firebase_admin import credentials, auth, firestore_async
 from fastapi import FastAPI, Request, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
 from flask import Flask, request, Response, jsonify
 from flask_cors import CORS
@@ -22,77 +25,326 @@ from flask_cors import CORS
 from langgraph.graph import StateGraph, END
 from langgraph.checkpoint.memory import MemorySaver
 from fag_data import FAQ_DATA
+from keyword_matcher import KeywordMatcher
+from chat_limiter import LeasedChatLimiter
+from chat_store import AT_LEAST_ONCE, LAYOUT_ARRAY, ChatWriteBehind, load_daily_chat
+from extract_pool import extract_pool
+from provider_guard import provider_guard
+from scrape_health import scrape_health
+from token_cache import CertificatePrefetcher, VerifiedTokenCache
+import metrics
+import structured_log
+from metrics import stats_family
+from structured_log import RequestIdMiddleware, fields, get_logger, set_request_id
+
+logger = get_logger("server")
 
 # ===== 메모리 캐시 (TTL: 3시간) =====
+class _CacheEntry:
+    """캐시 항목 (직렬화된 페이로드 + 메타데이터만 보관)"""
+    __slots__ = ("key", "query", "payload", "compressed", "size", "expires_at", "hits")
+    
+    def __init__(self, key: str, query: str, payload: bytes, compressed: bool, expires_at: float):
+        self.key = key
+        self.query = query  # 백그라운드 갱신 시 재검색할 원래 쿼리
+        self.payload = payload
+        self.compressed = compressed
+        self.size = len(payload) + len(key.encode("utf-8")) + 120  # 슬롯 객체 오버헤드 근사치
+        self.expires_at = expires_at  # 이 시각 이후는 stale
+        self.hits = 0
+
 class MemoryCache:
-    """Thread-safe 메모리 캐시 (TTL 지원)"""
-    def __init__(self, ttl_seconds: int = 10800, max_size: int = 1000):
-        self.cache: OrderedDict = OrderedDict()
+    """
+    Thread-safe 메모리 캐시 (TTL + 바이트 용량 제한)
+    - 결과는 JSON 바이트로 직렬화해 보관, compress_threshold 이상이면 zlib 압축
+    - TTL이 모두 같으므로 삽입 순서 = 만료 순서 → 만료 큐 앞에서부터 O(1) 분할 상환 정리
+    - 용량(max_bytes) 초과 시 LRU 삭제
+    - TTL이 지난 항목도 stale_ttl 동안은 stale로 보관 (stale-while-revalidate)
+    - 통계는 증분 카운터로 관리 (get_stats는 락을 잡지 않음)
+    """
+    def __init__(self, ttl_seconds: int = 10800, max_bytes: int = 64 * 1024 * 1024, compress_threshold: int = 4096,
+                 stale_ttl_seconds: int = 3600, refresh_lease_seconds: int = 120):
+        self.cache: OrderedDict = OrderedDict()  # LRU 순서
+        self.expiry_queue: deque = deque()  # 만료 순서
         self.ttl = ttl_seconds  # 기본 3시간 (10800초)
-        self.max_size = max_size
+        self.stale_ttl = stale_ttl_seconds  # TTL 이후 stale 응답 허용 시간
+        self.max_bytes = max_bytes
+        self.compress_threshold = compress_threshold
+        self.total_bytes = 0
         self.lock = Lock()
+        self.refresh_lease = refresh_lease_seconds
+        self.refreshing: Dict[str, float] = {}  # 백그라운드 갱신 중인 키 → 임대 만료 시각
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evicted = 0
     
     def _generate_key(self, query: str) -> str:
-        """쿼리를 정규화하여 캐시 키 생성"""
-        return query.strip().lower()
+        """쿼리를 정규화하여 캐시 키 생성 (카테고리 + 정렬된 토큰)"""
+        from search_api import canonical_query_key
+        return canonical_query_key(query)
+    
+    def _encode(self, data: dict) -> Tuple[bytes, bool]:
+        payload = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        if len(payload) >= self.compress_threshold:
+            return zlib.compress(payload, 6), True
+        return payload, False
+    
+    @staticmethod
+    def _decode(payload: bytes, compressed: bool) -> dict:
+        return json.loads(zlib.decompress(payload) if compressed else payload)
+    
+    def _remove(self, entry: _CacheEntry):
+        """항목 삭제 (락 보유 상태에서 호출, 만료 큐의 참조는 페이로드만 해제)"""
+        del self.cache[entry.key]
+        self.total_bytes -= entry.size
+        entry.payload = b""
+    
+    def _sweep_expired(self, now: float):
+        """만료 큐 앞쪽의 만료 항목 정리 (stale 허용 시간까지 지난 항목, 락 보유 상태에서 호출)"""
+        queue = self.expiry_queue
+        while queue and queue[0].expires_at + self.stale_ttl <= now:
+            entry = queue.popleft()
+            # 덮어쓰기/삭제로 이미 교체된 항목은 건너뜀
+            if self.cache.get(entry.key) is entry:
+                self._remove(entry)
+                self.expired += 1
+                logger.debug("⏰ 캐시 만료", extra=fields(key=entry.key))
     
     def get(self, query: str) -> Optional[dict]:
-        """캐시에서 결과 가져오기"""
+        """캐시에서 결과 가져오기 (TTL 이내 항목만)"""
+        found = self.get_entry(query)
+        if found is None or found[1]:
+            return None
+        return found[0]
+    
+    def get_entry(self, query: str) -> Optional[Tuple[dict, bool]]:
+        """캐시에서 (결과, stale 여부) 가져오기 - TTL이 지났어도 stale 허용 시간 이내면 반환"""
         key = self._generate_key(query)
         with self.lock:
-            if key in self.cache:
-                cached_data = self.cache[key]
-                # TTL 체크
-                if time.time() - cached_data["timestamp"] < self.ttl:
-                    # LRU: 최근 사용한 항목을 맨 뒤로 이동
-                    self.cache.move_to_end(key)
-                    print(f"💾 캐시 히트: '{query}' (만료까지 {self.ttl - (time.time() - cached_data['timestamp']):.0f}초)")
-                    return cached_data["data"]
+            now = time.time()
+            self._sweep_expired(now)
+            entry = self.cache.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            # LRU: 최근 사용한 항목을 맨 뒤로 이동
+            self.cache.move_to_end(key)
+            entry.hits += 1
+            stale = entry.expires_at <= now
+            if stale:
+                self.stale_hits += 1
             else:
-                    # 만료된 캐시 삭제
-                    print(f"⏰ 캐시 만료: '{query}'")
-                    del self.cache[key]
-        return None
+                self.hits += 1
+            payload, compressed = entry.payload, entry.compressed
+        if stale:
+            logger.debug("♻️ stale 캐시 히트", extra=fields(query=query, stale_seconds=round(now - entry.expires_at)))
+        else:
+            logger.debug("💾 캐시 히트", extra=fields(query=query, ttl_seconds=round(entry.expires_at - now)))
+        # 역직렬화는 락 밖에서 수행
+        return self._decode(payload, compressed), stale
+    
+    def hot_expiring(self, window_seconds: int, min_hits: int) -> List[str]:
+        """window_seconds 안에 만료될 항목 중 min_hits 이상 조회된 항목의 쿼리 (조회수 내림차순)"""
+        with self.lock:
+            now = time.time()
+            candidates = []
+            # 만료 큐는 만료 시각 순이므로 앞에서부터 window까지만 확인
+            for entry in self.expiry_queue:
+                if entry.expires_at > now + window_seconds:
+                    break
+                if entry.expires_at <= now or self.cache.get(entry.key) is not entry:
+                    continue
+                if entry.hits >= min_hits:
+                    candidates.append(entry)
+        candidates.sort(key=lambda e: e.hits, reverse=True)
+        return [entry.query for entry in candidates]
+    
+    def try_claim_refresh(self, query: str) -> bool:
+        """백그라운드 갱신 권한 획득 (이미 갱신 중이면 False)"""
+        key = self._generate_key(query)
+        with self.lock:
+            now = time.time()
+            if self.refreshing.get(key, 0) > now:
+                return False
+            self.refreshing[key] = now + self.refresh_lease
+            return True
+    
+    def release_refresh(self, query: str):
+        """백그라운드 갱신 권한 반납"""
+        with self.lock:
+            self.refreshing.pop(self._generate_key(query), None)
     
     def set(self, query: str, data: dict):
         """캐시에 결과 저장"""
         key = self._generate_key(query)
+        payload, compressed = self._encode(data)
         with self.lock:
-            # 최대 크기 체크 (LRU: 가장 오래된 항목 삭제)
-            if len(self.cache) >= self.max_size:
-                oldest_key = next(iter(self.cache))
-                del self.cache[oldest_key]
-                print(f"🗑️ 캐시 용량 초과: '{oldest_key}' 삭제")
+            now = time.time()
+            self._sweep_expired(now)
+            old = self.cache.get(key)
+            if old is not None:
+                self._remove(old)
             
-            self.cache[key] = {
-                "data": data,
-                "timestamp": time.time()
-            }
-            print(f"💾 캐시 저장: '{query}' (총 {len(self.cache)}개)")
+            entry = _CacheEntry(key, query, payload, compressed, now + self.ttl)
+            if entry.size > self.max_bytes:
+                logger.warning("⚠️ 캐시 항목이 용량보다 큼", extra=fields(query=query, size=entry.size))
+                return
+            
+            self.cache[key] = entry
+            self.expiry_queue.append(entry)
+            self.total_bytes += entry.size
+            
+            # 용량 초과 체크 (LRU: 가장 오래된 항목 삭제)
+            while self.total_bytes > self.max_bytes:
+                oldest = next(iter(self.cache.values()))
+                self._remove(oldest)
+                self.evicted += 1
+                logger.debug("🗑️ 캐시 용량 초과로 삭제", extra=fields(key=oldest.key))
+            
+            logger.debug("💾 캐시 저장", extra=fields(query=query, entries=len(self.cache), bytes=self.total_bytes, compressed=compressed))
     
     def clear(self):
         """캐시 전체 삭제"""
         with self.lock:
             self.cache.clear()
-            print("🗑️ 캐시 전체 삭제")
+            self.expiry_queue.clear()
+            self.total_bytes = 0
+            logger.info("🗑️ 캐시 전체 삭제")
     
     def get_stats(self) -> dict:
-        """캐시 통계"""
-        with self.lock:
-            total = len(self.cache)
-            expired = sum(
-                1 for item in self.cache.values() 
-                if time.time() - item["timestamp"] >= self.ttl
-            )
-            return {
-                "total": total,
-                "valid": total - expired,
-                "expired": expired,
-                "ttl_hours": self.ttl / 3600
-            }
+        """캐시 통계 (증분 카운터 기반, 락 없이 조회)"""
+        return {
+            "backend": "memory",
+            "total": len(self.cache),
+            "bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "expired": self.expired,
+            "evicted": self.evicted,
+            "refreshing": len(self.refreshing),
+            "ttl_hours": self.ttl / 3600,
+            "stale_ttl_hours": self.stale_ttl / 3600
+        }
+
+# 글로벌 캐시 인스턴스 (TTL: 3시간, 최대 64MB)
+# CACHE_BACKEND=sqlite면 같은 호스트의 gunicorn 워커들이 하나의 캐시 파일을 공유
+CACHE_BACKEND = os.environ.get("CACHE_BACKEND", "memory").lower()
+if CACHE_BACKEND == "sqlite":
+    from shared_cache import SQLiteCache
+    memory_cache = SQLiteCache(
+        path=os.environ.get("CACHE_DB_PATH", "/tmp/modoo_search_cache.sqlite3"),
+        ttl_seconds=10800,
+        max_bytes=int(os.environ.get("MEMORY_CACHE_MAX_MB", "64")) * 1024 * 1024,
+        stale_ttl_seconds=int(os.environ.get("CACHE_STALE_TTL", "3600"))
+    )
+else:
+    memory_cache = MemoryCache(
+        ttl_seconds=10800,
+        max_bytes=int(os.environ.get("MEMORY_CACHE_MAX_MB", "64")) * 1024 * 1024,
+        stale_ttl_seconds=int(os.environ.get("CACHE_STALE_TTL", "3600"))
+    )
+
+async def cache_call(method, *args):
+    """이벤트 루프에서 캐시 메서드 호출 - SQLite 백엔드는 잠금/디스크 I/O(쓰기 busy 대기 최대 5초)로 막힐 수 있어 스레드 풀에서 실행"""
+    if CACHE_BACKEND == "sqlite":
+        return await asyncio.to_thread(method, *args)
+    return method(*args)
+
+# 리프레시 어헤드: 자주 조회되는 키를 만료 전에 미리 재검색
+REFRESH_AHEAD_INTERVAL = int(os.environ.get("REFRESH_AHEAD_INTERVAL", "60"))  # 확인 주기 (초)
+REFRESH_AHEAD_WINDOW = int(os.environ.get("REFRESH_AHEAD_WINDOW", "600"))  # 만료 몇 초 전부터 갱신
+REFRESH_AHEAD_MIN_HITS = int(os.environ.get("REFRESH_AHEAD_MIN_HITS", "3"))  # 갱신 대상 최소 조회수
+REFRESH_AHEAD_MAX_PER_CYCLE = 5  # 주기당 최대 갱신 수
+
+# ===== 동일 검색 합류 (single-flight) =====
+class InFlightSearch:
+    """진행 중인 검색 1건: 리더가 계산하고, 합류한 요청은 진행 청크를 구독"""
+    def __init__(self):
+        self.chunks: List[str] = []  # 늦게 합류한 요청에 재전송할 청크
+        self.subscribers: List[asyncio.Queue] = []
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+    
+    def publish(self, chunk: str):
+        """LLM 요약 청크를 모든 구독자에게 전달"""
+        self.chunks.append(chunk)
+        for queue in self.subscribers:
+            queue.put_nowait(chunk)
+    
+    def subscribe(self) -> asyncio.Queue:
+        """지금까지의 청크를 재전송받고 이후 청크를 구독 (None = 검색 종료)"""
+        queue: asyncio.Queue = asyncio.Queue()
+        for chunk in self.chunks:
+            queue.put_nowait(chunk)
+        if self.future.done():
+            queue.put_nowait(None)
+        else:
+            self.subscribers.append(queue)
+        return queue
+    
+    def finish(self, task: asyncio.Task):
+        """계산 완료 시 결과 전달 및 구독 종료"""
+        if task.cancelled():
+            self.future.cancel()
+        elif task.exception() is not None:
+            error = task.exception()
+            self.future.set_exception(error)
+            # 기다리는 요청이 없는 백그라운드 갱신도 있으므로 여기서 한 번 기록하고 예외를 확인 처리
+            # (asyncio의 "Future exception was never retrieved" 경고 방지)
+            self.future.exception()
+            logger.warning("⚠️ 검색 작업 실패", extra=fields(error=str(error), error_type=type(error).__name__))
+        else:
+            self.future.set_result(task.result())
+        for queue in self.subscribers:
+            queue.put_nowait(None)
+    
+    async def result(self) -> dict:
+        """계산 결과 대기"""
+        return await asyncio.shield(self.future)
+
+class SingleFlight:
+    """
+    동일 캐시 키의 동시 검색을 1건으로 합침 (이벤트 루프 내에서만 사용)
+    - 첫 요청(리더)이 검색을 실행하고, 같은 키의 요청은 그 결과와 진행 청크를 공유
+    - 계산은 독립 Task로 실행되므로 리더 연결이 끊겨도 합류한 요청은 결과를 받음
+    """
+    def __init__(self):
+        self.flights: Dict[str, InFlightSearch] = {}
+        self.leaders = 0
+        self.followers = 0
+    
+    def join(self, key: str, compute: Callable[[InFlightSearch], Awaitable[dict]]) -> Tuple[InFlightSearch, bool]:
+        """(진행 중인 검색, 리더 여부) 반환 - 진행 중인 검색이 없으면 새로 시작"""
+        flight = self.flights.get(key)
+        if flight is not None:
+            self.followers += 1
+            logger.debug("🔗 진행 중인 검색에 합류", extra=fields(key=key))
+            return flight, False
+        
+        flight = InFlightSearch()
+        self.flights[key] = flight
+        self.leaders += 1
+        
+        def on_done(task: asyncio.Task):
+            self.flights.pop(key, None)
+            flight.finish(task)
+        
+        asyncio.create_task(compute(flight)).add_done_callback(on_done)
+        return flight, True
+    
+    def get_stats(self) -> dict:
+        """합류 통계"""
+        return {
+            "in_flight": len(self.flights),
+            "leaders": self.leaders,
+            "followers": self.followers
+        }
 
-# 글로벌 캐시 인스턴스 (TTL: 3시간, 최대 1000개 쿼리)
-memory_cache = MemoryCache(ttl_seconds=10800, max_size=1000)
+# 글로벌 single-flight 인스턴스 (FastAPI /stream 전용)
+search_flights = SingleFlight()
 
 # --- 상수 및 환경 변수 설정 ---
 
@@ -102,14 +354,14 @@ DAILY_CHAT_LIMIT = 200
 
 if os.path.exists(cred_path):
     cred = credentials.Certificate(cred_path)
-    print("✅ 로컬 서비스 계정 파일로 Firebase 초기화")
+    logger.info("✅ 로컬 서비스 계정 파일로 Firebase 초기화")
 elif cred_json_str:
     try:
         cred_json = json.loads(cred_json_str)
         cred = credentials.Certificate(cred_json)
-        print("✅ 환경 변수(JSON)로 Firebase 초기화")
+        logger.info("✅ 환경 변수(JSON)로 Firebase 초기화")
     except Exception as e:
-        print(f"❌ Firebase 인증서 로드 실패: {e}")
+        logger.error("❌ Firebase 인증서 로드 실패", extra=fields(error=str(e)))
         cred = None
 else:
     # 개별 환경 변수로 Firebase 초기화 시도
@@ -135,119 +387,87 @@ else:
             }
             
             cred = credentials.Certificate(cred_dict)
-            print("✅ 개별 환경 변수로 Firebase 초기화")
+            logger.info("✅ 개별 환경 변수로 Firebase 초기화")
         except Exception as e:
-            print(f"❌ Firebase 개별 환경 변수 로드 실패: {e}")
+            logger.error("❌ Firebase 개별 환경 변수 로드 실패", extra=fields(error=str(e)))
             cred = None
     else:
-        print("⚠️ Firebase 서비스 계정 환경 변수 미설정.")
+        logger.warning("⚠️ Firebase 서비스 계정 환경 변수 미설정.")
         cred = None
 
 if cred:
     firebase_admin.initialize_app(cred)
-    db = firestore.client()
+    # 요청 경로의 Firestore 호출은 모두 AsyncClient로 (이벤트 루프를 막지 않음)
+    db = firestore_async.client()
 else:
     db = None
 
 GOOGLE_AI_KEY = os.getenv('GOOGLE_AI_KEY')
 if not GOOGLE_AI_KEY:
-    print("⚠️ GOOGLE_AI_KEY 환경 변수가 설정되지 않았습니다.")
+    logger.warning("⚠️ GOOGLE_AI_KEY 환경 변수가 설정되지 않았습니다.")
 genai.configure(api_key=GOOGLE_AI_KEY)
 
+# 이벤트 루프 밖에서 실행해야 하는 동기 작업(토큰 서명 검증, 추출 풀을 못 쓸 때의 trafilatura 추출, YouTube 검색 등)용
+# 크기가 정해진 스레드 풀 - 느린 동기 작업이 몰려도 스레드가 무한정 늘지 않음
+# (lifespan에서 기본 executor로 지정 → asyncio.to_thread도 여기서 실행, SQLite 캐시는 cache_call()로 넘길 때만)
+SYNC_EXECUTOR = ThreadPoolExecutor(
+    max_workers=int(os.getenv("SYNC_EXECUTOR_WORKERS", "16")),
+    thread_name_prefix="modoo-sync"
+)
+
 # --- 유틸리티 함수 ---
 
-def verify_firebase_token(id_token: str) -> dict:
-    """Firebase ID 토큰 검증"""
+# 검증된 ID 토큰 캐시 (토큰 해시 → 클레임, exp까지)
+token_cache = VerifiedTokenCache(
+    auth.verify_id_token,
+    max_entries=int(os.getenv("AUTH_TOKEN_CACHE_SIZE", "10000"))
+)
+
+def build_cert_prefetcher() -> Optional[CertificatePrefetcher]:
+    """토큰 검증기가 쓰는 인증서 요청 객체(HTTP 캐시)를 그대로 써서 공개 인증서를 미리 갱신"""
+    if not firebase_admin._apps:
+        return None
+    try:
+        from firebase_admin import _token_gen
+        verifier_request = auth._get_client(None)._token_verifier.request
+        return CertificatePrefetcher(verifier_request, _token_gen.ID_TOKEN_CERT_URI)
+    except Exception as e:
+        logger.warning("⚠️ Firebase 공개 인증서 미리 받기 비활성화", extra=fields(error=str(e)))
+        return None
+
+cert_prefetcher = build_cert_prefetcher()
+
+async def verify_firebase_token(id_token: str) -> dict:
+    """Firebase ID 토큰 검증 (검증된 토큰은 만료 전까지 캐시, 미스 시 서명 검증은 SYNC_EXECUTOR에서)"""
     try:
-        decoded_token = auth.verify_id_token(id_token)
+        decoded_token = await token_cache.verify_token(id_token, SYNC_EXECUTOR)
         return decoded_token
     except Exception as e:
-        print(f"❌ Firebase 토큰 검증 실패: {e}")
+        logger.info("❌ Firebase 토큰 검증 실패", extra=fields(error=str(e)))
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, 
             detail="유효하지 않거나 만료된 인증 토큰입니다."
         )
 
-async def check_and_update_chat_limit(uid: str) -> dict:
-    """일일 채팅 한도 확인 및 업데이트"""
-    if not db:
-        return {"canChat": True, "remainingChats": DAILY_CHAT_LIMIT}
-
-    today = date.today().isoformat()
-    limit_ref = db.collection('users').document(uid).collection('limits').document(today)
-    
-    @firestore.transactional
-    def update_in_transaction(transaction):
-        doc = limit_ref.get(transaction=transaction)
-        
-        if doc.exists:
-            data = doc.to_dict()
-            count = data.get('count', 0)
-            
-            if count >= DAILY_CHAT_LIMIT:
-                return {"canChat": False, "remainingChats": 0}
-            
-            new_count = count + 1
-            transaction.set(limit_ref, {'count': new_count, 'last_chat': datetime.now(timezone.utc)}, merge=True)
-            return {"canChat": True, "remainingChats": DAILY_CHAT_LIMIT - new_count}
-        else:
-            new_count = 1
-            transaction.set(limit_ref, {'count': new_count, 'created_at': datetime.now(timezone.utc), 'last_chat': datetime.now(timezone.utc)})
-            return {"canChat": True, "remainingChats": DAILY_CHAT_LIMIT - new_count}
-
-    try:
-        return update_in_transaction(db.transaction())
-    except Exception as e:
-        print(f"Error checking chat limit: {e}")
-        return {"canChat": False, "remainingChats": 0}
-
-
+# 일일 채팅 한도: Firestore에서 uid별로 블록 단위 임대 후 로컬 차감 (chat_limiter.LeasedChatLimiter)
+chat_limiter = LeasedChatLimiter(
+    db,
+    DAILY_CHAT_LIMIT,
+    block_size=int(os.getenv("CHAT_LIMIT_LEASE_SIZE", "10")),
+    idle_seconds=int(os.getenv("CHAT_LIMIT_LEASE_IDLE", "120"))
+)
 
-def save_chat_to_firestore(uid: str, message: dict, db: firestore.client) -> bool:
-    """
-    대화 메시지를 dailyChats 컬렉션에 저장 (AI 위로 채팅과 동일한 구조)
-    구조: collections/dailyChats/documents/{날짜}_{uid}
-    """
-    if not db:
-        print("❌ Firestore 클라이언트가 초기화되지 않았습니다.")
-        return False
-        
-    try:
-        from datetime import date
-        today = date.today().isoformat()  # YYYY-MM-DD
-        doc_id = f"{today}_{uid}"
-        
-        chat_ref = db.collection('dailyChats').document(doc_id)
-        
-        # 문서 존재 확인
-        doc = chat_ref.get()
-        
-        if doc.exists:
-            # 기존 문서에 메시지 추가
-            data = doc.to_dict()
-            existing_messages = data.get('messages', [])
-            existing_messages.append(message)
-            
-            chat_ref.update({
-                'messages': existing_messages,
-                'lastUpdated': datetime.now(timezone.utc)
-            })
-            print(f"✅ 기존 대화에 메시지 추가: {uid}")
-        else:
-            # 새 문서 생성
-            chat_ref.set({
-                'userId': uid,
-                'dateKey': today,
-                'messages': [message],
-                'lastUpdated': datetime.now(timezone.utc)
-            })
-            print(f"✅ 새 대화 문서 생성: {uid}")
-            
-        return True
-        
-    except Exception as e:
-        print(f"❌ 대화 저장 실패: {e}")
-        return False
+# 대화 저장: 요청 경로에서는 큐에 넣기만 하고 백그라운드에서 배치 기록 (chat_store.ChatWriteBehind)
+# CHAT_PERSIST_GUARANTEE: at_most_once | at_least_once(기본) | confirmed
+# CHAT_STORAGE_LAYOUT: array(기본, 프론트엔드가 읽는 messages 배열) | chunked(추가 전용 청크 서브컬렉션)
+chat_writer = ChatWriteBehind(
+    db,
+    guarantee=os.getenv("CHAT_PERSIST_GUARANTEE", AT_LEAST_ONCE),
+    flush_interval=float(os.getenv("CHAT_PERSIST_FLUSH_INTERVAL", "0.5")),
+    max_batch=int(os.getenv("CHAT_PERSIST_MAX_BATCH", "200")),
+    layout=os.getenv("CHAT_STORAGE_LAYOUT", LAYOUT_ARRAY),
+    chunk_size=int(os.getenv("CHAT_CHUNK_SIZE", "50"))
+)
 
 
 # --- 시스템 프롬프트 및 스키마 ---
@@ -293,6 +513,8 @@ def build_faq_keyword_map():
     return keyword_map
 
 FAQ_KEYWORD_MAP = build_faq_keyword_map()
+# FAQ 키워드 매처 (맵 순서가 곧 우선순위 - 먼저 등록된 키워드의 답변 선택)
+FAQ_MATCHER = KeywordMatcher(FAQ_KEYWORD_MAP.items())
 
 
 
@@ -311,25 +533,21 @@ def determine_intent(state: GraphState) -> GraphState:
         message = state["message"].lower().strip()
         
         # FAQ 매칭만 유지
-        found_answer = None
-        for keyword, answer in FAQ_KEYWORD_MAP.items():
-            if keyword in message:
-                found_answer = answer
-                break
+        found_answer = FAQ_MATCHER.first_value(message)
         
         if found_answer:
             state["final_response"] = found_answer
             state["intent"] = "faq_check"
-            print(f"[의도 파악] ❓ FAQ 매칭 완료")
+            logger.debug("[의도 파악] ❓ FAQ 매칭 완료")
             return state
 
         # 🎯 나머지 모든 요청을 검색으로 처리
         state["intent"] = "search_only"
-        print(f"[의도 파악] 🔍 검색 전용 모드")
+        logger.debug("[의도 파악] 🔍 검색 전용 모드")
         return state
     
     except Exception as e:
-        print(f"[의도 파악] ❌ 오류: {e}")
+        logger.warning("[의도 파악] ❌ 오류", extra=fields(error=str(e)))
         state["intent"] = "search_only"  # 오류 시 검색으로
         return state
 
@@ -338,20 +556,20 @@ def determine_intent(state: GraphState) -> GraphState:
 
 def call_general_chat_llm(state: GraphState) -> GraphState:
     """검색 전용 LLM 호출"""
-    print("[검색] 🔍 검색 LLM 호출 시작")
+    logger.debug("[검색] 🔍 검색 LLM 호출 시작")
     
     try:
         # 카테고리 분류 (안전한 임포트)
         try:
             from search_api import classify_query, SearchCategory, perform_search
             category, clean_query = classify_query(state["message"])
-            print(f"[검색] 📂 카테고리: {category.value}")
+            logger.debug("[검색] 📂 카테고리", extra=fields(category=category.value))
         except ImportError as e:
-            print(f"[검색] ⚠️ search_api 임포트 실패: {e}")
+            logger.error("[검색] ⚠️ search_api 임포트 실패", extra=fields(error=str(e)))
             category = None
             clean_query = state["message"]
         except Exception as e:
-            print(f"[검색] ⚠️ 카테고리 분류 실패: {e}")
+            logger.warning("[검색] ⚠️ 카테고리 분류 실패", extra=fields(error=str(e)))
             category = None
             clean_query = state["message"]
         
@@ -368,28 +586,56 @@ def call_general_chat_llm(state: GraphState) -> GraphState:
                 naver_secret=naver_secret,
                 serper_key=serper_key
             )
-                
-            if search_result.get("success"):
-                state["final_response"] = search_result.get("summary", "")
-                state["search_sources"] = search_result.get("sources", [])
-                state["has_search_results"] = True
-                print(f"[검색] ✅ 검색 완료: {len(state.get('search_sources', []))}개 출처")
-            else:
-                print(f"[검색] ⚠️ 검색 실패")
-                state["final_response"] = (
-                    "죄송해요, 현재 검색 서비스에 일시적인 문제가 있어요. 😥\n"
-                    "잠시 후 다시 시도해 주시거나, 다른 질문을 해주시겠어요?"
-                )
-                state["has_search_results"] = False
+            apply_search_result(state, search_result)
         else:
             # 검색 기능 비활성화 시 기본 응답
-            print(f"[검색] ⚠️ 검색 기능 비활성화")
+            logger.warning("[검색] ⚠️ 검색 기능 비활성화")
             state["final_response"] = "검색 기능이 일시적으로 사용할 수 없습니다. 잠시 후 다시 시도해주세요."
             state["has_search_results"] = False
         
     except Exception as e:
-        print(f"[검색] ❌ 오류: {e}")
-        traceback.print_exc()
+        logger.exception("[검색] ❌ 오류", extra=fields(error=str(e)))
+        state["final_response"] = (
+            "죄송해요, 검색 중 일시적인 오류가 발생했어요. 😓\n"
+            "다시 한 번 검색해 주시겠어요?"
+        )
+        state["has_search_results"] = False
+    
+    return state
+
+def apply_search_result(state: GraphState, search_result: dict) -> GraphState:
+    """검색 결과를 상태에 반영"""
+    if search_result.get("success"):
+        state["final_response"] = search_result.get("summary", "")
+        state["search_sources"] = search_result.get("sources", [])
+        state["has_search_results"] = True
+        logger.debug("[검색] ✅ 검색 완료", extra=fields(sources=len(state.get('search_sources', []))))
+    else:
+        logger.info("[검색] ⚠️ 검색 실패")
+        state["final_response"] = (
+            "죄송해요, 현재 검색 서비스에 일시적인 문제가 있어요. 😥\n"
+            "잠시 후 다시 시도해 주시거나, 다른 질문을 해주시겠어요?"
+        )
+        state["has_search_results"] = False
+    return state
+
+async def call_general_chat_llm_async(state: GraphState) -> GraphState:
+    """검색 전용 LLM 호출 (비동기, FastAPI 엔드포인트용)"""
+    logger.debug("[검색] 🔍 비동기 검색 LLM 호출 시작")
+    
+    try:
+        from search_api import perform_search_async
+        search_result = await perform_search_async(
+            state["message"],
+            genai,
+            naver_id=os.environ.get("NAVER_CLIENT_ID"),
+            naver_secret=os.environ.get("NAVER_CLIENT_SECRET"),
+            serper_key=os.environ.get("SERPER_KEY")
+        )
+        apply_search_result(state, search_result)
+    
+    except Exception as e:
+        logger.exception("[검색] ❌ 오류", extra=fields(error=str(e)))
         state["final_response"] = (
             "죄송해요, 검색 중 일시적인 오류가 발생했어요. 😓\n"
             "다시 한 번 검색해 주시겠어요?"
@@ -424,10 +670,141 @@ workflow.add_edge("call_general_chat_llm", END)
 
 memory_saver = MemorySaver()
 app_graph = workflow.compile(checkpointer=memory_saver)
-print("✅ LangGraph 초기화 완료")
+logger.info("✅ LangGraph 초기화 완료")
+
+# --- 검색 결과 캐시 갱신 (stale-while-revalidate / refresh-ahead) ---
+
+async def search_and_cache(query: str, cache_query: str, flight: InFlightSearch) -> dict:
+    """검색 실행 후 성공 결과를 캐시에 저장 (single-flight 계산 함수)"""
+    from search_api import perform_search_async
+    result = await perform_search_async(
+        query,
+        genai,
+        naver_id=os.environ.get("NAVER_CLIENT_ID"),
+        naver_secret=os.environ.get("NAVER_CLIENT_SECRET"),
+        serper_key=os.environ.get("SERPER_KEY"),
+        on_chunk=flight.publish
+    )
+    # 클라이언트 연결이 끊겨도 완성된 요약은 캐시에 저장 (저장 실패는 검색 결과에 영향 없음)
+    if result.get("success"):
+        try:
+            await cache_call(memory_cache.set, cache_query, result)
+        except Exception as e:
+            logger.warning("⚠️ 검색 결과 캐시 저장 실패", extra=fields(query=cache_query, error=str(e)))
+    return result
+
+async def release_refresh(query: str):
+    """백그라운드 갱신 권한 반납 (실패해도 refresh_lease 뒤에 만료되므로 경고만)"""
+    try:
+        await cache_call(memory_cache.release_refresh, query)
+    except Exception as e:
+        logger.warning("⚠️ 백그라운드 갱신 권한 반납 실패", extra=fields(query=query, error=str(e)))
+
+async def schedule_background_refresh(query: str, reason: str) -> bool:
+    """백그라운드 재검색 예약 (같은 키가 이미 검색/갱신 중이면 건너뜀)"""
+    key = memory_cache._generate_key(query)
+    if key in search_flights.flights:
+        return False
+    try:
+        claimed = await cache_call(memory_cache.try_claim_refresh, query)
+    except Exception as e:
+        logger.warning("⚠️ 백그라운드 갱신 권한 확인 실패", extra=fields(query=query, error=str(e)))
+        return False
+    if not claimed:
+        return False
+    if key in search_flights.flights:
+        # 갱신 권한을 얻는 동안 같은 키의 검색이 시작됨 → 그 결과가 캐시에 저장되므로 반납
+        await release_refresh(query)
+        return False
+    
+    async def refresh(flight: InFlightSearch) -> dict:
+        try:
+            return await search_and_cache(query, query, flight)
+        finally:
+            await release_refresh(query)
+    
+    logger.info("🔄 백그라운드 갱신 시작", extra=fields(reason=reason, query=query))
+    search_flights.join(key, refresh)
+    return True
+
+async def refresh_ahead_loop():
+    """자주 조회되는 캐시 키를 만료 전에 미리 재검색"""
+    while True:
+        await asyncio.sleep(REFRESH_AHEAD_INTERVAL)
+        try:
+            hot_keys = await asyncio.to_thread(
+                memory_cache.hot_expiring, REFRESH_AHEAD_WINDOW, REFRESH_AHEAD_MIN_HITS
+            )
+            for key in hot_keys[:REFRESH_AHEAD_MAX_PER_CYCLE]:
+                await schedule_background_refresh(key, "refresh-ahead")
+        except Exception as e:
+            logger.warning("⚠️ 리프레시 어헤드 오류", extra=fields(error=str(e)))
+
+# --- 캐시 히트 재생 속도 ---
+# 캐시된 요약을 타이핑하듯 나눠 보내는 속도 (요청의 replay_pace 또는 STREAM_REPLAY_PACE)
+# - instant: 한 번에 전송, typing: 20자씩 20ms 간격(기존 동작), fast: 80자씩 10ms 간격
+# - 숫자: 초당 글자 수 (20자 단위)
+REPLAY_PACES = {
+    "instant": (0, 0.0),
+    "fast": (80, 0.01),
+    "typing": (20, 0.02),
+}
+REPLAY_CHUNK_CHARS = 20
+STREAM_REPLAY_PACE = os.getenv("STREAM_REPLAY_PACE", "typing")
+
+def resolve_replay_pace(pace) -> Tuple[int, float]:
+    """재생 속도 지정값 → (청크 글자 수, 청크 간 지연 초), 청크 글자 수 0은 한 번에 전송"""
+    if pace is None or pace == "":
+        pace = STREAM_REPLAY_PACE
+    if isinstance(pace, str) and pace in REPLAY_PACES:
+        return REPLAY_PACES[pace]
+    try:
+        chars_per_second = float(pace)
+    except (TypeError, ValueError):
+        return REPLAY_PACES["typing"]
+    if chars_per_second <= 0:
+        return REPLAY_PACES["instant"]
+    return REPLAY_CHUNK_CHARS, REPLAY_CHUNK_CHARS / chars_per_second
+
+def replay_chunks(summary: str, chunk_chars: int) -> List[str]:
+    if not chunk_chars:
+        return [summary]
+    return [summary[i:i + chunk_chars] for i in range(0, len(summary), chunk_chars)]
+
+async def paced_replay(summary: str, pace=None):
+    """캐시된 요약을 지정 속도로 나눠 내보내는 비동기 제너레이터 (대기 중에 스레드/이벤트 루프를 잡지 않음)"""
+    chunk_chars, delay = resolve_replay_pace(pace)
+    for index, chunk in enumerate(replay_chunks(summary, chunk_chars)):
+        if index and delay:
+            await asyncio.sleep(delay)
+        yield chunk
 
 # --- FastAPI ---
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """앱 수명주기: 리프레시 어헤드/대화 저장/한도 정리/인증서 갱신/추출 풀 재생성 작업 실행, 종료 시 저장 큐 비우기·임대분 반납·공유 HTTP 커넥션 풀·추출 풀 정리"""
+    # asyncio.to_thread 등 남은 동기 작업도 크기가 정해진 SYNC_EXECUTOR에서 실행
+    asyncio.get_running_loop().set_default_executor(SYNC_EXECUTOR)
+    # 요청 스레드가 생기기 전에 추출 워커 fork
+    extract_pool.start()
+    background_tasks = [
+        asyncio.create_task(refresh_ahead_loop()),
+        asyncio.create_task(chat_limiter.reconcile_loop()),
+        asyncio.create_task(extract_pool.maintain_loop())
+    ]
+    if cert_prefetcher:
+        background_tasks.append(asyncio.create_task(cert_prefetcher.refresh_loop()))
+    chat_writer.start()
+    yield
+    for task in background_tasks:
+        task.cancel()
+    await chat_writer.drain()
+    await chat_limiter.reconcile(force=True)
+    from search_api import close_async_client
+    await close_async_client()
+    extract_pool.shutdown()
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -436,6 +813,7 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(RequestIdMiddleware)
 
 class ChatRequest(BaseModel):
     message: str
@@ -443,16 +821,21 @@ class ChatRequest(BaseModel):
     conversationHistory: List[dict]
     action: Optional[Literal["GENERAL_CHAT"]] = None
 
+class ChatHistoryRequest(BaseModel):
+    token: str
+    dateKey: Optional[str] = None  # YYYY-MM-DD (기본값: 오늘)
+
 class StreamRequest(BaseModel):
     query: str
     include_sources: Optional[bool] = True
     token: Optional[str] = None
+    replay_pace: Optional[str] = None  # 캐시 히트 재생 속도: instant | fast | typing | 초당 글자 수
 
 @app.post("/chat")
 async def chat_endpoint(request: ChatRequest):
     """검색 전용 채팅 엔드포인트"""
     try:
-        decoded_token = verify_firebase_token(request.token)
+        decoded_token = await verify_firebase_token(request.token)
         uid = decoded_token["uid"]
     except HTTPException as e:
         raise e
@@ -464,7 +847,7 @@ async def chat_endpoint(request: ChatRequest):
             "remainingChats": 0
         }
 
-    print(f"[채팅] 🔍 검색 전용 요청: {request.message[:50]}...")
+    logger.info("[채팅] 🔍 검색 전용 요청", extra=fields(message=request.message[:50]))
 
     try:
         # 기본 상태 설정
@@ -483,7 +866,7 @@ async def chat_endpoint(request: ChatRequest):
         
         # 한도 체크 (검색만 해당)
         if intent_result["intent"] == "search_only":
-            limit_status = await check_and_update_chat_limit(uid)
+            limit_status = await chat_limiter.acquire(uid)
             if not limit_status["canChat"]:
                 return {
                     "success": False,
@@ -497,7 +880,7 @@ async def chat_endpoint(request: ChatRequest):
             "content": request.message,
             "timestamp": datetime.now(timezone.utc)
         }
-        save_chat_to_firestore(uid, user_message, db)
+        await chat_writer.enqueue(uid, user_message)
 
         # 검색 실행
         graph_input = GraphState(
@@ -515,8 +898,8 @@ async def chat_endpoint(request: ChatRequest):
         if intent_result["intent"] == "faq_check":
             final_state = intent_result
         else:
-            # 검색 처리
-            final_state = call_general_chat_llm(graph_input)
+            # 검색 처리 (공유 커넥션 풀을 쓰는 비동기 검색)
+            final_state = await call_general_chat_llm_async(graph_input)
         
         # AI 응답 저장
         ai_message = {
@@ -524,7 +907,7 @@ async def chat_endpoint(request: ChatRequest):
             "content": final_state["final_response"],
             "timestamp": datetime.now(timezone.utc)
         }
-        save_chat_to_firestore(uid, ai_message, db)
+        await chat_writer.enqueue(uid, ai_message)
 
         return {
             "success": True,
@@ -535,13 +918,27 @@ async def chat_endpoint(request: ChatRequest):
         }
 
     except Exception as e:
-        print(f"[채팅] ❌ 오류: {e}")
+        logger.exception("[채팅] ❌ 오류", extra=fields(error=str(e)))
         return {
             "success": False,
             "response": "검색 중 오류가 발생했습니다. 다시 시도해주세요.",
             "sources": []
         }
 
+@app.post("/chat/history")
+async def chat_history_endpoint(request: ChatHistoryRequest):
+    """하루치 대화 기록 조회 (array/chunked 레이아웃 모두 순서대로 복원)"""
+    decoded_token = await verify_firebase_token(request.token)
+    if not db:
+        return {"success": False, "messages": []}
+
+    try:
+        messages = await load_daily_chat(db, decoded_token["uid"], request.dateKey)
+        return {"success": True, "messages": messages}
+    except Exception as e:
+        logger.warning("[대화 기록] ❌ 조회 실패", extra=fields(error=str(e)))
+        return {"success": False, "messages": []}
+
 @app.get("/")
 async def health_check():
     return {
@@ -558,7 +955,7 @@ async def stream_endpoint(request: StreamRequest):
     if not user_input:
         raise HTTPException(status_code=400, detail="query 필수")
     
-    def generate_sse():
+    async def generate_sse():
         start = time.time()
         
         try:
@@ -569,29 +966,38 @@ async def stream_endpoint(request: StreamRequest):
             cleaned_query = clean_query_func(user_input)
             force_refresh = bool(re.search(r'\[refresh:\d+\]', user_input))
             if force_refresh:
-                print(f"🔄 [FastAPI] 캐시 무시 플래그 감지: '{user_input}' → '{cleaned_query}'")
+                logger.info("🔄 [FastAPI] 캐시 무시 플래그 감지", extra=fields(query=user_input, cleaned=cleaned_query))
             
             # ===== 1️⃣ 캐시 확인 (정제된 쿼리로, force_refresh가 False일 때만) =====
-            cached_result = memory_cache.get(cleaned_query) if not force_refresh else None
+            # TTL이 지난 stale 결과도 즉시 반환하고, 백그라운드에서 1건만 재검색
+            cached_entry = None
+            if not force_refresh:
+                try:
+                    cached_entry = await cache_call(memory_cache.get_entry, cleaned_query)
+                except Exception as e:
+                    # 캐시 조회 실패(SQLite 잠금 등)는 미스로 처리하고 검색 진행
+                    logger.warning("⚠️ 캐시 조회 실패 → 미스로 처리", extra=fields(query=cleaned_query, error=str(e)))
+            cached_result, is_stale = cached_entry if cached_entry else (None, False)
             if cached_result:
+                if is_stale:
+                    await schedule_background_refresh(cleaned_query, "stale")
+                
                 yield sse_format({
                     "stage": "cache",
                     "status": "hit",
+                    "stale": is_stale,
                     "message": "💾 캐시된 결과 반환 중..."
                 })
                 
-                # 캐시된 요약을 스트리밍 형태로 반환
+                # 캐시된 요약을 요청한 속도로 스트리밍 (대기는 asyncio.sleep → 워커를 잡지 않음)
                 summary = cached_result.get("summary", "")
                 if summary:
-                    # 부드러운 스트리밍 효과
-                    chunks = [summary[i:i+20] for i in range(0, len(summary), 20)]
-                    for chunk in chunks:
+                    async for chunk in paced_replay(summary, request.replay_pace):
                         yield sse_format({
                             "stage": "synthesis",
                             "status": "streaming",
                             "partial_answer": chunk
                         })
-                        time.sleep(0.02)  # 자연스러운 속도
                 
                 yield sse_format({
                     "stage": "complete",
@@ -599,10 +1005,19 @@ async def stream_endpoint(request: StreamRequest):
                     "summary": summary,
                     "sources": cached_result.get("sources", []),
                     "elapsed": time.time() - start,
-                    "from_cache": True
+                    "from_cache": True,
+                    "stale": is_stale
                 })
                 return
             
+            # ===== 2️⃣ 동일 쿼리 검색 합류 (캐시 미스 직후, 진행 중인 검색이 있으면 결과 공유) =====
+            from search_api import classify_query, SearchCategory
+            
+            flight, is_leader = search_flights.join(
+                memory_cache._generate_key(cleaned_query),
+                lambda flight: search_and_cache(user_input, cleaned_query, flight)
+            )
+            
             # ===== 1️⃣ 쿼리 분류 =====
             yield sse_format({
                 "stage": "classify",
@@ -610,7 +1025,6 @@ async def stream_endpoint(request: StreamRequest):
                 "message": "🔍 검색 준비 중..."
             })
             
-            from search_api import classify_query, SearchCategory, perform_search
             category, clean_query = classify_query(user_input)
             
             yield sse_format({
@@ -625,20 +1039,20 @@ async def stream_endpoint(request: StreamRequest):
                 "stage": "search",
                 "status": "started", 
                 "message": f"🔍 {category.value} 검색 중...",
-                "progress": 10
+                "progress": 10,
+                "coalesced": not is_leader
             })
             
-            naver_id = os.environ.get("NAVER_CLIENT_ID")
-            naver_secret = os.environ.get("NAVER_CLIENT_SECRET")
-            serper_key = os.environ.get("SERPER_KEY")
+            # LLM 요약 청크를 생성되는 즉시 SSE로 전달 (None = 검색 종료)
+            chunk_queue = flight.subscribe()
+            while (chunk := await chunk_queue.get()) is not None:
+                yield sse_format({
+                    "stage": "synthesis",
+                    "status": "streaming",
+                    "partial_answer": chunk
+                })
             
-            search_result = perform_search(
-                user_input, 
-                genai,
-                naver_id=naver_id,
-                naver_secret=naver_secret,
-                serper_key=serper_key
-            )
+            search_result = await flight.result()
                 
             if search_result.get("success"):
                     yield sse_format({
@@ -650,9 +1064,6 @@ async def stream_endpoint(request: StreamRequest):
                         "sources": search_result.get("sources", []),
                         "message": f"✅ 검색 완료"
                     })
-                    
-                    # 캐시에 저장
-                    memory_cache.set(cleaned_query, search_result)
             else:
                     # 🔥 검색 실패 시 간단한 에러 메시지만 (Gemini 사용 안 함)
                     yield sse_format({
@@ -666,8 +1077,7 @@ async def stream_endpoint(request: StreamRequest):
                     })
 
         except Exception as e:
-            trace = traceback.format_exc()
-            print(f"❌ FastAPI SSE 에러: {e}\n{trace}")
+            logger.exception("❌ FastAPI SSE 에러", extra=fields(error=str(e)))
             yield sse_format({
                 "stage": "error",
                 "error": str(e),
@@ -686,23 +1096,120 @@ async def stream_endpoint(request: StreamRequest):
 
 @app.get("/health")
 async def health():
+    from search_api import scrape_cache, provider_cache
     return {
         "status": "healthy",
         "service": "검색 전용 서버",
         "timestamp": datetime.now(timezone.utc).isoformat(),
-        "cache": memory_cache.get_stats()
+        "cache": await cache_call(memory_cache.get_stats),
+        "scrape_cache": scrape_cache.get_stats(),
+        "provider_cache": provider_cache.get_stats(),
+        "provider_guard": provider_guard.get_stats(),
+        "scrape_health": scrape_health.get_stats(),
+        "extract_pool": extract_pool.get_stats(),
+        "search_flights": search_flights.get_stats(),
+        "chat_writer": chat_writer.get_stats(),
+        "chat_limiter": chat_limiter.get_stats(),
+        "auth_token_cache": token_cache.get_stats(),
+        "auth_cert_prefetch": cert_prefetcher.get_stats() if cert_prefetcher else None,
+        "logging": structured_log.get_stats()
     }
 
+def collect_service_metrics():
+    """각 구성 요소의 get_stats() 카운터를 /metrics 스크랩 시점에 읽어 옴 (값은 이 워커 프로세스 기준)"""
+    from search_api import scrape_cache, provider_cache, key_collapse_stats
+    cache = memory_cache.get_stats()
+    scrape = scrape_cache.get_stats()
+    provider = provider_cache.get_stats()
+    limiter = chat_limiter.get_stats()
+    writer = chat_writer.get_stats()
+    flights = search_flights.get_stats()
+    tokens = token_cache.get_stats()
+    guards = provider_guard.get_stats()
+    domains = scrape_health.get_stats(worst=0)
+    extraction = extract_pool.get_stats()
+    return [
+        stats_family("modoo_cache_events_total", "counter", "캐시 조회/정리 이벤트 수", cache,
+                     {"hits": "hit", "stale_hits": "stale_hit", "misses": "miss", "expired": "expired", "evicted": "evicted"},
+                     "event", {"cache": "search"}),
+        stats_family("modoo_cache_events_total", "counter", "캐시 조회/정리 이벤트 수", scrape,
+                     {"hits": "hit", "misses": "miss", "revalidated": "revalidated"}, "event", {"cache": "scrape"}),
+        stats_family("modoo_cache_events_total", "counter", "캐시 조회/정리 이벤트 수", provider,
+                     {"hits": "hit", "negative_hits": "negative_hit", "misses": "miss"}, "event", {"cache": "provider"}),
+        stats_family("modoo_cache_events_total", "counter", "캐시 조회/정리 이벤트 수", tokens,
+                     {"hits": "hit", "misses": "miss", "evicted": "evicted"}, "event", {"cache": "auth_token"}),
+        ("modoo_cache_entries", "gauge", "캐시 항목 수", [
+            ({"cache": "search"}, cache.get("total")),
+            ({"cache": "scrape"}, scrape.get("entries")),
+            ({"cache": "provider"}, provider.get("entries")),
+            ({"cache": "auth_token"}, tokens.get("total"))
+        ]),
+        ("modoo_cache_bytes", "gauge", "캐시 사용 바이트", [
+            ({"cache": "search"}, cache.get("bytes")),
+            ({"cache": "scrape"}, scrape.get("bytes"))
+        ]),
+        stats_family("modoo_search_flights_total", "counter", "동일 쿼리 합류 (leader: 실제 검색, follower: 합류)", flights,
+                     {"leaders": "leader", "followers": "follower"}, "role"),
+        ("modoo_search_flights_in_flight", "gauge", "진행 중인 검색 수", [({}, flights.get("in_flight"))]),
+        stats_family("modoo_query_keys", "gauge", "정규 쿼리 키 합치기 현황", key_collapse_stats.get_stats(),
+                     {"raw_keys": "raw", "canonical_keys": "canonical"}, "kind"),
+        stats_family("modoo_chat_limit_decisions_total", "counter", "채팅 한도 판정 수", limiter,
+                     {"local_grants": "local", "optimistic_grants": "optimistic", "denied": "denied"}, "decision"),
+        stats_family("modoo_chat_limit_lease_total", "counter", "채팅 한도 임대 이벤트 수", limiter,
+                     {"lease_requests": "request", "lease_errors": "error", "returned": "returned", "overshoot": "overshoot"},
+                     "event"),
+        ("modoo_chat_limit_active_leases", "gauge", "메모리에 있는 uid별 임대 수", [({}, limiter.get("active_leases"))]),
+        stats_family("modoo_chat_messages_total", "counter", "대화 저장 결과별 메시지 수", writer,
+                     {"written": "written", "dropped": "dropped"}, "outcome"),
+        stats_family("modoo_chat_batches_total", "counter", "대화 저장 배치 수", writer,
+                     {"batches": "ok", "failed_batches": "error"}, "outcome"),
+        ("modoo_chat_pending", "gauge", "저장 대기 중인 대화 메시지 수", [({}, writer.get("pending"))]),
+        ("modoo_provider_circuit_state", "gauge", "공급자 서킷 브레이커 상태 (현재 상태만 1)", [
+            ({"source": source, "state": state}, int(guard["state"] == state))
+            for source, guard in guards.items() for state in ("closed", "open", "half_open")
+        ]),
+        ("modoo_provider_timeout_seconds", "gauge", "공급자 적응형 타임아웃", [
+            ({"source": source}, guard["timeout"]) for source, guard in guards.items()
+        ]),
+        *(stats_family("modoo_provider_guard_events_total", "counter", "공급자 가드 이벤트 수", guard,
+                       {"timeouts": "timeout", "rejected": "rejected", "opened": "opened",
+                        "hedges": "hedge", "hedge_wins": "hedge_win"}, "event", {"source": source})
+          for source, guard in guards.items()),
+        stats_family("modoo_scrape_links_total", "counter", "도메인 점수판 링크 선택 결과", domains,
+                     {"selected": "selected", "skipped": "skipped", "explored": "explored"}, "decision"),
+        stats_family("modoo_scrape_domains", "gauge", "점수판 도메인 수 (bad: 건너뛰는 도메인)", domains,
+                     {"domains": "tracked", "bad_domains": "bad"}, "kind"),
+        stats_family("modoo_extract_tasks_total", "counter", "본문 추출 작업 수 (pooled: 프로세스 풀, inline: 스레드 폴백)",
+                     extraction, {"pooled": "pooled", "inline": "inline", "busy_fallbacks": "busy_fallback",
+                                  "cpu_limited": "cpu_limited", "wait_timeouts": "wait_timeout"}, "event"),
+        stats_family("modoo_extract_pool_events_total", "counter", "추출 프로세스 풀 손상/재생성 횟수", extraction,
+                     {"broken": "broken", "rebuilt": "rebuilt"}, "event"),
+        ("modoo_extract_cpu_seconds_total", "counter", "추출 워커가 사용한 CPU 시간", [({}, extraction.get("cpu_seconds"))]),
+        ("modoo_extract_pending", "gauge", "추출 풀 대기/실행 중인 작업 수", [({}, extraction.get("pending"))])
+    ]
+
+metrics.registry.register_collector(collect_service_metrics)
+
+@app.get("/metrics")
+async def metrics_api():
+    """Prometheus 텍스트 형식 메트릭 (워커 프로세스별 값, 수집기가 SQLite 캐시 통계를 읽으므로 cache_call로 렌더링)"""
+    body = await cache_call(metrics.registry.render)
+    return PlainTextResponse(body, media_type=metrics.CONTENT_TYPE)
+
 @app.post("/cache/clear")
 async def clear_cache_api():
     """캐시 수동 삭제 (관리자용)"""
-    memory_cache.clear()
+    from search_api import scrape_cache, provider_cache
+    await cache_call(memory_cache.clear)
+    scrape_cache.clear()
+    provider_cache.clear()
     return {"message": "캐시가 삭제되었습니다"}
 
 @app.get("/cache/stats")
 async def cache_stats_api():
-    """캐시 통계"""
-    return memory_cache.get_stats()
+    """캐시 통계 (정규 쿼리 키로 합쳐진 키 수 포함)"""
+    from search_api import key_collapse_stats
+    return {**await cache_call(memory_cache.get_stats), "canonicalization": key_collapse_stats.get_stats()}
 
 # ===== Flask 앱 (SSE 스트리밍용) =====
 flask_app = Flask(__name__)
@@ -724,7 +1231,6 @@ def stream_search():
     """SSE 스트리밍 검색"""
     # OPTIONS 요청 처리 (CORS preflight)
     if request.method == "OPTIONS":
-        print("📨 OPTIONS 요청 수신")
         response = Response("", status=200)
         response.headers["Access-Control-Allow-Origin"] = "*"
         response.headers["Access-Control-Allow-Methods"] = "POST, OPTIONS"
@@ -732,7 +1238,7 @@ def stream_search():
         response.headers["Access-Control-Max-Age"] = "3600"
         return response
 
-    print(f"📨 POST 요청 수신")
+    set_request_id(request.headers.get("X-Request-ID"))
     req = request.get_json(silent=True) or {}
     user_input = req.get("query", "").strip()
     
@@ -753,7 +1259,7 @@ def stream_search():
             cleaned_query = clean_query_func(user_input)
             force_refresh = bool(re.search(r'\[refresh:\d+\]', user_input))
             if force_refresh:
-                print(f"🔄 [Flask] 캐시 무시 플래그 감지: '{user_input}' → '{cleaned_query}'")
+                logger.info("🔄 [Flask] 캐시 무시 플래그 감지", extra=fields(query=user_input, cleaned=cleaned_query))
             
             # ===== 1️⃣ 캐시 확인 (정제된 쿼리로, force_refresh가 False일 때만) =====
             cached_result = memory_cache.get(cleaned_query) if not force_refresh else None
@@ -765,17 +1271,18 @@ def stream_search():
                 })
                 
                 # 캐시된 요약을 스트리밍 형태로 반환
+                # WSGI 제너레이터의 대기는 요청 스레드를 잡으므로 기본은 instant, 요청에서 지정할 때만 나눠 보냄
                 summary = cached_result.get("summary", "")
                 if summary:
-                    # 부드러운 스트리밍 효과
-                    chunks = [summary[i:i+20] for i in range(0, len(summary), 20)]
-                    for chunk in chunks:
+                    chunk_chars, delay = resolve_replay_pace(req.get("replay_pace") or "instant")
+                    for index, chunk in enumerate(replay_chunks(summary, chunk_chars)):
+                        if index and delay:
+                            time.sleep(delay)
                         yield sse_format({
                             "stage": "synthesis",
                             "status": "streaming",
                             "partial_answer": chunk
                         })
-                        time.sleep(0.02)  # 자연스러운 속도
                 
                 yield sse_format({
                     "stage": "complete",
@@ -844,8 +1351,7 @@ def stream_search():
                     })
 
         except Exception as e:
-            trace = traceback.format_exc()
-            print(f"❌ SSE 에러: {e}\n{trace}")
+            logger.exception("❌ SSE 에러", extra=fields(error=str(e)))
             yield sse_format({
                 "stage": "error",
                 "error": str(e),
@@ -880,13 +1386,17 @@ def flask_health_check():
 @flask_app.route("/cache/clear", methods=["POST"])
 def clear_cache():
     """캐시 수동 삭제 (관리자용)"""
+    from search_api import scrape_cache, provider_cache
     memory_cache.clear()
+    scrape_cache.clear()
+    provider_cache.clear()
     return jsonify({"message": "캐시가 삭제되었습니다"}), 200
 
 @flask_app.route("/cache/stats", methods=["GET"])
 def cache_stats():
-    """캐시 통계"""
-    return jsonify(memory_cache.get_stats()), 200
+    """캐시 통계 (정규 쿼리 키로 합쳐진 키 수 포함)"""
+    from search_api import key_collapse_stats
+    return jsonify({**memory_cache.get_stats(), "canonicalization": key_collapse_stats.get_stats()}), 200
 
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", 8080))
@@ -0,0 +1,205 @@
+import time
+from contextlib import contextmanager
+from threading import Lock
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from structured_log import fields, get_logger
+
+logger = get_logger("metrics")
+
+# ===== Prometheus 텍스트 형식 메트릭 =====
+# 외부 의존성 없이 카운터/히스토그램을 모아 /metrics에서 text/plain; version=0.0.4 형식으로 노출
+# 값은 워커 프로세스별 (gunicorn 워커가 여러 개면 스크랩마다 다른 워커가 응답하므로 워커별 포트로 스크랩하거나 합산 시 유의)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# 요청 단계 지연용 기본 버킷 (초)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 7.5, 10.0, 20.0)
+
+LabelValues = Tuple[str, ...]
+Sample = Tuple[Dict[str, str], float]
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+class Counter:
+    """단조 증가 카운터 (라벨 조합별)"""
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.values: Dict[LabelValues, float] = {}
+        self.lock = Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self.lock:
+            items = list(self.values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{_format_labels(dict(zip(self.labelnames, key)))} {_format_value(value)}")
+        return lines
+
+class Histogram:
+    """누적 버킷 히스토그램 (라벨 조합별 bucket/sum/count)"""
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # 라벨 조합 → [버킷별 개수..., +Inf 개수, 합계]
+        self.values: Dict[LabelValues, List[float]] = {}
+        self.lock = Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self.lock:
+            counts = self.values.get(key)
+            if counts is None:
+                counts = self.values[key] = [0] * (len(self.buckets) + 2)
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+                    break
+            else:
+                counts[len(self.buckets)] += 1
+            counts[-1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        """with 블록 실행 시간 기록 (예외가 나도 기록, outcome 라벨은 호출 측에서 지정)"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self.lock:
+            items = [(key, list(counts)) for key, counts in self.values.items()]
+        for key, counts in items:
+            labels = dict(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts[:-1]):
+                cumulative += count
+                bucket_labels = {**labels, "le": _format_value(bound) if bound != float("inf") else "+Inf"}
+                lines.append(f"{self.name}_bucket{_format_labels(bucket_labels)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(counts[-1])}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {cumulative}")
+        return lines
+
+# 스크랩 시점에 값을 읽어 오는 수집기: () → [(이름, 타입, 설명, [(라벨, 값), ...]), ...]
+Collector = Callable[[], Iterable[Tuple[str, str, str, List[Sample]]]]
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics: Dict[str, object] = {}
+        self.collectors: List[Collector] = []
+        self.lock = Lock()
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(name, lambda: Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(name, lambda: Histogram(name, documentation, labelnames, buckets))
+
+    def _register(self, name: str, factory):
+        with self.lock:
+            metric = self.metrics.get(name)
+            if metric is None:
+                metric = self.metrics[name] = factory()
+            return metric
+
+    def register_collector(self, collector: Collector):
+        with self.lock:
+            self.collectors.append(collector)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        with self.lock:
+            metrics = list(self.metrics.values())
+            collectors = list(self.collectors)
+        for metric in metrics:
+            lines.extend(metric.render())
+        # 같은 이름의 패밀리는 HELP/TYPE를 한 번만 쓰도록 샘플을 합침
+        families: Dict[str, Tuple[str, str, List[Sample]]] = {}
+        for collector in collectors:
+            try:
+                collected = list(collector())
+            except Exception as e:
+                logger.warning("⚠️ 메트릭 수집 실패", extra=fields(error=str(e)))
+                continue
+            for name, metric_type, documentation, samples in collected:
+                families.setdefault(name, (metric_type, documentation, []))[2].extend(samples)
+        for name, (metric_type, documentation, samples) in families.items():
+            lines.append(f"# HELP {name} {documentation}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            for labels, value in samples:
+                if value is None:
+                    continue
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+registry = MetricsRegistry()
+
+# ===== 파이프라인 단계 메트릭 =====
+SEARCH_STAGE_SECONDS = registry.histogram(
+    "modoo_search_stage_seconds", "검색 파이프라인 단계별 소요 시간 (classify/fetch_scrape/synthesis/total)",
+    ("stage", "category")
+)
+SEARCH_REQUESTS = registry.counter(
+    "modoo_search_requests_total", "검색 요청 수 (결과별: ok/no_sources/no_results/error/cancelled)", ("category", "outcome")
+)
+PROVIDER_FETCH_SECONDS = registry.histogram(
+    "modoo_provider_fetch_seconds", "공급자 API 호출 시간 (ok/empty/error/cached/circuit_open)",
+    ("source", "category", "outcome")
+)
+SCRAPE_SECONDS = registry.histogram(
+    "modoo_scrape_seconds",
+    "페이지 스크래핑 시간 (success/empty/not_modified/cached/unsupported/extract_timeout/timeout/blocked/error, "
+    "source: 링크를 돌려준 공급자)",
+    ("outcome", "category", "source")
+)
+SCRAPE_BODY_BYTES = registry.histogram(
+    "modoo_scrape_body_bytes", "스크래핑 본문 다운로드 크기 (SCRAPE_MAX_BYTES에서 잘렸는지)", ("truncated",),
+    buckets=(16384, 65536, 131072, 262144, 524288, 1048576, 2097152, 4194304)
+)
+CLASSIFY_SECONDS = registry.histogram(
+    "modoo_classify_seconds", "classify_query 쿼리 분류 시간 (모든 호출 경로, 검색 파이프라인의 stage=\"classify\"와 별도)",
+    ("category",), buckets=(0.00001, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01)
+)
+LLM_SECONDS = registry.histogram(
+    "modoo_llm_seconds", "Gemini 요약 호출 시간", ("model", "outcome", "category")
+)
+LLM_FIRST_CHUNK_SECONDS = registry.histogram(
+    "modoo_llm_first_chunk_seconds", "Gemini 스트리밍 첫 청크까지의 시간", ("model", "category")
+)
+FIRESTORE_SECONDS = registry.histogram(
+    "modoo_firestore_seconds", "Firestore 작업 시간 (limit_lease/limit_return/chat_commit)", ("op", "outcome")
+)
+
+def stats_family(name: str, metric_type: str, documentation: str, stats: Dict, keys: Dict[str, str],
+                 label: str, extra_labels: Optional[Dict[str, str]] = None) -> Tuple[str, str, str, List[Sample]]:
+    """get_stats() 딕셔너리 → 메트릭 패밀리 (keys: 통계 키 → 라벨 값)"""
+    extra_labels = extra_labels or {}
+    return (
+        name, metric_type, documentation,
+        [({**extra_labels, label: label_value}, stats.get(key)) for key, label_value in keys.items()]
+    )
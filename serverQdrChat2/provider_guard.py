@@ -0,0 +1,230 @@
+import os
+import time
+from collections import deque
+from threading import Lock
+from typing import Deque, Dict, Optional
+
+from structured_log import fields, get_logger
+
+logger = get_logger("provider_guard")
+
+# ===== 공급자별 적응형 타임아웃 / 헤징 / 서킷 브레이커 =====
+# 고정 5초 타임아웃 대신 공급자별 최근 응답 시간 분포로 타임아웃과 헤징 시점을 정하고,
+# 연속 실패하는 공급자는 쿨다운 동안 호출하지 않음 (남은 공급자 결과로 응답)
+# - 타임아웃: 최근 p99 × PROVIDER_TIMEOUT_MULTIPLIER (MIN~MAX 사이), 표본이 부족하면 MAX
+#   타임아웃으로 끝난 호출도 타임아웃 값으로 기록 → 공급자가 느려지면 타임아웃도 따라 늘어남
+# - 헤징: 응답이 p95를 넘기면 같은 요청을 한 번 더 보내고 먼저 온 응답 사용
+#   추가 요청은 요청 수의 PROVIDER_HEDGE_RATIO 비율까지만 (장애 시 부하가 두 배가 되지 않도록)
+# - 서킷 브레이커: 연속 실패 또는 최근 실패율이 기준을 넘으면 open → 쿨다운 후 half_open에서
+#   시험 요청 1건(최대 타임아웃)을 보내 성공하면 closed, 실패하면 다시 open
+
+PROVIDER_TIMEOUT_MIN = float(os.environ.get("PROVIDER_TIMEOUT_MIN", "1.0"))
+PROVIDER_TIMEOUT_MAX = float(os.environ.get("PROVIDER_TIMEOUT_MAX", "5.0"))
+PROVIDER_TIMEOUT_MULTIPLIER = float(os.environ.get("PROVIDER_TIMEOUT_MULTIPLIER", "2.0"))
+PROVIDER_LATENCY_WINDOW = int(os.environ.get("PROVIDER_LATENCY_WINDOW", "200"))
+PROVIDER_MIN_SAMPLES = int(os.environ.get("PROVIDER_MIN_SAMPLES", "20"))
+PROVIDER_HEDGE_RATIO = float(os.environ.get("PROVIDER_HEDGE_RATIO", "0.1"))
+PROVIDER_HEDGE_SOURCES = set(filter(None, os.environ.get("PROVIDER_HEDGE_SOURCES", "naver,google").split(",")))
+PROVIDER_BREAKER_FAILURES = int(os.environ.get("PROVIDER_BREAKER_FAILURES", "5"))
+PROVIDER_BREAKER_FAILURE_RATE = float(os.environ.get("PROVIDER_BREAKER_FAILURE_RATE", "0.5"))
+PROVIDER_BREAKER_WINDOW = int(os.environ.get("PROVIDER_BREAKER_WINDOW", "20"))
+PROVIDER_BREAKER_COOLDOWN = float(os.environ.get("PROVIDER_BREAKER_COOLDOWN", "30"))
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+class _SourceState:
+    """공급자 1개의 지연 분포, 헤징 예산, 브레이커 상태 (ProviderGuard.lock 안에서만 변경)"""
+    def __init__(self):
+        self.latencies: Deque[float] = deque(maxlen=PROVIDER_LATENCY_WINDOW)
+        self.outcomes: Deque[bool] = deque(maxlen=PROVIDER_BREAKER_WINDOW)  # True: 실패
+        self.quantiles: Optional[Dict[str, float]] = None  # latencies가 바뀌면 None (다음 조회 때 다시 계산)
+        self.ewma: Optional[float] = None
+        self.hedge_budget = 1.0
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.probe_started: Optional[float] = None
+        self.consecutive_failures = 0
+        self.requests = 0
+        self.successes = 0
+        self.failures = 0
+        self.timeouts = 0
+        self.rejected = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.opened = 0
+
+    def record_latency(self, latency: float):
+        self.latencies.append(latency)
+        self.quantiles = None
+        self.ewma = latency if self.ewma is None else 0.8 * self.ewma + 0.2 * latency
+
+    def quantile(self, name: str) -> Optional[float]:
+        if len(self.latencies) < PROVIDER_MIN_SAMPLES:
+            return None
+        if self.quantiles is None:
+            ordered = sorted(self.latencies)
+            last = len(ordered) - 1
+            self.quantiles = {
+                "p50": ordered[int(last * 0.50)],
+                "p95": ordered[int(last * 0.95)],
+                "p99": ordered[int(last * 0.99)]
+            }
+        return self.quantiles[name]
+
+class ProviderGuard:
+    """
+    공급자 호출 전후에 사용
+        if not provider_guard.allow(source): ...건너뜀
+        timeout = provider_guard.timeout_for(source)
+        ... 호출 → record_success(source, 소요 시간) / record_failure(source, 소요 시간, timed_out)
+        취소되거나 결과를 판정할 수 없으면 release(source) (half_open 시험 요청 해제)
+    """
+    def __init__(self):
+        self.sources: Dict[str, _SourceState] = {}
+        self.lock = Lock()
+
+    def _state(self, source: str) -> _SourceState:
+        state = self.sources.get(source)
+        if state is None:
+            state = self.sources[source] = _SourceState()
+        return state
+
+    def allow(self, source: str) -> bool:
+        """호출해도 되는지 (open이면 쿨다운이 지날 때까지 False, half_open이면 시험 요청 1건만 True)"""
+        now = time.monotonic()
+        with self.lock:
+            state = self._state(source)
+            if state.state == OPEN and now - state.opened_at >= PROVIDER_BREAKER_COOLDOWN:
+                state.state = HALF_OPEN
+                state.probe_started = None
+                logger.info("🔌 서킷 half_open (시험 요청)", extra=fields(source=source))
+            if state.state == HALF_OPEN:
+                # 시험 요청 결과가 기록되지 않은 채 최대 타임아웃이 지났으면 새 시험 요청 허용
+                if state.probe_started is None or now - state.probe_started > PROVIDER_TIMEOUT_MAX * 2:
+                    state.probe_started = now
+                    state.requests += 1
+                    return True
+            elif state.state == CLOSED:
+                state.requests += 1
+                state.hedge_budget = min(state.hedge_budget + PROVIDER_HEDGE_RATIO, 10.0)
+                return True
+            state.rejected += 1
+            return False
+
+    def timeout_for(self, source: str) -> float:
+        """이번 호출의 타임아웃 (초)"""
+        with self.lock:
+            state = self._state(source)
+            p99 = state.quantile("p99")
+            if state.state != CLOSED or p99 is None:
+                return PROVIDER_TIMEOUT_MAX
+            return min(max(p99 * PROVIDER_TIMEOUT_MULTIPLIER, PROVIDER_TIMEOUT_MIN), PROVIDER_TIMEOUT_MAX)
+
+    def hedge_delay(self, source: str) -> Optional[float]:
+        """헤징 요청을 보낼 시점 (p95, 초) - 헤징하지 않는 공급자이거나 표본이 부족하면 None"""
+        if source not in PROVIDER_HEDGE_SOURCES:
+            return None
+        with self.lock:
+            state = self._state(source)
+            return state.quantile("p95") if state.state == CLOSED else None
+
+    def try_hedge(self, source: str) -> bool:
+        """헤징 예산이 남아 있으면 1건 차감하고 True"""
+        with self.lock:
+            state = self._state(source)
+            if state.hedge_budget < 1.0:
+                return False
+            state.hedge_budget -= 1.0
+            state.hedges += 1
+            return True
+
+    def record_hedge_win(self, source: str):
+        with self.lock:
+            self._state(source).hedge_wins += 1
+
+    def deadline(self, source: str) -> float:
+        """헤징을 포함한 호출 전체의 상한 (바깥쪽 wait_for/future.result용)"""
+        timeout = self.timeout_for(source)
+        return (self.hedge_delay(source) or 0.0) + timeout + 0.5
+
+    def record_success(self, source: str, latency: float):
+        with self.lock:
+            state = self._state(source)
+            state.successes += 1
+            state.consecutive_failures = 0
+            state.outcomes.append(False)
+            state.record_latency(latency)
+            if state.state != CLOSED:
+                state.state = CLOSED
+                state.probe_started = None
+                state.outcomes.clear()
+                logger.info("✅ 서킷 closed (공급자 복구)", extra=fields(source=source, latency=round(latency, 3)))
+
+    def record_failure(self, source: str, latency: float, timed_out: bool = False):
+        with self.lock:
+            state = self._state(source)
+            state.failures += 1
+            state.consecutive_failures += 1
+            state.outcomes.append(True)
+            if timed_out:
+                # 타임아웃까지 걸린 시간을 하한값으로 기록 (다음 타임아웃이 늘어나도록)
+                state.timeouts += 1
+                state.record_latency(latency)
+            failure_rate = sum(state.outcomes) / len(state.outcomes)
+            if state.state == HALF_OPEN or (state.state == CLOSED and (
+                    state.consecutive_failures >= PROVIDER_BREAKER_FAILURES
+                    or (len(state.outcomes) >= PROVIDER_BREAKER_WINDOW
+                        and failure_rate >= PROVIDER_BREAKER_FAILURE_RATE))):
+                if state.state == CLOSED:
+                    state.opened += 1
+                state.state = OPEN
+                state.opened_at = time.monotonic()
+                state.probe_started = None
+                logger.warning("🔌 서킷 open (공급자 호출 중단)", extra=fields(
+                    source=source, consecutive_failures=state.consecutive_failures,
+                    failure_rate=round(failure_rate, 2), cooldown=PROVIDER_BREAKER_COOLDOWN
+                ))
+
+    def release(self, source: str):
+        """결과 없이 끝난 호출 (취소, 설정 오류 등) - half_open 시험 요청이면 다음 요청이 시험하도록 해제"""
+        with self.lock:
+            state = self._state(source)
+            if state.state == HALF_OPEN:
+                state.probe_started = None
+
+    def reset(self):
+        with self.lock:
+            self.sources.clear()
+
+    def get_stats(self) -> dict:
+        """공급자별 브레이커 상태와 지연 분포 (/health)"""
+        now = time.monotonic()
+        stats = {}
+        with self.lock:
+            for source, state in self.sources.items():
+                p99 = state.quantile("p99")
+                stats[source] = {
+                    "state": state.state,
+                    "cooldown_remaining": round(max(PROVIDER_BREAKER_COOLDOWN - (now - state.opened_at), 0), 1)
+                    if state.state == OPEN else 0,
+                    "consecutive_failures": state.consecutive_failures,
+                    "opened": state.opened,
+                    "requests": state.requests,
+                    "successes": state.successes,
+                    "failures": state.failures,
+                    "timeouts": state.timeouts,
+                    "rejected": state.rejected,
+                    "hedges": state.hedges,
+                    "hedge_wins": state.hedge_wins,
+                    "samples": len(state.latencies),
+                    "ewma": round(state.ewma, 4) if state.ewma is not None else None,
+                    "p50": state.quantile("p50"),
+                    "p95": state.quantile("p95"),
+                    "p99": p99,
+                    "timeout": min(max(p99 * PROVIDER_TIMEOUT_MULTIPLIER, PROVIDER_TIMEOUT_MIN), PROVIDER_TIMEOUT_MAX)
+                    if p99 is not None and state.state == CLOSED else PROVIDER_TIMEOUT_MAX
+                }
+        return stats
+
+# 글로벌 공급자 가드 인스턴스 (워커 프로세스별)
+provider_guard = ProviderGuard()
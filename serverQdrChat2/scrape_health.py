@@ -0,0 +1,219 @@
+import os
+import random
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from structured_log import fields, get_logger
+
+logger = get_logger("scrape_health")
+
+# ===== 도메인별 스크래핑 상태 =====
+# 항상 느리거나 403을 주거나 본문이 거의 안 나오는 도메인에 쿼리마다 5~7초씩 쓰지 않도록
+# 도메인별 성공률/응답 시간/추출 글자 수를 기록하고, 스크래핑할 링크를 고를 때 사용
+# - 모든 값은 반감기(SCRAPE_HEALTH_HALF_LIFE)로 감쇠 → 오래된 실패는 점점 잊혀져 다시 시도됨
+# - 시도가 MIN_ATTEMPTS 이상이고 성공률이 SKIP_BELOW 미만이면 건너뜀
+#   (EXPLORE_RATE 비율은 건너뛰지 않고 시도해 회복 여부 확인)
+# - 나머지 링크는 점수(성공률 × 추출량 / 응답 시간) 순으로 정렬해 쿼리당 스크래핑 예산 안에서 먼저 시도
+
+SCRAPE_HEALTH_HALF_LIFE = float(os.environ.get("SCRAPE_HEALTH_HALF_LIFE", "21600"))  # 6시간
+SCRAPE_HEALTH_MIN_ATTEMPTS = float(os.environ.get("SCRAPE_HEALTH_MIN_ATTEMPTS", "3"))
+SCRAPE_HEALTH_SKIP_BELOW = float(os.environ.get("SCRAPE_HEALTH_SKIP_BELOW", "0.25"))
+SCRAPE_HEALTH_EXPLORE_RATE = float(os.environ.get("SCRAPE_HEALTH_EXPLORE_RATE", "0.05"))
+SCRAPE_HEALTH_MAX_DOMAINS = int(os.environ.get("SCRAPE_HEALTH_MAX_DOMAINS", "5000"))
+
+# 처음 보는 도메인의 사전값 (가상의 시도 PRIOR_WEIGHT회, 성공률 PRIOR_SUCCESS, 응답 시간 PRIOR_LATENCY초)
+PRIOR_WEIGHT = 2.0
+PRIOR_SUCCESS = 0.5
+PRIOR_LATENCY = 1.0
+FULL_YIELD_CHARS = 1500  # extract_content가 full_text로 남기는 최대 글자 수
+
+def domain_of(url: str) -> str:
+    host = (urlsplit(url).hostname or "").lower()
+    return host[4:] if host.startswith("www.") else host
+
+class _DomainStats:
+    """감쇠 합계 (시도/성공/차단/타임아웃 횟수, 모든 시도의 응답 시간 합, 성공한 시도의 추출 글자 수 합)"""
+    __slots__ = ("attempts", "successes", "blocked", "timeouts", "latency_sum", "chars_sum", "updated_at")
+
+    def __init__(self, now: float):
+        self.attempts = 0.0
+        self.successes = 0.0
+        self.blocked = 0.0
+        self.timeouts = 0.0
+        self.latency_sum = 0.0
+        self.chars_sum = 0.0
+        self.updated_at = now
+
+    def copy(self) -> "_DomainStats":
+        stats = _DomainStats(self.updated_at)
+        for name in self.__slots__:
+            setattr(stats, name, getattr(self, name))
+        return stats
+
+    def decay(self, now: float):
+        factor = 0.5 ** ((now - self.updated_at) / SCRAPE_HEALTH_HALF_LIFE)
+        if factor < 1.0:
+            self.attempts *= factor
+            self.successes *= factor
+            self.blocked *= factor
+            self.timeouts *= factor
+            self.latency_sum *= factor
+            self.chars_sum *= factor
+        self.updated_at = now
+
+    def success_rate(self) -> float:
+        return (self.successes + PRIOR_SUCCESS * PRIOR_WEIGHT) / (self.attempts + PRIOR_WEIGHT)
+
+    def latency(self) -> float:
+        """시도당 평균 응답 시간 (실패/타임아웃까지 걸린 시간 포함)"""
+        return (self.latency_sum + PRIOR_LATENCY * PRIOR_WEIGHT) / (self.attempts + PRIOR_WEIGHT)
+
+    def yield_ratio(self) -> float:
+        """성공 시 추출 글자 수 / FULL_YIELD_CHARS"""
+        if self.successes < 0.5:
+            return 1.0
+        return min(self.chars_sum / self.successes / FULL_YIELD_CHARS, 1.0)
+
+    def score(self) -> float:
+        return self.success_rate() * (0.5 + 0.5 * self.yield_ratio()) / (0.5 + self.latency())
+
+    def is_bad(self) -> bool:
+        return self.attempts >= SCRAPE_HEALTH_MIN_ATTEMPTS and self.success_rate() < SCRAPE_HEALTH_SKIP_BELOW
+
+class DomainScoreboard:
+    """
+    Thread-safe 도메인 스크래핑 점수판 (워커 프로세스별, 최대 max_domains개 LRU)
+    - record(): 스크래핑 결과 기록 (success/empty/blocked/timeout/error, 캐시 히트는 기록하지 않음)
+    - select(): 건너뛸 도메인을 빼고 점수 순으로 정렬한 링크 목록 (최대 limit개)
+    - 건너뛸 도메인 집합(bad)은 도메인을 기록/조회할 때마다 갱신 → get_stats가 전체 도메인을 훑지 않음
+      (한동안 조회되지 않은 도메인의 감쇠는 다음 조회 때 반영)
+    """
+    def __init__(self, max_domains: int = SCRAPE_HEALTH_MAX_DOMAINS):
+        self.domains: OrderedDict = OrderedDict()
+        self.bad = set()
+        self.max_domains = max_domains
+        self.lock = Lock()
+        self.recorded = 0
+        self.selected = 0
+        self.skipped = 0
+        self.explored = 0
+
+    def _get(self, domain: str, now: float, create: bool) -> Optional[_DomainStats]:
+        stats = self.domains.get(domain)
+        if stats is None:
+            if not create:
+                return None
+            if len(self.domains) >= self.max_domains:
+                evicted, _ = self.domains.popitem(last=False)
+                self.bad.discard(evicted)
+            stats = self.domains[domain] = _DomainStats(now)
+        else:
+            stats.decay(now)
+            self._update_bad(domain, stats)
+        self.domains.move_to_end(domain)
+        return stats
+
+    def _update_bad(self, domain: str, stats: _DomainStats):
+        if stats.is_bad():
+            self.bad.add(domain)
+        else:
+            self.bad.discard(domain)
+
+    def record(self, url: str, outcome: str, latency: float, chars: int = 0):
+        domain = domain_of(url)
+        if not domain:
+            return
+        now = time.time()
+        with self.lock:
+            stats = self._get(domain, now, create=True)
+            stats.attempts += 1
+            stats.latency_sum += latency
+            if outcome == "success":
+                stats.successes += 1
+                stats.chars_sum += chars
+            elif outcome == "blocked":
+                stats.blocked += 1
+            elif outcome == "timeout":
+                stats.timeouts += 1
+            self.recorded += 1
+            was_bad = domain in self.bad
+            self._update_bad(domain, stats)
+            became_bad = not was_bad and domain in self.bad
+        if became_bad:
+            logger.debug("🚧 스크래핑 건너뛸 도메인", extra=fields(domain=domain, outcome=outcome))
+
+    def select(self, urls: List[str], limit: int) -> List[str]:
+        """스크래핑할 링크 선택 (중복 제거 → 나쁜 도메인 제외 → 점수 높은 순, 같은 점수는 원래 순서)"""
+        if limit <= 0:
+            return []
+        now = time.time()
+        candidates: List[Tuple[float, int, str]] = []
+        seen = set()
+        with self.lock:
+            for index, url in enumerate(urls):
+                if url in seen:
+                    continue
+                seen.add(url)
+                stats = self._get(domain_of(url), now, create=False)
+                if stats is None:
+                    candidates.append((_DEFAULT_SCORE, index, url))
+                    continue
+                if stats.is_bad():
+                    if random.random() >= SCRAPE_HEALTH_EXPLORE_RATE:
+                        self.skipped += 1
+                        continue
+                    self.explored += 1
+                candidates.append((stats.score(), index, url))
+            candidates.sort(key=lambda candidate: (-candidate[0], candidate[1]))
+            selected = [url for _, _, url in candidates[:limit]]
+            self.selected += len(selected)
+        return selected
+
+    def clear(self):
+        with self.lock:
+            self.domains.clear()
+            self.bad.clear()
+
+    def get_stats(self, worst: int = 5) -> dict:
+        """
+        점수판 통계 (/health) - 성공률이 낮은 도메인 worst개 포함
+        - 잠금 안에서는 카운터와 (worst > 0일 때만) 도메인 목록만 가져오고, 감쇠/정렬은 잠금 밖에서
+          복사본으로 계산 (select/record를 막지 않도록, 그 사이 갱신된 값이 섞여도 표시용이므로 무시)
+        """
+        with self.lock:
+            counters = {
+                "domains": len(self.domains),
+                "bad_domains": len(self.bad),
+                "recorded": self.recorded,
+                "selected": self.selected,
+                "skipped": self.skipped,
+                "explored": self.explored
+            }
+            snapshot = list(self.domains.items()) if worst > 0 else []
+        now = time.time()
+        candidates = []
+        for domain, stats in snapshot:
+            stats = stats.copy()
+            stats.decay(now)
+            if stats.attempts >= SCRAPE_HEALTH_MIN_ATTEMPTS:
+                candidates.append((domain, stats))
+        ranked = sorted(candidates, key=lambda item: item[1].success_rate())[:worst]
+        return {
+            **counters,
+            "worst": [{
+                "domain": domain,
+                "attempts": round(stats.attempts, 1),
+                "success_rate": round(stats.success_rate(), 2),
+                "blocked": round(stats.blocked, 1),
+                "timeouts": round(stats.timeouts, 1),
+                "latency": round(stats.latency(), 2)
+            } for domain, stats in ranked]
+        }
+
+_DEFAULT_SCORE = _DomainStats(0.0).score()
+
+# 글로벌 도메인 점수판 인스턴스
+scrape_health = DomainScoreboard()
@@ -1,36 +1,327 @@
+import asyncio
+import os
 import requests
+import httpx
 import json
-import traceback
 import time
 import re
-from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError
-from typing import Dict, List, Tuple, Optional
+import unicodedata
+from collections import OrderedDict
+from contextvars import ContextVar, copy_context
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait, TimeoutError
+from threading import Lock
+from typing import Callable, Dict, List, Tuple, Optional
 from enum import Enum
+from requests.adapters import HTTPAdapter
+
+from extract_pool import extract_pool
+from keyword_matcher import KeywordMatcher
+from provider_guard import provider_guard
+from scrape_health import scrape_health
+from structured_log import fields, get_logger
+from metrics import (
+    CLASSIFY_SECONDS, LLM_FIRST_CHUNK_SECONDS, LLM_SECONDS, PROVIDER_FETCH_SECONDS, SCRAPE_BODY_BYTES, SCRAPE_SECONDS,
+    SEARCH_REQUESTS, SEARCH_STAGE_SECONDS
+)
+
+logger = get_logger("search")
 
 # Trafilatura for fast web scraping
 try:
     import trafilatura
     HAS_TRAFILATURA = True
-    print("✅ Trafilatura 로드 완료")
+    logger.info("✅ Trafilatura 로드 완료")
 except ImportError:
     HAS_TRAFILATURA = False
-    print("⚠️ Trafilatura가 설치되지 않았습니다. pip install trafilatura")
+    logger.warning("⚠️ Trafilatura가 설치되지 않았습니다. pip install trafilatura")
+
+# HTTP/2 지원 (httpx[http2])
+try:
+    import h2  # noqa: F401
+    HAS_HTTP2 = True
+except ImportError:
+    HAS_HTTP2 = False
+    logger.warning("⚠️ h2가 설치되지 않아 HTTP/1.1로 동작합니다. pip install 'httpx[http2]'")
+
+NAVER_LOCAL_URL = "https://openapi.naver.com/v1/search/local.json"
+SERPER_SEARCH_URL = "https://google.serper.dev/search"
+SCRAPE_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+}
+
+# ===== 파이프라인 모드 설정 =====
+# 공급자(네이버/구글/유튜브)별 결과가 도착하는 즉시 해당 링크 스크래핑 시작
+SEARCH_PIPELINED = os.environ.get("SEARCH_PIPELINED", "true").lower() == "true"
+# 스크래핑 본문이 이 글자 수 이상 모이면 남은 작업을 기다리지 않고 요약 시작
+SYNTHESIS_MIN_CONTEXT_CHARS = int(os.environ.get("SYNTHESIS_MIN_CONTEXT_CHARS", "4500"))
+
+# ===== URL별 추출 본문 캐시 =====
+class ScrapeCache:
+    """
+    Thread-safe URL별 추출 본문 캐시 (TTL + 바이트 예산 + 조건부 재검증)
+    - TTL 이내: 네트워크 없이 저장된 summary/full_text 반환
+    - TTL 이후: 저장된 ETag/Last-Modified로 조건부 GET → 304면 재사용
+    - 바이트 예산 초과 시 가장 오래 사용하지 않은 URL부터 삭제 (LRU)
+    - 일시적 실패(추출 시간 초과)는 set(ttl=...)로 짧게만 저장
+    """
+    def __init__(self, ttl_seconds: int = 21600, max_bytes: int = 32 * 1024 * 1024):
+        self.entries: OrderedDict = OrderedDict()
+        self.ttl = ttl_seconds  # 기본 6시간
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+    
+    @staticmethod
+    def _entry_size(url: str, result: Dict) -> int:
+        """항목이 차지하는 대략적인 바이트 수"""
+        return (
+            len(url.encode("utf-8"))
+            + len(result.get("summary", "").encode("utf-8"))
+            + len(result.get("full_text", "").encode("utf-8"))
+            + 200  # dict/메타데이터 오버헤드
+        )
+    
+    def lookup(self, url: str, max_chars: int) -> Tuple[Optional[Dict], Dict[str, str]]:
+        """
+        (신선한 결과, 조건부 요청 헤더) 반환
+        - 신선한 결과가 있으면 바로 사용
+        - 없으면 만료된 항목의 검증자로 If-None-Match/If-Modified-Since 헤더 구성
+        """
+        key = (url, max_chars)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None, {}
+            
+            self.entries.move_to_end(key)
+            if time.time() - entry["stored_at"] < entry["ttl"]:
+                self.hits += 1
+                return dict(entry["result"]), {}
+            
+            self.misses += 1
+            headers = {}
+            if entry["etag"]:
+                headers["If-None-Match"] = entry["etag"]
+            if entry["last_modified"]:
+                headers["If-Modified-Since"] = entry["last_modified"]
+            return None, headers
+    
+    def revalidate(self, url: str, max_chars: int) -> Optional[Dict]:
+        """304 Not Modified 응답 시 항목 갱신 후 저장된 결과 반환"""
+        key = (url, max_chars)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            entry["stored_at"] = time.time()
+            self.revalidated += 1
+            return dict(entry["result"])
+    
+    def set(self, url: str, max_chars: int, result: Dict, etag: Optional[str] = None, last_modified: Optional[str] = None,
+            ttl: Optional[int] = None):
+        """추출 결과 저장 (200 응답에서 얻은 결과만 저장, ttl 미지정 시 기본 TTL)"""
+        key = (url, max_chars)
+        size = self._entry_size(url, result)
+        if size > self.max_bytes:
+            return
+        
+        with self.lock:
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.total_bytes -= old["size"]
+            
+            self.entries[key] = {
+                "result": dict(result),
+                "etag": etag,
+                "last_modified": last_modified,
+                "stored_at": time.time(),
+                "ttl": self.ttl if ttl is None else ttl,
+                "size": size
+            }
+            self.total_bytes += size
+            
+            # 바이트 예산 초과 시 LRU 삭제
+            while self.total_bytes > self.max_bytes and self.entries:
+                _, evicted = self.entries.popitem(last=False)
+                self.total_bytes -= evicted["size"]
+    
+    def clear(self):
+        """캐시 전체 삭제"""
+        with self.lock:
+            self.entries.clear()
+            self.total_bytes = 0
+    
+    def get_stats(self) -> dict:
+        """캐시 통계"""
+        with self.lock:
+            return {
+                "entries": len(self.entries),
+                "bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "revalidated": self.revalidated,
+                "ttl_hours": self.ttl / 3600
+            }
+
+# 추출 시간 초과 결과의 캐시 TTL (같은 무거운 페이지를 곧바로 다시 추출하지 않을 만큼만)
+SCRAPE_TRANSIENT_TTL = int(os.environ.get("SCRAPE_TRANSIENT_TTL", "120"))
+
+# 글로벌 스크래핑 캐시 인스턴스 (TTL: 6시간, 최대 32MB)
+scrape_cache = ScrapeCache(
+    ttl_seconds=int(os.environ.get("SCRAPE_CACHE_TTL", "21600")),
+    max_bytes=int(os.environ.get("SCRAPE_CACHE_MAX_MB", "32")) * 1024 * 1024
+)
+
+# ===== 공급자 응답 캐시 =====
+# 소스별 정상 응답 TTL (초)
+PROVIDER_CACHE_TTLS = {
+    "naver": 1800,    # 30분
+    "google": 3600,   # 1시간
+    "youtube": 3600,  # 1시간
+}
+PROVIDER_EMPTY_TTL = 120  # 빈 결과 (2분)
+PROVIDER_ERROR_TTL = 30   # 업스트림 에러 (30초)
+
+def _is_empty_provider_result(result: Dict) -> bool:
+    """공급자 응답에 검색 결과가 하나도 없는지 확인"""
+    data = result.get("data", {})
+    return not (data.get("items") or data.get("organic") or data.get("videos"))
+
+class ProviderCache:
+    """
+    Thread-safe 공급자 응답 캐시 ((source, final_query) 키)
+    - 정상 응답은 소스별 TTL로 저장
+    - 빈 결과/업스트림 에러는 짧은 TTL로 저장 (네거티브 캐시)
+    """
+    def __init__(self, max_size: int = 2000):
+        self.cache: OrderedDict = OrderedDict()
+        self.max_size = max_size
+        self.lock = Lock()
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+    
+    @staticmethod
+    def _generate_key(source: str, query: str) -> Tuple[str, str]:
+        return source, " ".join(query.lower().split())
+    
+    def get(self, source: str, query: str) -> Optional[Dict]:
+        """유효한 캐시 응답 반환 (없거나 만료되면 None)"""
+        key = self._generate_key(source, query)
+        with self.lock:
+            entry = self.cache.get(key)
+            if entry is None or entry["expires_at"] <= time.time():
+                if entry is not None:
+                    del self.cache[key]
+                self.misses += 1
+                return None
+            
+            self.cache.move_to_end(key)
+            if entry["negative"]:
+                self.negative_hits += 1
+                logger.debug("🚫 공급자 네거티브 캐시 히트", extra=fields(source=source, query=query))
+            else:
+                self.hits += 1
+                logger.debug("💾 공급자 응답 캐시 히트", extra=fields(source=source, query=query))
+            return entry["result"]
+    
+    def _store(self, key: Tuple[str, str], result: Dict, ttl: int, negative: bool):
+        with self.lock:
+            self.cache.pop(key, None)
+            if len(self.cache) >= self.max_size:
+                self.cache.popitem(last=False)
+            self.cache[key] = {
+                "result": result,
+                "expires_at": time.time() + ttl,
+                "negative": negative
+            }
+    
+    def set_result(self, source: str, query: str, result: Dict):
+        """공급자 응답 저장 (설정 오류 응답은 저장하지 않음)"""
+        if "error" in result:
+            return
+        key = self._generate_key(source, query)
+        if _is_empty_provider_result(result):
+            self._store(key, result, PROVIDER_EMPTY_TTL, negative=True)
+        else:
+            self._store(key, result, PROVIDER_CACHE_TTLS.get(source, 1800), negative=False)
+    
+    def set_error(self, source: str, query: str, result: Dict):
+        """업스트림 에러 응답 저장 (짧은 TTL)"""
+        self._store(self._generate_key(source, query), result, PROVIDER_ERROR_TTL, negative=True)
+    
+    def clear(self):
+        """캐시 전체 삭제"""
+        with self.lock:
+            self.cache.clear()
+    
+    def get_stats(self) -> dict:
+        """캐시 통계"""
+        with self.lock:
+            return {
+                "entries": len(self.cache),
+                "hits": self.hits,
+                "negative_hits": self.negative_hits,
+                "misses": self.misses
+            }
+
+# 글로벌 공급자 응답 캐시 인스턴스
+provider_cache = ProviderCache(max_size=2000)
+
+# ===== 공유 HTTP 커넥션 풀 =====
+# 요청마다 TCP+TLS 핸드셰이크를 새로 하지 않도록 keep-alive 커넥션을 재사용
+_http_session = requests.Session()
+_http_session.mount("https://", HTTPAdapter(pool_connections=20, pool_maxsize=20))
+_http_session.mount("http://", HTTPAdapter(pool_connections=20, pool_maxsize=20))
+
+_async_client: Optional[httpx.AsyncClient] = None
+
+def get_async_client() -> httpx.AsyncClient:
+    """공유 AsyncClient 반환 (keep-alive + HTTP/2 커넥션 풀)"""
+    global _async_client
+    if _async_client is None or _async_client.is_closed:
+        _async_client = httpx.AsyncClient(
+            http2=HAS_HTTP2,
+            follow_redirects=True,
+            timeout=httpx.Timeout(5.0, connect=3.0),
+            limits=httpx.Limits(
+                max_connections=100,
+                max_keepalive_connections=20,
+                keepalive_expiry=30
+            )
+        )
+    return _async_client
+
+async def close_async_client():
+    """공유 AsyncClient 종료 (앱 종료 시 호출)"""
+    global _async_client
+    if _async_client is not None and not _async_client.is_closed:
+        await _async_client.aclose()
+    _async_client = None
 
 def clean_query(query: str) -> str:
     """
     쿼리에서 불필요한 태그 제거
     - [refresh:타임스탬프] 제거
+    - 유니코드 NFC 정규화 (자모 분리된 한글 입력 통일)
     - 공백 정리
     """
     # [refresh:숫자] 패턴 제거
     cleaned = re.sub(r'\[refresh:\d+\]', '', query)
+    # 유니코드 NFC 정규화
+    cleaned = unicodedata.normalize("NFC", cleaned)
     # 연속된 공백을 하나로
     cleaned = re.sub(r'\s+', ' ', cleaned)
     # 앞뒤 공백 제거
     cleaned = cleaned.strip()
     
     if query != cleaned:
-        print(f"🧹 쿼리 정제: '{query}' → '{cleaned}'")
+        logger.debug("🧹 쿼리 정제", extra=fields(query=query, cleaned=cleaned))
     
     return cleaned
 
@@ -46,125 +337,393 @@ class SearchCategory(Enum):
     MUSIC = "music"
     GENERAL = "general"
 
+# 검색 키워드 매칭 (확장된 범위)
+CATEGORY_KEYWORDS = {
+    SearchCategory.VIDEO: [
+        "유튜브", "youtube", "영상", "동영상", "비디오", "video", "영화", "드라마", 
+        "예능", "다큐", "리뷰", "튜토리얼", "강의", "클립", "쇼츠"
+    ],
+    SearchCategory.MUSIC: [
+        "노래", "음악", "뮤직", "곡", "song", "music", "가수", "아티스트", 
+        "앨범", "싱글", "차트", "멜론", "스포티파이", "플레이리스트"
+    ],
+    SearchCategory.RESTAURANT: [
+        "맛집", "음식점", "레스토랑", "먹을곳", "식당", "요리", "음식", "메뉴",
+        "한식", "중식", "일식", "양식", "분식", "치킨", "피자", "햄버거",
+        "카페", "디저트", "베이커리", "빵집"
+    ],
+    SearchCategory.CAFE: [
+        "카페", "커피", "디저트", "베이커리", "빵집", "스타벅스", "이디야",
+        "투썸", "할리스", "커피빈", "라떼", "아메리카노", "케이크"
+    ],
+    SearchCategory.ACCOMMODATION: [
+        "숙소", "호텔", "모텔", "펜션", "리조트", "게스트하우스", "에어비앤비",
+        "민박", "콘도", "캠핑", "글램핑", "여관", "찜질방"
+    ],
+    SearchCategory.NEWS: [
+        "뉴스", "기사", "소식", "보도", "언론", "신문", "방송", "뉴스룸",
+        "속보", "헤드라인", "이슈", "사건", "정치", "경제", "사회", "문화"
+    ],
+    SearchCategory.SHOPPING: [
+        "쇼핑", "구매", "온라인쇼핑", "쿠팡", "11번가", "지마켓", "옥션",
+        "네이버쇼핑", "아마존", "이베이", "할인", "세일", "특가"
+    ],
+    SearchCategory.PRODUCT: [
+        "제품", "상품", "추천", "리뷰", "후기", "평점", "가격", "비교",
+        "스펙", "성능", "브랜드", "모델", "신제품", "베스트"
+    ],
+    SearchCategory.ACTIVITY: [
+        "체험", "관광", "여행", "놀거리", "데이트", "나들이", "축제", "이벤트",
+        "전시", "공연", "콘서트", "뮤지컬", "연극", "스포츠", "운동", "취미"
+    ],
+    SearchCategory.GENERAL: [
+        # 일반적인 검색 의도를 나타내는 키워드들
+        "정보", "자료", "데이터", "알아보기", "찾기", "검색", "조회",
+        "확인", "문의", "질문", "답변", "해결", "방법", "가이드",
+        "튜토리얼", "설명", "안내", "도움", "지원", "서비스"
+    ]
+}
+
+# 검색 요청 동사 (검색어에서 제거)
+REQUEST_VERBS = ["추천", "알려줘", "찾아줘", "검색", "해줘"]
+
+# 카테고리 키워드 매처 (임포트 시 한 번 빌드, 표 순서가 곧 우선순위)
+CATEGORY_MATCHER = KeywordMatcher(
+    (kw, category) for category, kws in CATEGORY_KEYWORDS.items() for kw in kws
+)
+_CATEGORY_PRIORITY = {category: rank for rank, category in enumerate(CATEGORY_KEYWORDS)}
+
+def score_categories(q: str) -> Dict[SearchCategory, int]:
+    """카테고리별 점수 (매치된 서로 다른 키워드 수), 우선순위 순서로 정렬 - q는 소문자 정제 쿼리"""
+    scores = CATEGORY_MATCHER.score(q)
+    return {category: scores[category] for category in sorted(scores, key=_CATEGORY_PRIORITY.__getitem__)}
+
+def strip_request_verbs(query: str) -> str:
+    """추천/알려줘/찾아줘 등 요청 동사 제거"""
+    for word in REQUEST_VERBS:
+        query = query.replace(word, "").strip()
+    return query
+
 def classify_query(query: str) -> Tuple[SearchCategory, str]:
     """쿼리 분류 (검색 전용)"""
+    started = time.perf_counter()
     # ✅ 1. 먼저 refresh 태그 제거
     clean_q = clean_query(query)
     q = clean_q.lower()
     
-    if query != clean_q:
-        print(f"[쿼리 정제] 원본: '{query}' → 정제됨: '{clean_q}'")
+    # 한 번의 스캔으로 모든 카테고리 매치 → 우선순위가 가장 높은 카테고리 선택
+    scores = score_categories(q)
+    if scores:
+        category = next(iter(scores))
+        # ✅ 추천/알려줘 등 제거
+        result = category, strip_request_verbs(clean_q)
+    else:
+        result = SearchCategory.GENERAL, clean_q
     
-    # 검색 키워드 매칭 (확장된 범위)
-    keywords = {
-        SearchCategory.VIDEO: [
-            "유튜브", "youtube", "영상", "동영상", "비디오", "video", "영화", "드라마", 
-            "예능", "다큐", "리뷰", "튜토리얼", "강의", "클립", "쇼츠"
-        ],
-        SearchCategory.MUSIC: [
-            "노래", "음악", "뮤직", "곡", "song", "music", "가수", "아티스트", 
-            "앨범", "싱글", "차트", "멜론", "스포티파이", "플레이리스트"
-        ],
-        SearchCategory.RESTAURANT: [
-            "맛집", "음식점", "레스토랑", "먹을곳", "식당", "요리", "음식", "메뉴",
-            "한식", "중식", "일식", "양식", "분식", "치킨", "피자", "햄버거",
-            "카페", "디저트", "베이커리", "빵집"
-        ],
-        SearchCategory.CAFE: [
-            "카페", "커피", "디저트", "베이커리", "빵집", "스타벅스", "이디야",
-            "투썸", "할리스", "커피빈", "라떼", "아메리카노", "케이크"
-        ],
-        SearchCategory.ACCOMMODATION: [
-            "숙소", "호텔", "모텔", "펜션", "리조트", "게스트하우스", "에어비앤비",
-            "민박", "콘도", "캠핑", "글램핑", "여관", "찜질방"
-        ],
-        SearchCategory.NEWS: [
-            "뉴스", "기사", "소식", "보도", "언론", "신문", "방송", "뉴스룸",
-            "속보", "헤드라인", "이슈", "사건", "정치", "경제", "사회", "문화"
-        ],
-        SearchCategory.SHOPPING: [
-            "쇼핑", "구매", "온라인쇼핑", "쿠팡", "11번가", "지마켓", "옥션",
-            "네이버쇼핑", "아마존", "이베이", "할인", "세일", "특가"
-        ],
-        SearchCategory.PRODUCT: [
-            "제품", "상품", "추천", "리뷰", "후기", "평점", "가격", "비교",
-            "스펙", "성능", "브랜드", "모델", "신제품", "베스트"
-        ],
-        SearchCategory.ACTIVITY: [
-            "체험", "관광", "여행", "놀거리", "데이트", "나들이", "축제", "이벤트",
-            "전시", "공연", "콘서트", "뮤지컬", "연극", "스포츠", "운동", "취미"
-        ],
-        SearchCategory.GENERAL: [
-            # 일반적인 검색 의도를 나타내는 키워드들
-            "정보", "자료", "데이터", "알아보기", "찾기", "검색", "조회",
-            "확인", "문의", "질문", "답변", "해결", "방법", "가이드",
-            "튜토리얼", "설명", "안내", "도움", "지원", "서비스"
-        ]
-    }
+    CLASSIFY_SECONDS.observe(time.perf_counter() - started, category=result[0].value)
+    return result
+
+# ===== 캐시용 정규 쿼리 키 =====
+# 붙여 쓴 한글 복합어("강남맛집")를 나눌 때 쓰는 접미 키워드 (긴 것부터)
+_COMPOUND_SUFFIXES = sorted(
+    {kw for kws in CATEGORY_KEYWORDS.values() for kw in kws if len(kw) >= 2 and re.fullmatch(r'[가-힣]+', kw)},
+    key=len,
+    reverse=True
+)
+
+def _split_compound(token: str) -> List[str]:
+    """'강남맛집' → ['강남', '맛집'] (카테고리 키워드로 끝나는 한글 토큰 분리)"""
+    for suffix in _COMPOUND_SUFFIXES:
+        if len(token) > len(suffix) and token.endswith(suffix) and re.fullmatch(r'[가-힣]+', token):
+            return _split_compound(token[:-len(suffix)]) + [suffix]
+    return [token]
+
+class KeyCollapseStats:
+    """정규화 전 키(정제+소문자) 대비 정규 키가 얼마나 합쳐지는지 집계"""
+    def __init__(self, max_tracked: int = 10000):
+        self.raw_by_key: Dict[str, set] = {}
+        self.tracked = 0
+        self.max_tracked = max_tracked
+        self.lock = Lock()
     
-    for category, kws in keywords.items():
-        if any(kw in q for kw in kws):
-            # ✅ 추천/알려줘 등 제거
-            final_clean = clean_q
-            for word in ["추천", "알려줘", "찾아줘", "검색", "해줘"]:
-                final_clean = final_clean.replace(word, "").strip()
-            return category, final_clean
+    def record(self, raw_key: str, canonical_key: str):
+        with self.lock:
+            raws = self.raw_by_key.get(canonical_key)
+            if raws is not None and raw_key in raws:
+                return
+            if self.tracked >= self.max_tracked:
+                return
+            self.raw_by_key.setdefault(canonical_key, set()).add(raw_key)
+            self.tracked += 1
     
-    return SearchCategory.GENERAL, clean_q
+    def get_stats(self) -> dict:
+        with self.lock:
+            raw_keys = self.tracked
+            canonical_keys = len(self.raw_by_key)
+        return {
+            "raw_keys": raw_keys,
+            "canonical_keys": canonical_keys,
+            "collapsed": raw_keys - canonical_keys,
+            "collapse_ratio": round(1 - canonical_keys / raw_keys, 4) if raw_keys else 0.0
+        }
+
+key_collapse_stats = KeyCollapseStats()
+
+def canonical_query_key(query: str) -> str:
+    """
+    캐시/검색 합류용 정규 쿼리 키
+    - clean_query (refresh 태그 제거, NFC, 공백 정리) + 소문자
+    - 요청 동사 제거, 붙여 쓴 한글 복합어 분리, 토큰 정렬/중복 제거
+    - 카테고리 포함 (예: '맛집 강남 추천해줘' → 'restaurant:강남 맛집')
+    """
+    cleaned = clean_query(query).lower()
+    category, _ = classify_query(cleaned)
+    tokens = set()
+    for token in strip_request_verbs(cleaned).split():
+        tokens.update(_split_compound(token))
+    canonical = f"{category.value}:{' '.join(sorted(tokens)) or cleaned}"
+    key_collapse_stats.record(cleaned, canonical)
+    return canonical
+
+def _youtube_search(query: str) -> Dict:
+    """유튜브 검색 (youtube-search는 동기 라이브러리)"""
+    try:
+        from youtube_search import YoutubeSearch
+        results = YoutubeSearch(query, max_results=10).to_dict()
+        return {"source": "youtube", "data": {"videos": results}}
+    except ImportError:
+        logger.warning("⚠️ youtube-search 패키지가 설치되지 않았습니다")
+        return {"source": "youtube", "error": "youtube-search not installed"}
+
+def _request_provider(source: str, query: str, naver_id: str = None, naver_secret: str = None, serper_key: str = None,
+                      timeout: float = 5) -> Dict:
+    """공급자 API 호출 (업스트림 에러는 예외로 전달)"""
+    if source == "naver" and naver_id and naver_secret:
+        r = _http_session.get(
+            NAVER_LOCAL_URL,
+            headers={
+                "X-Naver-Client-Id": naver_id,
+                "X-Naver-Client-Secret": naver_secret,
+            },
+            params={"query": query, "display": 10},
+            timeout=timeout
+        )
+        r.raise_for_status()
+        result = r.json()
+        logger.debug("✅ 네이버 검색 성공", extra=fields(source=source, items=len(result.get('items', []))))
+        return {"source": source, "data": result}
+        
+    elif source == "google" and serper_key:
+        r = _http_session.post(
+            SERPER_SEARCH_URL,
+            headers={"X-API-KEY": serper_key, "Content-Type": "application/json"},
+            json={"q": query, "num": 10},
+            timeout=timeout
+        )
+        r.raise_for_status()
+        result = r.json()
+        logger.debug("✅ 구글 검색 성공", extra=fields(source=source, items=len(result.get('organic', []))))
+        return {"source": source, "data": result}
+        
+    elif source == "youtube":
+        return _youtube_search(query)
+    
+    # 🔥 조건에 맞지 않는 경우 (네이버 키 없음, 구글 키 없음 등)
+    return {"source": source, "error": "config not found"}
+
+# 메트릭 라벨용 현재 검색 카테고리 (perform_search에서 설정, 스레드 풀에서는 copy_context로 전달)
+_current_category: ContextVar[str] = ContextVar("search_category", default="unknown")
+# 메트릭 라벨용 현재 스크래핑 링크를 돌려준 공급자 (스크래핑 작업마다 설정)
+_scrape_source: ContextVar[str] = ContextVar("scrape_source", default="unknown")
+
+def _observe_provider(source: str, outcome: str, started: float):
+    PROVIDER_FETCH_SECONDS.observe(
+        time.perf_counter() - started, source=source, category=_current_category.get(), outcome=outcome
+    )
+
+def _provider_outcome(result: Dict) -> str:
+    if "error" in result:
+        return "error"
+    return "empty" if _is_empty_provider_result(result) else "ok"
+
+def _is_timeout(error: BaseException) -> bool:
+    return isinstance(error, (httpx.TimeoutException, requests.Timeout, asyncio.TimeoutError))
+
+def _circuit_open_result(source: str, started: float) -> Dict:
+    """서킷이 열린 공급자는 호출하지 않음 (네거티브 캐시에도 저장하지 않음)"""
+    logger.debug("🔌 서킷 open → 공급자 건너뜀", extra=fields(source=source))
+    _observe_provider(source, "circuit_open", started)
+    return {"source": source, "error": "circuit open"}
+
+def _record_provider_result(source: str, result: Dict, started: float):
+    """정상 응답(빈 결과 포함)은 성공으로 기록, 설정 오류 응답은 판정하지 않음"""
+    if "error" in result:
+        provider_guard.release(source)
+    else:
+        provider_guard.record_success(source, time.perf_counter() - started)
+
+# 헤징 요청용 스레드 풀 (동기 경로, 헤징 대상 공급자만 사용)
+_hedge_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="provider-hedge")
+
+def _hedged_request(source: str, query: str, naver_id: str = None, naver_secret: str = None, serper_key: str = None) -> Dict:
+    """
+    적응형 타임아웃으로 공급자 호출, p95 안에 응답이 없으면 같은 요청을 한 번 더 보내 먼저 온 응답 사용
+    - 둘 다 실패하면 마지막 예외 전달 (requests는 취소할 수 없어 늦게 온 응답은 버림)
+    """
+    timeout = provider_guard.timeout_for(source)
+    hedge_delay = provider_guard.hedge_delay(source)
+    if hedge_delay is None:
+        return _request_provider(source, query, naver_id, naver_secret, serper_key, timeout)
+    
+    args = (_request_provider, source, query, naver_id, naver_secret, serper_key, timeout)
+    primary = _hedge_executor.submit(copy_context().run, *args)
+    try:
+        return primary.result(timeout=hedge_delay)
+    except TimeoutError:
+        if not provider_guard.try_hedge(source):
+            return primary.result()
+    
+    logger.debug("🪞 공급자 헤징 요청", extra=fields(source=source, hedge_delay=round(hedge_delay, 3)))
+    backup = _hedge_executor.submit(copy_context().run, *args)
+    error: Optional[BaseException] = None
+    for future in as_completed((primary, backup)):
+        error = future.exception()
+        if error is None:
+            if future is backup:
+                provider_guard.record_hedge_win(source)
+            return future.result()
+    raise error
+
+async def _hedged_request_async(source: str, query: str, naver_id: str = None, naver_secret: str = None,
+                                serper_key: str = None) -> Dict:
+    """_hedged_request의 비동기 버전 (먼저 온 응답을 쓰고 나머지 요청은 취소)"""
+    timeout = provider_guard.timeout_for(source)
+    hedge_delay = provider_guard.hedge_delay(source)
+    if hedge_delay is None:
+        return await _request_provider_async(source, query, naver_id, naver_secret, serper_key, timeout)
+    
+    def request() -> asyncio.Task:
+        return asyncio.ensure_future(_request_provider_async(source, query, naver_id, naver_secret, serper_key, timeout))
+    
+    primary = request()
+    tasks = [primary]
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=hedge_delay)
+        if not done and provider_guard.try_hedge(source):
+            logger.debug("🪞 공급자 헤징 요청", extra=fields(source=source, hedge_delay=round(hedge_delay, 3)))
+            tasks.append(request())
+        
+        pending = set(tasks)
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=FIRST_COMPLETED)
+            for task in done:
+                error = task.exception()
+                if error is None:
+                    if task is not primary:
+                        provider_guard.record_hedge_win(source)
+                    return task.result()
+        raise error
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
 
 def fetch_api_data(source: str, query: str, naver_id: str = None, naver_secret: str = None, serper_key: str = None) -> Dict:
-    """API 데이터 가져오기"""
-    print(f"🔍 {source.upper()} 검색 시도: '{query}' (naver_id: {bool(naver_id)}, serper_key: {bool(serper_key)})")
+    """API 데이터 가져오기 (공급자 응답 캐시 사용)"""
+    logger.debug("🔍 공급자 검색 시도", extra=fields(source=source, query=query))
+    
+    started = time.perf_counter()
+    cached = provider_cache.get(source, query)
+    if cached is not None:
+        _observe_provider(source, "cached", started)
+        return cached
+    if not provider_guard.allow(source):
+        return _circuit_open_result(source, started)
     
     try:
-        if source == "naver" and naver_id and naver_secret:
-            print(f"📍 네이버 로컬 검색 실행: {query}")
-            r = requests.get(
-                "https://openapi.naver.com/v1/search/local.json",
-                headers={
-                    "X-Naver-Client-Id": naver_id,
-                    "X-Naver-Client-Secret": naver_secret,
-                },
-                params={"query": query, "display": 10},
-                timeout=5
-            )
-            r.raise_for_status()
-            result = r.json()
-            print(f"✅ 네이버 검색 성공: {len(result.get('items', []))}개 결과")
-            return {"source": source, "data": result}
-            
-        elif source == "google" and serper_key:
-            print(f"🌐 구글(Serper) 검색 실행: {query}")
-            r = requests.post(
-                "https://google.serper.dev/search",
-                headers={"X-API-KEY": serper_key, "Content-Type": "application/json"},
-                json={"q": query, "num": 10},
-                timeout=5
-            )
-            r.raise_for_status()
-            result = r.json()
-            print(f"✅ 구글 검색 성공: {len(result.get('organic', []))}개 결과")
-            return {"source": source, "data": result}
-            
-        elif source == "youtube":
-            try:
-                from youtube_search import YoutubeSearch
-                results = YoutubeSearch(query, max_results=10).to_dict()
-                return {"source": source, "data": {"videos": results}}
-            except ImportError:
-                print("⚠️ youtube-search 패키지가 설치되지 않았습니다")
-                return {"source": source, "error": "youtube-search not installed"}
-            
-        else:
-            return {"source": source, "error": "config not found"}
+        result = _hedged_request(source, query, naver_id, naver_secret, serper_key)
+    except Exception as e:
+        provider_guard.record_failure(source, time.perf_counter() - started, timed_out=_is_timeout(e))
+        logger.warning("⚠️ 공급자 API 에러", extra=fields(source=source, error=str(e)))
+        result = {"source": source, "error": str(e)}
+        provider_cache.set_error(source, query, result)
+        _observe_provider(source, "error", started)
+        return result
+    
+    _record_provider_result(source, result, started)
+    provider_cache.set_result(source, query, result)
+    _observe_provider(source, _provider_outcome(result), started)
+    return result
+
+async def _request_provider_async(source: str, query: str, naver_id: str = None, naver_secret: str = None, serper_key: str = None,
+                                  timeout: float = 5) -> Dict:
+    """공급자 API 호출 (비동기, 업스트림 에러는 예외로 전달)"""
+    client = get_async_client()
+    
+    if source == "naver" and naver_id and naver_secret:
+        r = await client.get(
+            NAVER_LOCAL_URL,
+            headers={
+                "X-Naver-Client-Id": naver_id,
+                "X-Naver-Client-Secret": naver_secret,
+            },
+            params={"query": query, "display": 10},
+            timeout=timeout
+        )
+        r.raise_for_status()
+        result = r.json()
+        logger.debug("✅ 네이버 검색 성공", extra=fields(source=source, items=len(result.get('items', []))))
+        return {"source": source, "data": result}
+        
+    elif source == "google" and serper_key:
+        r = await client.post(
+            SERPER_SEARCH_URL,
+            headers={"X-API-KEY": serper_key, "Content-Type": "application/json"},
+            json={"q": query, "num": 10},
+            timeout=timeout
+        )
+        r.raise_for_status()
+        result = r.json()
+        logger.debug("✅ 구글 검색 성공", extra=fields(source=source, items=len(result.get('organic', []))))
+        return {"source": source, "data": result}
+        
+    elif source == "youtube":
+        # youtube-search는 타임아웃 설정이 없어 대기만 끊음 (스레드는 끝날 때까지 실행)
+        return await asyncio.wait_for(asyncio.to_thread(_youtube_search, query), timeout=timeout)
+    
+    return {"source": source, "error": "config not found"}
+
+async def fetch_api_data_async(source: str, query: str, naver_id: str = None, naver_secret: str = None, serper_key: str = None) -> Dict:
+    """API 데이터 가져오기 (비동기, 공유 커넥션 풀 + 공급자 응답 캐시 사용)"""
+    logger.debug("🔍 공급자 비동기 검색 시도", extra=fields(source=source, query=query))
+    
+    started = time.perf_counter()
+    cached = provider_cache.get(source, query)
+    if cached is not None:
+        _observe_provider(source, "cached", started)
+        return cached
+    if not provider_guard.allow(source):
+        return _circuit_open_result(source, started)
     
+    try:
+        result = await _hedged_request_async(source, query, naver_id, naver_secret, serper_key)
+    except asyncio.CancelledError:
+        # 파이프라인 조기 종료 등으로 취소됨 → 성공/실패로 판정하지 않음
+        provider_guard.release(source)
+        raise
     except Exception as e:
-        print(f"⚠️ {source.upper()} API 에러: {e}")
-        return {"source": source, "error": str(e)}
+        provider_guard.record_failure(source, time.perf_counter() - started, timed_out=_is_timeout(e))
+        logger.warning("⚠️ 공급자 API 에러", extra=fields(source=source, error=str(e)))
+        result = {"source": source, "error": str(e)}
+        provider_cache.set_error(source, query, result)
+        _observe_provider(source, "error", started)
+        return result
     
-    # 🔥 조건에 맞지 않는 경우 (네이버 키 없음, 구글 키 없음 등)
-    print(f"⚠️ {source.upper()} 검색 조건 불충족: naver_id={bool(naver_id)}, serper_key={bool(serper_key)}")
-    return {"source": source, "error": "API 키 또는 조건 불충족"}
+    _record_provider_result(source, result, started)
+    provider_cache.set_result(source, query, result)
+    _observe_provider(source, _provider_outcome(result), started)
+    return result
 
 def filter_search_results(raw_results: List[Dict]) -> List[Dict]:
     """검색 결과 필터링 및 링크 추출"""
@@ -214,8 +773,99 @@ def filter_search_results(raw_results: List[Dict]) -> List[Dict]:
     
     return cleaned
 
+def _declared_charset(content_type: Optional[str]) -> Optional[str]:
+    """Content-Type 헤더의 charset (없으면 None → 추출 단계에서 <meta>/내용으로 추정)"""
+    for param in (content_type or "").split(";")[1:]:
+        name, _, value = param.partition("=")
+        if name.strip().lower() == "charset" and value.strip():
+            return value.strip().strip('"').lower()
+    return None
+
+# 스크래퍼를 막는 응답 (User-Agent 차단, 로그인 요구, 요청 제한 등)
+BLOCKED_STATUS_CODES = {401, 403, 429, 451}
+
+# ===== 스크래핑 다운로드 제한 =====
+# 본문은 최대 1500자만 쓰므로 페이지 전체를 받지 않고 앞부분 SCRAPE_MAX_BYTES까지만 스트리밍으로 받음
+# (압축 해제 후 기준, 잘린 HTML도 lxml이 파싱함) - charset 추정도 이 앞부분에서만 (extract_pool)
+# PDF/이미지 등 HTML이 아닌 응답은 헤더만 보고 본문을 받지 않음
+SCRAPE_MAX_BYTES = int(os.environ.get("SCRAPE_MAX_BYTES", str(1024 * 1024)))
+SCRAPE_CHUNK_BYTES = 64 * 1024
+HTML_CONTENT_TYPES = {"text/html", "application/xhtml+xml"}
+
+def _is_html_content_type(content_type: Optional[str]) -> bool:
+    """HTML 계열만 허용 (Content-Type이 없으면 받아서 추출 단계에서 판단)"""
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    return not media_type or media_type in HTML_CONTENT_TYPES
+
+def _capped_body(chunks: List[bytes], size: int) -> Tuple[bytes, bool]:
+    body = b"".join(chunks)
+    truncated = size >= SCRAPE_MAX_BYTES
+    SCRAPE_BODY_BYTES.observe(min(size, SCRAPE_MAX_BYTES), truncated=str(truncated).lower())
+    return (body[:SCRAPE_MAX_BYTES] if truncated else body), truncated
+
+def _read_capped(response: requests.Response) -> Tuple[bytes, bool]:
+    """stream=True 응답 본문을 SCRAPE_MAX_BYTES까지만 읽음 → (본문, 잘렸는지)"""
+    chunks, size = [], 0
+    for chunk in response.iter_content(SCRAPE_CHUNK_BYTES):
+        chunks.append(chunk)
+        size += len(chunk)
+        if size >= SCRAPE_MAX_BYTES:
+            break
+    return _capped_body(chunks, size)
+
+async def _read_capped_async(response: httpx.Response) -> Tuple[bytes, bool]:
+    """_read_capped의 비동기 버전 (client.stream 응답)"""
+    chunks, size = [], 0
+    async for chunk in response.aiter_bytes(SCRAPE_CHUNK_BYTES):
+        chunks.append(chunk)
+        size += len(chunk)
+        if size >= SCRAPE_MAX_BYTES:
+            break
+    return _capped_body(chunks, size)
+
+def _unsupported_content(url: str, max_chars: int, content_type: str, started: float) -> Dict:
+    """HTML이 아닌 응답 (같은 URL을 다시 받지 않도록 캐시에 저장, 도메인 점수판에는 반영하지 않음)"""
+    media_type = content_type.split(";")[0].strip().lower()
+    logger.debug("📄 HTML이 아닌 링크 건너뜀", extra=fields(url=url, content_type=media_type))
+    result = {
+        "url": url,
+        "summary": f"HTML 문서가 아닙니다 ({media_type})",
+        "success": False
+    }
+    scrape_cache.set(url, max_chars, result)
+    _observe_scrape("unsupported", started, url)
+    return result
+
+def _observe_scrape(outcome: str, started: float, url: Optional[str] = None, result: Optional[Dict] = None):
+    """스크래핑 시간 기록 + 도메인 점수판 갱신 (url 지정 시, 캐시 히트/추출 시간 초과는 제외)"""
+    elapsed = time.perf_counter() - started
+    SCRAPE_SECONDS.observe(elapsed, outcome=outcome, category=_current_category.get(), source=_scrape_source.get())
+    if url is not None and outcome not in ("cached", "unsupported", "extract_timeout"):
+        chars = len(result.get("full_text", "")) if result else 0
+        scrape_health.record(url, "success" if outcome == "not_modified" else outcome, elapsed, chars)
+
+def _store_extracted(url: str, max_chars: int, result: Dict, headers, started: float) -> Dict:
+    """
+    추출 결과 캐시 저장 + 기록
+    - 추출 풀의 시간 초과는 도메인 탓이 아닐 수 있으므로 검증자 없이 SCRAPE_TRANSIENT_TTL 동안만 캐시하고
+      도메인 점수판에도 반영하지 않음
+    """
+    if result.pop("transient", False):
+        scrape_cache.set(url, max_chars, result, ttl=SCRAPE_TRANSIENT_TTL)
+        _observe_scrape("extract_timeout", started, url, result)
+        return result
+    scrape_cache.set(url, max_chars, result, headers.get("ETag"), headers.get("Last-Modified"))
+    _observe_scrape("success" if result.get("success") else "empty", started, url, result)
+    return result
+
+def _scrape_error_outcome(error: Exception) -> str:
+    if _is_timeout(error):
+        return "timeout"
+    status_code = getattr(getattr(error, "response", None), "status_code", None)
+    return "blocked" if status_code in BLOCKED_STATUS_CODES else "error"
+
 def scrape_page(url: str, max_chars: int = 500) -> Dict:
-    """단일 페이지 스크래핑 (Trafilatura 사용)"""
+    """단일 페이지 스크래핑 (앞부분 SCRAPE_MAX_BYTES만 스트리밍으로 받아 Trafilatura로 추출)"""
     if not HAS_TRAFILATURA:
         return {
             "url": url,
@@ -223,53 +873,104 @@ def scrape_page(url: str, max_chars: int = 500) -> Dict:
             "success": False
         }
     
+    started = time.perf_counter()
+    cached, conditional_headers = scrape_cache.lookup(url, max_chars)
+    if cached:
+        _observe_scrape("cached", started)
+        return cached
+    
     try:
-        response = requests.get(url, timeout=5, headers={
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        })
-        response.raise_for_status()
-        
-        text = trafilatura.extract(
-            response.text,
-            include_comments=False,
-            include_tables=False,
-            no_fallback=False
-        )
-        
-        if not text or len(text.strip()) < 50:
-            return {
-                "url": url,
-                "summary": "내용을 추출할 수 없습니다.",
-                "success": False
-            }
-        
-        summary = text[:max_chars].strip()
-        if len(text) > max_chars:
-            summary += "..."
-        
+        with _http_session.get(url, timeout=5, headers={**SCRAPE_HEADERS, **conditional_headers}, stream=True) as response:
+            if response.status_code == 304:
+                revalidated = scrape_cache.revalidate(url, max_chars)
+                if revalidated:
+                    _observe_scrape("not_modified", started, url, revalidated)
+                    return revalidated
+            response.raise_for_status()
+            content_type = response.headers.get("Content-Type", "")
+            if not _is_html_content_type(content_type):
+                return _unsupported_content(url, max_chars, content_type, started)
+            body, _ = _read_capped(response)
+        # 본문 추출은 프로세스 풀에서 (디코딩도 워커에서 하도록 bytes + charset 전달)
+        result = extract_pool.extract(url, body, _declared_charset(content_type), max_chars)
+        return _store_extracted(url, max_chars, result, response.headers, started)
+    
+    except Exception as e:
+        logger.info("⚠️ 스크래핑 실패", extra=fields(url=url, error=str(e)))
+        _observe_scrape(_scrape_error_outcome(e), started, url)
+        return {
+            "url": url,
+            "summary": f"페이지를 불러올 수 없습니다: {str(e)[:50]}",
+            "success": False
+        }
+
+async def scrape_page_async(url: str, max_chars: int = 500, progress: Optional[Dict[str, str]] = None) -> Dict:
+    """
+    단일 페이지 스크래핑 (비동기 스트리밍 다운로드 + 추출 프로세스 풀에서 본문 추출)
+    - progress: 지정하면 본문 추출 단계에 들어갈 때 progress["stage"] = "extract" (바깥 타임아웃 판정용)
+    """
+    if not HAS_TRAFILATURA:
         return {
             "url": url,
-            "summary": summary,
-            "full_text": text[:1500],
-            "success": True
+            "summary": "스크래핑 라이브러리가 없습니다.",
+            "success": False
         }
     
+    started = time.perf_counter()
+    cached, conditional_headers = scrape_cache.lookup(url, max_chars)
+    if cached:
+        _observe_scrape("cached", started)
+        return cached
+    
+    try:
+        request_headers = {**SCRAPE_HEADERS, **conditional_headers}
+        async with get_async_client().stream("GET", url, timeout=5, headers=request_headers) as response:
+            if response.status_code == 304:
+                revalidated = scrape_cache.revalidate(url, max_chars)
+                if revalidated:
+                    _observe_scrape("not_modified", started, url, revalidated)
+                    return revalidated
+            response.raise_for_status()
+            content_type = response.headers.get("Content-Type", "")
+            if not _is_html_content_type(content_type):
+                return _unsupported_content(url, max_chars, content_type, started)
+            body, _ = await _read_capped_async(response)
+        # trafilatura는 CPU 작업이므로 GIL을 잡지 않도록 프로세스 풀에서 실행 (풀을 못 쓰면 스레드)
+        if progress is not None:
+            progress["stage"] = "extract"
+        result = await extract_pool.extract_async(url, body, _declared_charset(content_type), max_chars)
+        return _store_extracted(url, max_chars, result, response.headers, started)
+    
     except Exception as e:
-        print(f"⚠️ 스크래핑 실패 ({url}): {e}")
+        logger.info("⚠️ 스크래핑 실패", extra=fields(url=url, error=str(e)))
+        _observe_scrape(_scrape_error_outcome(e), started, url)
         return {
             "url": url,
             "summary": f"페이지를 불러올 수 없습니다: {str(e)[:50]}",
             "success": False
         }
 
-def scrape_multiple_pages(urls: List[str], max_workers: int = 5) -> List[Dict]:
-    """병렬 페이지 스크래핑"""
+# 쿼리당 스크래핑 링크 수 (도메인 점수판으로 고른 상위 링크)
+SCRAPE_BUDGET = 10
+
+def _link_sources(items: List[Dict]) -> Dict[str, str]:
+    """필터링된 검색 결과의 링크 → 공급자 (스크래핑 메트릭 라벨용)"""
+    return {item["link"]: item.get("source") or "unknown" for item in items if item.get("link")}
+
+def _scrape_page_for(url: str, source: str) -> Dict:
+    """scrape_page + 공급자 라벨 (copy_context().run 안에서 실행 → 설정이 다른 작업에 새지 않음)"""
+    _scrape_source.set(source)
+    return scrape_page(url)
+
+def scrape_multiple_pages(urls: List[str], max_workers: int = 5, sources: Optional[Dict[str, str]] = None) -> List[Dict]:
+    """병렬 페이지 스크래핑 (나쁜 도메인을 빼고 점수 순으로 최대 SCRAPE_BUDGET개, sources: 링크 → 공급자)"""
     results = []
+    sources = sources or {}
     
     with ThreadPoolExecutor(max_workers=max_workers) as executor:
         future_to_url = {
-            executor.submit(scrape_page, url): url 
-            for url in urls[:10]
+            executor.submit(copy_context().run, _scrape_page_for, url, sources.get(url, "unknown")): url
+            for url in scrape_health.select(urls, SCRAPE_BUDGET)
         }
         
         for future in as_completed(future_to_url):
@@ -278,7 +979,7 @@ def scrape_multiple_pages(urls: List[str], max_workers: int = 5) -> List[Dict]:
                 result = future.result(timeout=7)
                 results.append(result)
             except Exception as e:
-                print(f"❌ 스크래핑 타임아웃: {url}")
+                logger.info("❌ 스크래핑 타임아웃", extra=fields(url=url))
                 results.append({
                     "url": url,
                     "summary": "타임아웃",
@@ -287,158 +988,487 @@ def scrape_multiple_pages(urls: List[str], max_workers: int = 5) -> List[Dict]:
     
     return results
 
-def perform_search(query: str, genai_client, naver_id: str = None, naver_secret: str = None, serper_key: str = None) -> Dict:
-    """통합 검색 수행"""
+async def _scrape_with_limit(url: str, semaphore: asyncio.Semaphore, source: str = "unknown") -> Dict:
+    """동시 실행 수 제한 + 타임아웃을 적용한 단일 페이지 스크래핑 (작업별로 실행 → source 설정은 이 작업에만 적용)"""
+    _scrape_source.set(source)
+    async with semaphore:
+        started = time.perf_counter()
+        progress = {"stage": "fetch"}
+        try:
+            return await asyncio.wait_for(scrape_page_async(url, progress=progress), timeout=7)
+        except Exception as e:
+            # wait_for로 취소된 스크래핑은 scrape_page_async 안에서 기록되지 않으므로 여기서 기록
+            # 추출 풀 대기/실행 중에 취소됐으면 도메인 탓이 아니므로 extract_timeout (점수판에 반영 안 함)
+            if isinstance(e, asyncio.TimeoutError):
+                _observe_scrape("extract_timeout" if progress["stage"] == "extract" else "timeout", started, url)
+            logger.info("❌ 스크래핑 타임아웃", extra=fields(url=url))
+            return {
+                "url": url,
+                "summary": "타임아웃",
+                "success": False
+            }
+
+async def scrape_multiple_pages_async(urls: List[str], max_concurrency: int = 5,
+                                      sources: Optional[Dict[str, str]] = None) -> List[Dict]:
+    """병렬 페이지 스크래핑 (비동기, 동시 실행 수 제한, 나쁜 도메인을 빼고 점수 순으로 최대 SCRAPE_BUDGET개, sources: 링크 → 공급자)"""
+    semaphore = asyncio.Semaphore(max_concurrency)
+    sources = sources or {}
+    return list(await asyncio.gather(
+        *(_scrape_with_limit(url, semaphore, sources.get(url, "unknown")) for url in scrape_health.select(urls, SCRAPE_BUDGET))
+    ))
+
+def _select_search_sources(category: SearchCategory, naver_id: str = None, naver_secret: str = None, serper_key: str = None) -> List[str]:
+    """카테고리와 API 키 설정에 따라 검색 소스 선택"""
+    if category in [SearchCategory.VIDEO, SearchCategory.MUSIC]:
+        return ["youtube", "google"]
+    
+    # 🔥 네이버 우선, 구글 백업
+    search_sources = []
+    if naver_id and naver_secret:
+        search_sources.append("naver")
+    if serper_key:
+        search_sources.append("google")
+    return search_sources
+
+def _provider_args(source: str, naver_id: str = None, naver_secret: str = None, serper_key: str = None) -> Tuple:
+    """소스별 fetch_api_data 인자 (naver_id, naver_secret, serper_key)"""
+    if source == "naver":
+        return (naver_id, naver_secret, None)
+    if source == "google":
+        return (None, None, serper_key)
+    return (None, None, None)
+
+async def _fetch_and_scrape_barrier(search_sources: List[str], final_query: str, naver_id: str = None,
+                                    naver_secret: str = None, serper_key: str = None) -> Tuple[List[Dict], List[Dict], List[Dict]]:
+    """모든 공급자 응답을 기다린 뒤 한 번에 스크래핑 (raw_results, cleaned, scraped_data 반환)"""
+    outcomes = await asyncio.gather(
+        *(
+            asyncio.wait_for(
+                fetch_api_data_async(source, final_query, *_provider_args(source, naver_id, naver_secret, serper_key)),
+                timeout=provider_guard.deadline(source)
+            )
+            for source in search_sources
+        ),
+        return_exceptions=True
+    )
+    
+    raw_results = []
+    for source, outcome in zip(search_sources, outcomes):
+        if isinstance(outcome, asyncio.TimeoutError):
+            logger.warning("⏰ 공급자 API 타임아웃", extra=fields(source=source))
+        elif isinstance(outcome, Exception):
+            logger.warning("❌ 공급자 예외", extra=fields(source=source, error=str(outcome)))
+        else:
+            raw_results.append(outcome)
+    
+    cleaned = filter_search_results(raw_results)
+    scraped_data = []
+    if cleaned and HAS_TRAFILATURA:
+        links = [item["link"] for item in cleaned if item.get("link")]
+        scraped_data = await scrape_multiple_pages_async(links, max_concurrency=5, sources=_link_sources(cleaned))
+    return raw_results, cleaned, scraped_data
+
+async def _fetch_and_scrape_pipelined(search_sources: List[str], final_query: str, naver_id: str = None,
+                                      naver_secret: str = None, serper_key: str = None,
+                                      min_context_chars: int = SYNTHESIS_MIN_CONTEXT_CHARS) -> Tuple[List[Dict], List[Dict], List[Dict]]:
+    """
+    공급자별 결과가 도착하는 즉시 해당 링크를 스크래핑 (raw_results, cleaned, scraped_data 반환)
+    - 스크래핑 본문이 min_context_chars 이상 모이면 남은 공급자/스크래핑을 취소하고 반환
+    - 임계치에 못 미치면 모든 작업이 끝날 때까지 대기 (기존 배리어 방식과 동일한 결과)
+    """
+    semaphore = asyncio.Semaphore(5)
+    provider_tasks = {
+        asyncio.create_task(asyncio.wait_for(
+            fetch_api_data_async(source, final_query, *_provider_args(source, naver_id, naver_secret, serper_key)),
+            timeout=provider_guard.deadline(source)
+        )): source
+        for source in search_sources
+    }
+    pending = set(provider_tasks)
+    raw_by_source: Dict[str, Dict] = {}
+    cleaned_by_source: Dict[str, List[Dict]] = {}
+    scraped_data: List[Dict] = []
+    scrape_urls: List[str] = []
+    scraped_chars = 0
+    
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                source = provider_tasks.get(task)
+                if source is None:
+                    # 스크래핑 완료
+                    result = task.result()
+                    scraped_data.append(result)
+                    if result["success"]:
+                        scraped_chars += len(result["full_text"])
+                    continue
+                
+                # 공급자 응답 완료 → 링크를 바로 스크래핑 단계로 전달
+                try:
+                    raw = task.result()
+                except asyncio.TimeoutError:
+                    logger.warning("⏰ 공급자 API 타임아웃", extra=fields(source=source))
+                    continue
+                except Exception as e:
+                    logger.warning("❌ 공급자 예외", extra=fields(source=source, error=str(e)))
+                    continue
+                
+                raw_by_source[source] = raw
+                items = filter_search_results([raw])
+                cleaned_by_source[source] = items
+                logger.debug("📦 공급자 결과 도착 → 스크래핑 시작", extra=fields(source=source, items=len(items)))
+                
+                if not HAS_TRAFILATURA:
+                    continue
+                # 이 공급자의 링크 중 남은 예산만큼 점수 높은 순으로 (먼저 만든 작업이 세마포어를 먼저 얻음)
+                links = [item["link"] for item in items if item.get("link") and item["link"] not in scrape_urls]
+                for link in scrape_health.select(links, SCRAPE_BUDGET - len(scrape_urls)):
+                    scrape_urls.append(link)
+                    pending.add(asyncio.create_task(_scrape_with_limit(link, semaphore, source)))
+            
+            if cleaned_by_source and scraped_chars >= min_context_chars:
+                logger.debug("⚡ 스크래핑 본문 확보 → 남은 작업을 기다리지 않고 요약 시작",
+                             extra=fields(scraped_chars=scraped_chars, cancelled=len(pending)))
+                break
+    finally:
+        for task in pending:
+            task.cancel()
+    
+    # 소스 우선순위(네이버 → 구글 → 유튜브) 순서로 정렬
+    raw_results = [raw_by_source[s] for s in search_sources if s in raw_by_source]
+    cleaned = [item for s in search_sources for item in cleaned_by_source.get(s, [])]
+    return raw_results, cleaned, scraped_data
+
+def _no_results_response(raw_results: List[Dict]) -> Dict:
+    """검색 결과가 없을 때의 응답"""
+    logger.info("❌ 검색 결과 없음", extra=fields(providers=[
+        {"source": r.get("source"), "error": r.get("error"), "data_keys": list(r.get("data", {}).keys())}
+        for r in raw_results
+    ]))
+    
+    return {
+        "success": False,
+        "error": "검색 결과가 없습니다.",
+        "debug_info": {
+            "raw_count": len(raw_results),
+            "raw_sources": [r.get('source') for r in raw_results],
+            "errors": [r.get('error') for r in raw_results if r.get('error')]
+        }
+    }
+
+def _build_synthesis_prompt(query: str, cleaned: List[Dict], scraped_data: List[Dict]) -> str:
+    """스크래핑 본문과 검색 스니펫으로 LLM 요약 프롬프트 생성"""
+    context_data = []
+    for item in scraped_data:
+        if item["success"]:
+            context_data.append({
+                "url": item["url"],
+                "content": item["full_text"]
+            })
+    
+    for item in cleaned[:10]:
+        context_data.append({
+            "title": item.get("title", ""),
+            "snippet": item.get("snippet", ""),
+            "url": item.get("link", "")
+        })
+    
+    return f"""사용자 쿼리: {query}
+
+다음 정보를 바탕으로 종합적이고 명확한 답변을 생성하세요:
+
+{json.dumps(context_data[:10], ensure_ascii=False, indent=2)}
+
+답변 형식:
+- 5~7개 문장으로 구성
+- 핵심 정보 중심으로 요약
+- 자연스러운 한국어
+- 구체적인 정보 포함 (주소, 가격, 평점 등)"""
+
+def _create_synthesis_model():
+    """요약용 Gemini 모델 생성"""
+    import google.generativeai as genai
+    return genai.GenerativeModel(
+        model_name='gemini-2.0-flash',
+        generation_config={
+            "temperature": 0.3,
+            "max_output_tokens": 600
+        }
+    )
+
+def _chunk_text(chunk) -> str:
+    """스트리밍 청크에서 텍스트 추출 (안전 필터로 막힌 청크는 빈 문자열)"""
+    try:
+        return chunk.text or ""
+    except ValueError:
+        return ""
+
+def _model_label(model) -> str:
+    return str(getattr(model, "model_name", "unknown")).replace("models/", "")
+
+class _LLMTimer:
+    """요약 호출 전체 시간과 스트리밍 첫 청크 시간 기록"""
+    def __init__(self, model):
+        self.model = _model_label(model)
+        self.category = _current_category.get()
+        self.started = time.perf_counter()
+        self.first_chunk = False
+
+    def chunk(self):
+        if not self.first_chunk:
+            self.first_chunk = True
+            LLM_FIRST_CHUNK_SECONDS.observe(time.perf_counter() - self.started, model=self.model, category=self.category)
+
+    def done(self, outcome: str):
+        LLM_SECONDS.observe(time.perf_counter() - self.started, model=self.model, outcome=outcome, category=self.category)
+
+def _synthesize(model, prompt: str, on_chunk: Optional[Callable[[str], None]] = None) -> str:
+    """LLM 요약 생성 (on_chunk가 있으면 스트리밍하며 청크마다 전달)"""
+    timer = _LLMTimer(model)
+    try:
+        if on_chunk is None:
+            summary = model.generate_content(prompt).text
+        else:
+            parts = []
+            for chunk in model.generate_content(prompt, stream=True):
+                text = _chunk_text(chunk)
+                if text:
+                    timer.chunk()
+                    parts.append(text)
+                    on_chunk(text)
+            summary = "".join(parts)
+    except Exception:
+        timer.done("error")
+        raise
+    timer.done("ok")
+    return summary
+
+async def _synthesize_async(model, prompt: str, on_chunk: Optional[Callable[[str], None]] = None) -> str:
+    """LLM 요약 생성 (비동기, on_chunk가 있으면 스트리밍하며 청크마다 전달)"""
+    timer = _LLMTimer(model)
+    try:
+        if on_chunk is None:
+            response = await model.generate_content_async(prompt)
+            summary = response.text
+        else:
+            parts = []
+            response = await model.generate_content_async(prompt, stream=True)
+            async for chunk in response:
+                text = _chunk_text(chunk)
+                if text:
+                    timer.chunk()
+                    parts.append(text)
+                    on_chunk(text)
+            summary = "".join(parts)
+    except Exception:
+        timer.done("error")
+        raise
+    timer.done("ok")
+    return summary
+
+class _SearchTimer:
+    """검색 단계별 소요 시간과 요청 결과 기록 (category는 분류 후 지정)"""
+    def __init__(self):
+        self.started = self.stage_started = time.perf_counter()
+        self.category = "unknown"
+        self.token = None
+        self.finished = False
+
+    def set_category(self, category: SearchCategory):
+        self.category = category.value
+        self.token = _current_category.set(self.category)
+
+    def stage(self, name: str):
+        now = time.perf_counter()
+        SEARCH_STAGE_SECONDS.observe(now - self.stage_started, stage=name, category=self.category)
+        self.stage_started = now
+
+    def finish(self, outcome: str):
+        """전체 소요 시간/결과 기록 + category contextvar 복원 (처음 호출만 반영)"""
+        if self.finished:
+            return
+        self.finished = True
+        SEARCH_STAGE_SECONDS.observe(time.perf_counter() - self.started, stage="total", category=self.category)
+        SEARCH_REQUESTS.inc(category=self.category, outcome=outcome)
+        if self.token is not None:
+            _current_category.reset(self.token)
+            self.token = None
+
+def _build_search_result(summary: str, cleaned: List[Dict], category: SearchCategory) -> Dict:
+    """최종 검색 결과 구성"""
+    return {
+        "success": True,
+        "summary": summary,
+        "sources": [
+            {
+                "title": item.get("title", ""),
+                "snippet": item.get("snippet", "")[:150],
+                "link": item.get("link", ""),
+                "source": item.get("source", "")
+            }
+            for item in cleaned[:10]
+        ],
+        "category": category.value
+    }
+
+def perform_search(query: str, genai_client, naver_id: str = None, naver_secret: str = None, serper_key: str = None,
+                   on_chunk: Optional[Callable[[str], None]] = None) -> Dict:
+    """
+    통합 검색 수행
+    - on_chunk: 지정하면 LLM 요약을 스트리밍으로 생성하며 청크마다 호출
+    """
+    timer = _SearchTimer()
     try:
         # 1. 쿼리 분류 (classify_query 내부에서 clean_query 호출)
         category, final_query = classify_query(query)
-        print(f"[검색] 카테고리: {category.value}, 쿼리: {final_query}")
+        timer.set_category(category)
+        timer.stage("classify")
+        logger.info("검색 시작", extra=fields(category=category.value, query=final_query))
         
         # 2. 검색 소스 선택
-        search_sources = []
-        if category in [SearchCategory.VIDEO, SearchCategory.MUSIC]:
-            search_sources = ["youtube", "google"]
-        else:
-            # 🔥 네이버 우선, 구글 백업
-            if naver_id and naver_secret:
-                search_sources.append("naver")
-            if serper_key:
-                search_sources.append("google")
-            
-            # 둘 다 없으면 에러
-            if not search_sources:
-                return {
-                    "success": False,
-                    "error": "검색 API 키가 설정되지 않았습니다."
-                }
+        search_sources = _select_search_sources(category, naver_id, naver_secret, serper_key)
+        
+        # 둘 다 없으면 에러
+        if not search_sources:
+            timer.finish("no_sources")
+            return {
+                "success": False,
+                "error": "검색 API 키가 설정되지 않았습니다."
+            }
         
         # 3. 병렬 검색 (우선순위: 네이버 → 구글)
         raw_results = []
-        print(f"🚀 검색 소스: {search_sources}")
+        logger.debug("🚀 검색 소스", extra=fields(sources=search_sources))
         
         with ThreadPoolExecutor(max_workers=3) as ex:
-            futures = []
+            futures = []  # (source, future)
             
             # 🔥 네이버 우선 실행 (API 키 체크 강화)
             if "naver" in search_sources:
                 if naver_id and naver_secret:
-                    print(f"✅ 네이버 검색 큐에 추가: ID={naver_id[:4]}..., SECRET={bool(naver_secret)}")
-                    futures.append(ex.submit(fetch_api_data, "naver", final_query, naver_id, naver_secret, None))
+                    futures.append(("naver", ex.submit(copy_context().run, fetch_api_data, "naver", final_query, naver_id, naver_secret, None)))
                 else:
-                    print(f"❌ 네이버 API 키 누락: ID={bool(naver_id)}, SECRET={bool(naver_secret)}")
+                    logger.warning("❌ 네이버 API 키 누락", extra=fields(naver_id=bool(naver_id), naver_secret=bool(naver_secret)))
             
             # 구글 실행
             if "google" in search_sources:
                 if serper_key:
-                    print(f"✅ 구글 검색 큐에 추가: KEY={serper_key[:10]}...")
-                    futures.append(ex.submit(fetch_api_data, "google", final_query, None, None, serper_key))
+                    futures.append(("google", ex.submit(copy_context().run, fetch_api_data, "google", final_query, None, None, serper_key)))
                 else:
-                    print(f"❌ Serper API 키 누락")
+                    logger.warning("❌ Serper API 키 누락")
             
             # 유튜브 실행
             if "youtube" in search_sources:
-                print(f"✅ 유튜브 검색 큐에 추가")
-                futures.append(ex.submit(fetch_api_data, "youtube", final_query, None, None, None))
+                futures.append(("youtube", ex.submit(copy_context().run, fetch_api_data, "youtube", final_query, None, None, None)))
             
-            # 결과 수집
-            for i, future in enumerate(futures):
+            # 결과 수집 (공급자별 적응형 타임아웃 + 헤징 시간까지만 대기)
+            for i, (source, future) in enumerate(futures):
                 try:
-                    result = future.result(timeout=10)  # 타임아웃 늘림
+                    result = future.result(timeout=provider_guard.deadline(source))
                     raw_results.append(result)
-                    print(f"📦 검색 결과 {i+1}/{len(futures)} 수집: {result.get('source', 'unknown')}")
+                    logger.debug("📦 검색 결과 수집", extra=fields(source=source, index=i + 1, total=len(futures)))
                 except TimeoutError:
-                    print(f"⏰ 검색 {i+1} API 타임아웃")
+                    logger.warning("⏰ 공급자 API 타임아웃", extra=fields(source=source))
                 except Exception as e:
-                    print(f"❌ 검색 {i+1} 예외: {e}")
+                    logger.warning("❌ 공급자 예외", extra=fields(source=source, error=str(e)))
         
         # 4. 결과 필터링
-        print(f"📦 raw_results: {json.dumps(raw_results, ensure_ascii=False, indent=2)}")
+        # 공급자 원본 응답은 DEBUG로만, 잘라서 기록 (직렬화는 로그 스레드에서)
+        logger.debug("📦 공급자 원본 응답", extra=fields(raw_results=raw_results))
         cleaned = filter_search_results(raw_results)
-        print(f"✅ cleaned 결과: {len(cleaned)}개")
+        logger.debug("✅ 필터링 결과", extra=fields(cleaned=len(cleaned)))
         
         if not cleaned:
-            print(f"❌ 검색 결과 없음. raw_results 상세:")
-            for r in raw_results:
-                print(f"  - source: {r.get('source')}, error: {r.get('error')}, data keys: {list(r.get('data', {}).keys())}")
-            
-            return {
-                "success": False,
-                "error": "검색 결과가 없습니다.",
-                "debug_info": {
-                    "raw_count": len(raw_results),
-                    "raw_sources": [r.get('source') for r in raw_results],
-                    "errors": [r.get('error') for r in raw_results if r.get('error')]
-                }
-            }
+            timer.stage("fetch_scrape")
+            timer.finish("no_results")
+            return _no_results_response(raw_results)
         
         # 5. 페이지 스크래핑
         scraped_data = []
         if HAS_TRAFILATURA:
             links = [item["link"] for item in cleaned if item.get("link")]
-            scraped_data = scrape_multiple_pages(links, max_workers=5)
+            scraped_data = scrape_multiple_pages(links, max_workers=5, sources=_link_sources(cleaned))
+        timer.stage("fetch_scrape")
         
         # 6. LLM 요약
-        context_data = []
-        for item in scraped_data:
-            if item["success"]:
-                context_data.append({
-                    "url": item["url"],
-                    "content": item["full_text"]
-                })
+        prompt = _build_synthesis_prompt(query, cleaned, scraped_data)
+        model = _create_synthesis_model()
+        summary = _synthesize(model, prompt, on_chunk)
+        timer.stage("synthesis")
         
-        for item in cleaned[:10]:
-            context_data.append({
-                "title": item.get("title", ""),
-                "snippet": item.get("snippet", ""),
-                "url": item.get("link", "")
-            })
+        # 7. 결과 반환
+        timer.finish("ok")
+        return _build_search_result(summary, cleaned, category)
         
-        prompt = f"""사용자 쿼리: {query}
-
-다음 정보를 바탕으로 종합적이고 명확한 답변을 생성하세요:
+    except Exception as e:
+        timer.finish("error")
+        logger.exception("❌ 검색 오류", extra=fields(error=str(e)))
+        return {
+            "success": False,
+            "error": str(e)
+        }
+    finally:
+        # Exception이 아닌 예외(KeyboardInterrupt 등)로 끝나도 기록하고 contextvar 복원
+        timer.finish("cancelled")
 
-{json.dumps(context_data[:10], ensure_ascii=False, indent=2)}
+async def perform_search_async(query: str, genai_client, naver_id: str = None, naver_secret: str = None, serper_key: str = None,
+                               on_chunk: Optional[Callable[[str], None]] = None, pipelined: Optional[bool] = None) -> Dict:
+    """
+    통합 검색 수행 (비동기, 공유 커넥션 풀 사용)
+    - on_chunk: 지정하면 LLM 요약을 스트리밍으로 생성하며 청크마다 호출 (SSE 전달용)
+    - pipelined: 공급자별로 도착 즉시 스크래핑 (None이면 SEARCH_PIPELINED 설정 사용)
+    """
+    if pipelined is None:
+        pipelined = SEARCH_PIPELINED
 
-답변 형식:
-- 5~7개 문장으로 구성
-- 핵심 정보 중심으로 요약
-- 자연스러운 한국어
-- 구체적인 정보 포함 (주소, 가격, 평점 등)"""
+    timer = _SearchTimer()
+    try:
+        # 1. 쿼리 분류 (classify_query 내부에서 clean_query 호출)
+        category, final_query = classify_query(query)
+        timer.set_category(category)
+        timer.stage("classify")
+        logger.info("비동기 검색 시작", extra=fields(category=category.value, query=final_query))
         
-        # LLM 호출
-        import google.generativeai as genai
-        model = genai.GenerativeModel(
-            model_name='gemini-2.0-flash',
-            generation_config={
-                "temperature": 0.3,
-                "max_output_tokens": 600
+        # 2. 검색 소스 선택
+        search_sources = _select_search_sources(category, naver_id, naver_secret, serper_key)
+        if not search_sources:
+            timer.finish("no_sources")
+            return {
+                "success": False,
+                "error": "검색 API 키가 설정되지 않았습니다."
             }
+        
+        # 3~5. 병렬 검색 → 결과 필터링 → 페이지 스크래핑
+        logger.debug("🚀 검색 소스", extra=fields(sources=search_sources, pipelined=pipelined))
+        fetch_and_scrape = _fetch_and_scrape_pipelined if pipelined else _fetch_and_scrape_barrier
+        raw_results, cleaned, scraped_data = await fetch_and_scrape(
+            search_sources, final_query, naver_id, naver_secret, serper_key
         )
+        logger.debug("✅ 필터링/스크래핑 결과", extra=fields(cleaned=len(cleaned), scraped=len(scraped_data)))
+        timer.stage("fetch_scrape")
         
-        response = model.generate_content(prompt)
-        summary = response.text
+        if not cleaned:
+            timer.finish("no_results")
+            return _no_results_response(raw_results)
+        
+        # 6. LLM 요약
+        prompt = _build_synthesis_prompt(query, cleaned, scraped_data)
+        model = _create_synthesis_model()
+        summary = await _synthesize_async(model, prompt, on_chunk)
+        timer.stage("synthesis")
         
         # 7. 결과 반환
-        return {
-            "success": True,
-            "summary": summary,
-            "sources": [
-                {
-                    "title": item.get("title", ""),
-                    "snippet": item.get("snippet", "")[:150],
-                    "link": item.get("link", ""),
-                    "source": item.get("source", "")
-                }
-                for item in cleaned[:10]
-            ],
-            "category": category.value
-        }
+        timer.finish("ok")
+        return _build_search_result(summary, cleaned, category)
         
     except Exception as e:
-        print(f"❌ 검색 오류: {e}")
-        traceback.print_exc()
+        timer.finish("error")
+        logger.exception("❌ 비동기 검색 오류", extra=fields(error=str(e)))
         return {
             "success": False,
             "error": str(e)
         }
-
+    finally:
+        # 취소(CancelledError)로 끝나도 기록하고 contextvar 복원
+        timer.finish("cancelled")
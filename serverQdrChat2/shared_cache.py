@@ -0,0 +1,279 @@
+import json
+import os
+import sqlite3
+import time
+import zlib
+from threading import Lock
+from typing import Dict, List, Optional, Tuple
+
+from structured_log import fields, get_logger
+
+logger = get_logger("shared_cache")
+
+# ===== 프로세스 간 공유 캐시 (SQLite WAL) =====
+# gunicorn 워커가 여러 개여도 같은 호스트의 워커들이 하나의 캐시 파일을 공유
+# MemoryCache와 같은 API(get/set/clear/get_stats/_generate_key) 제공
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS search_cache (
+    key TEXT PRIMARY KEY,
+    query TEXT,
+    payload BLOB NOT NULL,
+    compressed INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    expires_at REAL NOT NULL,
+    last_access REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0,
+    refresh_claimed_until REAL
+);
+CREATE INDEX IF NOT EXISTS idx_search_cache_expires ON search_cache(expires_at);
+CREATE INDEX IF NOT EXISTS idx_search_cache_access ON search_cache(last_access);
+CREATE TABLE IF NOT EXISTS cache_meta (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO cache_meta (name, value) VALUES ('total_bytes', 0);
+INSERT OR IGNORE INTO cache_meta (name, value) SELECT 'entries', COUNT(*) FROM search_cache;
+"""
+
+# 이전 버전 캐시 파일에 없는 컬럼 (컬럼명 → 정의)
+_ADDED_COLUMNS = {
+    "query": "TEXT",
+    "hits": "INTEGER NOT NULL DEFAULT 0",
+    "refresh_claimed_until": "REAL",
+}
+
+class SQLiteCache:
+    """
+    프로세스 간 공유 캐시 (SQLite WAL 모드, TTL + 바이트 용량 제한)
+    - 읽기는 WAL 덕분에 다른 워커의 쓰기와 서로 막지 않음
+    - 총 바이트 수/항목 수는 cache_meta 테이블에서 쓰기 트랜잭션과 함께 갱신 (get_stats에서 COUNT(*) 없이 조회)
+    - 모든 메서드는 잠금/디스크 I/O로 막힐 수 있음 → 이벤트 루프에서는 스레드 풀로 넘겨 호출
+    - LRU 시각/조회수는 access_resolution초 단위로만 반영 (읽기마다 쓰기가 발생하지 않도록)
+    - TTL이 지난 항목도 stale_ttl 동안은 stale로 보관 (stale-while-revalidate)
+    - 백그라운드 갱신 권한은 refresh_claimed_until 컬럼으로 워커 간 1건만 허용
+    - hits/misses 등 카운터는 프로세스별 값
+    """
+    def __init__(self, path: str, ttl_seconds: int = 10800, max_bytes: int = 64 * 1024 * 1024,
+                 compress_threshold: int = 4096, access_resolution: int = 60,
+                 stale_ttl_seconds: int = 3600, refresh_lease_seconds: int = 120):
+        self.path = path
+        self.ttl = ttl_seconds
+        self.stale_ttl = stale_ttl_seconds
+        self.refresh_lease = refresh_lease_seconds
+        self.max_bytes = max_bytes
+        self.compress_threshold = compress_threshold
+        self.access_resolution = access_resolution
+        self.lock = Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._conn_pid: Optional[int] = None
+        self.pending_hits: Dict[str, int] = {}  # 아직 DB에 반영하지 않은 조회수
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evicted = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        """프로세스별 커넥션 (fork 이후에는 새로 연결, 락 보유 상태에서 호출)"""
+        if self._conn is None or self._conn_pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            existing = {row[1] for row in conn.execute("PRAGMA table_info(search_cache)")}
+            for column, definition in _ADDED_COLUMNS.items():
+                if column not in existing:
+                    try:
+                        conn.execute(f"ALTER TABLE search_cache ADD COLUMN {column} {definition}")
+                    except sqlite3.OperationalError:
+                        pass  # 다른 워커가 먼저 추가함
+            self._conn = conn
+            self._conn_pid = os.getpid()
+            logger.info("✅ 공유 캐시 연결", extra=fields(path=self.path, pid=self._conn_pid))
+        return self._conn
+
+    def _generate_key(self, query: str) -> str:
+        """쿼리를 정규화하여 캐시 키 생성 (카테고리 + 정렬된 토큰)"""
+        from search_api import canonical_query_key
+        return canonical_query_key(query)
+
+    def _encode(self, data: dict) -> Tuple[bytes, bool]:
+        payload = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        if len(payload) >= self.compress_threshold:
+            return zlib.compress(payload, 6), True
+        return payload, False
+
+    def get(self, query: str) -> Optional[dict]:
+        """캐시에서 결과 가져오기 (TTL 이내 항목만)"""
+        found = self.get_entry(query)
+        if found is None or found[1]:
+            return None
+        return found[0]
+
+    def get_entry(self, query: str) -> Optional[Tuple[dict, bool]]:
+        """캐시에서 (결과, stale 여부) 가져오기 - TTL이 지났어도 stale 허용 시간 이내면 반환"""
+        key = self._generate_key(query)
+        now = time.time()
+        with self.lock:
+            conn = self._connection()
+            row = conn.execute(
+                "SELECT payload, compressed, expires_at, last_access FROM search_cache WHERE key = ? AND expires_at > ?",
+                (key, now - self.stale_ttl)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+
+            payload, compressed, expires_at, last_access = row
+            hits = self.pending_hits.pop(key, 0) + 1
+            if now - last_access >= self.access_resolution:
+                conn.execute(
+                    "UPDATE search_cache SET last_access = ?, hits = hits + ? WHERE key = ?", (now, hits, key)
+                )
+            else:
+                self.pending_hits[key] = hits
+            stale = expires_at <= now
+            if stale:
+                self.stale_hits += 1
+            else:
+                self.hits += 1
+
+        if stale:
+            logger.debug("♻️ 공유 캐시 stale 히트", extra=fields(query=query, stale_seconds=round(now - expires_at)))
+        else:
+            logger.debug("💾 공유 캐시 히트", extra=fields(query=query, ttl_seconds=round(expires_at - now)))
+        return json.loads(zlib.decompress(payload) if compressed else payload), stale
+
+    def hot_expiring(self, window_seconds: int, min_hits: int) -> List[str]:
+        """window_seconds 안에 만료될 항목 중 min_hits 이상 조회된 항목의 쿼리 (조회수 내림차순)"""
+        now = time.time()
+        with self.lock:
+            conn = self._connection()
+            # 주기적으로 호출되므로 쌓인 조회수를 함께 반영
+            if self.pending_hits:
+                conn.executemany(
+                    "UPDATE search_cache SET hits = hits + ? WHERE key = ?",
+                    [(hits, key) for key, hits in self.pending_hits.items()]
+                )
+                self.pending_hits.clear()
+            rows = conn.execute(
+                "SELECT COALESCE(query, key) FROM search_cache WHERE expires_at > ? AND expires_at <= ? AND hits >= ? "
+                "AND (refresh_claimed_until IS NULL OR refresh_claimed_until < ?) ORDER BY hits DESC",
+                (now, now + window_seconds, min_hits, now)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def try_claim_refresh(self, query: str) -> bool:
+        """백그라운드 갱신 권한 획득 (다른 워커가 갱신 중이면 False)"""
+        key = self._generate_key(query)
+        now = time.time()
+        with self.lock:
+            conn = self._connection()
+            claimed = conn.execute(
+                "UPDATE search_cache SET refresh_claimed_until = ? WHERE key = ? "
+                "AND (refresh_claimed_until IS NULL OR refresh_claimed_until < ?)",
+                (now + self.refresh_lease, key, now)
+            ).rowcount
+        return claimed == 1
+
+    def release_refresh(self, query: str):
+        """백그라운드 갱신 권한 반납"""
+        with self.lock:
+            self._connection().execute(
+                "UPDATE search_cache SET refresh_claimed_until = NULL WHERE key = ?", (self._generate_key(query),)
+            )
+
+    def set(self, query: str, data: dict):
+        """캐시에 결과 저장"""
+        key = self._generate_key(query)
+        payload, compressed = self._encode(data)
+        size = len(payload) + len(key.encode("utf-8"))
+        if size > self.max_bytes:
+            logger.warning("⚠️ 캐시 항목이 용량보다 큼", extra=fields(query=query, size=size))
+            return
+
+        now = time.time()
+        with self.lock:
+            conn = self._connection()
+            # BEGIN이 busy 대기 끝에 실패하면("database is locked") 트랜잭션이 없으므로 그대로 전달
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                # 만료 항목 정리 - stale 허용 시간까지 지난 항목 (expires_at 인덱스 사용)
+                expired_before = now - self.stale_ttl
+                expired_bytes, expired_count = conn.execute(
+                    "SELECT COALESCE(SUM(size), 0), COUNT(*) FROM search_cache WHERE expires_at <= ?", (expired_before,)
+                ).fetchone()
+                if expired_count:
+                    conn.execute("DELETE FROM search_cache WHERE expires_at <= ?", (expired_before,))
+                    self.expired += expired_count
+
+                old = conn.execute("SELECT size FROM search_cache WHERE key = ?", (key,)).fetchone()
+                old_size = old[0] if old else 0
+                entries_delta = (0 if old else 1) - expired_count
+                conn.execute(
+                    "INSERT OR REPLACE INTO search_cache (key, query, payload, compressed, size, expires_at, last_access, hits, refresh_claimed_until) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, 0, NULL)",
+                    (key, query, payload, int(compressed), size, now + self.ttl, now)
+                )
+                total_bytes = conn.execute(
+                    "UPDATE cache_meta SET value = value + ? WHERE name = 'total_bytes' RETURNING value",
+                    (size - old_size - expired_bytes,)
+                ).fetchone()[0]
+
+                # 용량 초과 체크 (LRU: 가장 오래 사용하지 않은 항목 삭제)
+                while total_bytes > self.max_bytes:
+                    victim = conn.execute(
+                        "SELECT key, size FROM search_cache WHERE key != ? ORDER BY last_access LIMIT 1", (key,)
+                    ).fetchone()
+                    if victim is None:
+                        break
+                    conn.execute("DELETE FROM search_cache WHERE key = ?", (victim[0],))
+                    total_bytes -= victim[1]
+                    entries_delta -= 1
+                    self.evicted += 1
+                    logger.debug("🗑️ 캐시 용량 초과로 삭제", extra=fields(key=victim[0]))
+                conn.execute("UPDATE cache_meta SET value = ? WHERE name = 'total_bytes'", (total_bytes,))
+                conn.execute("UPDATE cache_meta SET value = value + ? WHERE name = 'entries'", (entries_delta,))
+
+                conn.execute("COMMIT")
+            except Exception:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                raise
+
+        logger.debug("💾 공유 캐시 저장", extra=fields(query=query, bytes=total_bytes, compressed=compressed))
+
+    def clear(self):
+        """캐시 전체 삭제 (모든 워커에 적용)"""
+        with self.lock:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute("DELETE FROM search_cache")
+                conn.execute("UPDATE cache_meta SET value = 0 WHERE name IN ('total_bytes', 'entries')")
+                conn.execute("COMMIT")
+            except Exception:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                raise
+            logger.info("🗑️ 공유 캐시 전체 삭제")
+
+    def get_stats(self) -> dict:
+        """캐시 통계 (total/bytes는 전체 워커 공유 값, 나머지는 이 프로세스 값)"""
+        with self.lock:
+            conn = self._connection()
+            meta = dict(conn.execute("SELECT name, value FROM cache_meta").fetchall())
+        return {
+            "backend": "sqlite",
+            "total": meta.get("entries", 0),
+            "bytes": meta.get("total_bytes", 0),
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "expired": self.expired,
+            "evicted": self.evicted,
+            "ttl_hours": self.ttl / 3600,
+            "stale_ttl_hours": self.stale_ttl / 3600
+        }
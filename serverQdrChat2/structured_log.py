@@ -0,0 +1,191 @@
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import sys
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Optional
+
+# ===== 구조화 로깅 =====
+# 요청 경로에서는 LogRecord를 큐에 넣기만 하고, 메시지 포맷/JSON 직렬화/stdout 쓰기는 리스너 스레드에서 처리
+# - 레벨: LOG_LEVEL (기본 INFO), DEBUG 이벤트는 LOG_DEBUG_SAMPLE_RATE 비율만 남김
+# - 요청별 상관관계 ID: set_request_id()로 지정하면 같은 요청(태스크/스레드 컨텍스트)의 모든 로그에 포함
+# - 필드 값(공급자 응답 등)은 LOG_MAX_FIELD_CHARS 글자로 잘라서 기록
+# - 큐가 가득 차면 요청을 기다리게 하지 않고 버림 (dropped 카운트)
+
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.environ.get("LOG_FORMAT", "json").lower()  # json | text
+LOG_DEBUG_SAMPLE_RATE = float(os.environ.get("LOG_DEBUG_SAMPLE_RATE", "0.01"))
+LOG_MAX_FIELD_CHARS = int(os.environ.get("LOG_MAX_FIELD_CHARS", "300"))
+LOG_QUEUE_SIZE = int(os.environ.get("LOG_QUEUE_SIZE", "10000"))
+
+request_id_var: ContextVar[str] = ContextVar("request_id", default="-")
+
+def set_request_id(request_id: Optional[str] = None) -> str:
+    """현재 요청 컨텍스트의 상관관계 ID 지정 (없으면 새로 생성)"""
+    request_id = (request_id or uuid.uuid4().hex[:12])[:64]
+    request_id_var.set(request_id)
+    return request_id
+
+def fields(**values) -> dict:
+    """구조화 필드를 logging extra로 전달 (예: logger.info("...", extra=fields(source="naver")))"""
+    return {"fields": values}
+
+def truncate(value: Any, max_chars: int = LOG_MAX_FIELD_CHARS) -> Any:
+    """긴 문자열/컬렉션을 max_chars 글자로 자름 (숫자/bool/None은 그대로)"""
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    if not isinstance(value, str):
+        try:
+            value = json.dumps(value, ensure_ascii=False, default=str, separators=(",", ":"))
+        except (TypeError, ValueError, RuntimeError):
+            value = repr(value)
+    if len(value) <= max_chars:
+        return value
+    return f"{value[:max_chars]}…(+{len(value) - max_chars}자)"
+
+class _Sampler:
+    """DEBUG 이벤트는 sample_rate 비율만 통과"""
+    def __init__(self, sample_rate: float):
+        self.sample_rate = sample_rate
+        self.sampled_out = 0
+
+    def keep(self) -> bool:
+        if self.sample_rate >= 1.0 or random.random() < self.sample_rate:
+            return True
+        self.sampled_out += 1
+        return False
+
+class _SampledLogger(logging.Logger):
+    """
+    debug()는 LogRecord를 만들기 전에 샘플링 (호출 위치 탐색/레코드 생성 비용도 건너뜀)
+    - 레벨이 DEBUG보다 높으면 기존처럼 isEnabledFor에서 바로 반환
+    """
+    def debug(self, msg, *args, **kwargs):
+        if self.isEnabledFor(logging.DEBUG) and _sampler.keep():
+            self._log(logging.DEBUG, msg, args, **kwargs)
+
+class _NonBlockingQueueHandler(QueueHandler):
+    """
+    레코드를 포맷하지 않고 그대로 큐에 넣음 (기본 QueueHandler.prepare는 호출 스레드에서 포맷함)
+    - 상관관계 ID는 컨텍스트 변수라서 여기(호출 측)에서 레코드에 복사
+    """
+    def __init__(self, log_queue: "queue.Queue"):
+        super().__init__(log_queue)
+        self.queued = 0
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.request_id = request_id_var.get()
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+            self.queued += 1
+        except queue.Full:
+            self.dropped += 1
+
+class JsonFormatter(logging.Formatter):
+    """한 줄 JSON (ts, level, logger, request_id, msg, 필드...)"""
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "request_id": getattr(record, "request_id", "-"),
+            "msg": truncate(record.getMessage(), LOG_MAX_FIELD_CHARS * 4)
+        }
+        for key, value in (getattr(record, "fields", None) or {}).items():
+            entry[key] = truncate(value)
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+class TextFormatter(logging.Formatter):
+    """사람이 읽기 쉬운 한 줄 형식 (로컬 개발용)"""
+    def format(self, record: logging.LogRecord) -> str:
+        extra = " ".join(f"{key}={truncate(value)}" for key, value in (getattr(record, "fields", None) or {}).items())
+        line = (f"{datetime.fromtimestamp(record.created).strftime('%H:%M:%S.%f')[:-3]} {record.levelname:<7} "
+                f"[{getattr(record, 'request_id', '-')}] {record.getMessage()}{' ' + extra if extra else ''}")
+        if record.exc_info:
+            line += "\n" + self.formatException(record.exc_info)
+        return line
+
+_root = logging.getLogger("modoo")
+_sampler = _Sampler(LOG_DEBUG_SAMPLE_RATE)
+_loggers: Dict[str, _SampledLogger] = {}
+_queue_handler: Optional[_NonBlockingQueueHandler] = None
+_listener: Optional[QueueListener] = None
+
+def configure_logging():
+    """'modoo' 로거에 큐 핸들러와 백그라운드 리스너 설치 (여러 번 호출해도 한 번만 설치)"""
+    global _queue_handler, _listener
+    if _listener is not None:
+        return
+    log_queue: "queue.Queue" = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    _queue_handler = _NonBlockingQueueHandler(log_queue)
+
+    output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(TextFormatter() if LOG_FORMAT == "text" else JsonFormatter())
+
+    _root.setLevel(getattr(logging, LOG_LEVEL, logging.INFO))
+    _root.addHandler(_queue_handler)
+    _root.propagate = False
+    _listener = QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+def shutdown_logging():
+    """남은 로그를 모두 쓰고 리스너 스레드 종료"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+def get_logger(name: str) -> logging.Logger:
+    """'modoo.<name>' 로거 반환 (처음 호출 시 로깅 설정, 전역 로거 클래스는 바꾸지 않음)"""
+    configure_logging()
+    logger = _loggers.get(name)
+    if logger is None:
+        logger = _loggers[name] = _SampledLogger(f"{_root.name}.{name}")
+        logger.parent = _root
+    return logger
+
+class RequestIdMiddleware:
+    """
+    ASGI 미들웨어: 요청마다 상관관계 ID 지정 (X-Request-ID 헤더가 있으면 그대로 사용) 후 응답 헤더로 돌려줌
+    - 요청 처리 태스크와 SSE 제너레이터가 같은 컨텍스트를 물려받아 모든 로그에 같은 ID가 찍힘
+    """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        incoming = dict(scope.get("headers") or []).get(b"x-request-id")
+        request_id = set_request_id(incoming.decode("latin-1") if incoming else None)
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [(b"x-request-id", request_id.encode("latin-1"))]
+            await send(message)
+
+        await self.app(scope, receive, send_with_id)
+
+def get_stats() -> dict:
+    return {
+        "level": logging.getLevelName(_root.level),
+        "debug_sample_rate": LOG_DEBUG_SAMPLE_RATE,
+        "queued": _queue_handler.queued if _queue_handler else 0,
+        "dropped": _queue_handler.dropped if _queue_handler else 0,
+        "sampled_out": _sampler.sampled_out,
+        "backlog": _queue_handler.queue.qsize() if _queue_handler else 0
+    }
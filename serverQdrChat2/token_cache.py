@@ -0,0 +1,128 @@
+import asyncio
+import hashlib
+import re
+import time
+from collections import OrderedDict
+from concurrent.futures import Executor
+from threading import Lock
+from typing import Callable, Optional, Tuple
+
+from structured_log import fields, get_logger
+
+logger = get_logger("token_cache")
+
+# ===== Firebase ID 토큰 검증 캐시 =====
+# 같은 클라이언트는 1시간 유효한 같은 토큰을 반복해서 보내므로,
+# 한 번 검증한 토큰은 exp까지 결과를 재사용해 RSA 서명 검증과 인증서 조회를 건너뜀
+
+class VerifiedTokenCache:
+    """
+    검증된 ID 토큰 캐시 (토큰 SHA-256 → 클레임, 토큰 exp까지 유효, 개수 제한 LRU)
+    - 원본 토큰은 저장하지 않음
+    - 기존 검증과 마찬가지로 폐기(revocation) 여부는 확인하지 않음
+    """
+    def __init__(self, verify: Callable[[str], dict], max_entries: int = 10000):
+        self.verify = verify
+        self.max_entries = max_entries
+        self.cache: "OrderedDict[str, Tuple[dict, float]]" = OrderedDict()
+        self.lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+
+    def _lookup(self, key: str) -> Optional[dict]:
+        now = time.time()
+        with self.lock:
+            entry = self.cache.get(key)
+            if entry is not None:
+                claims, expires_at = entry
+                if expires_at > now:
+                    self.cache.move_to_end(key)
+                    self.hits += 1
+                    return dict(claims)
+                del self.cache[key]
+            self.misses += 1
+        return None
+
+    def _store(self, key: str, claims: dict):
+        expires_at = float(claims.get("exp", 0))
+        if expires_at <= time.time():
+            return
+        with self.lock:
+            self.cache[key] = (dict(claims), expires_at)
+            self.cache.move_to_end(key)
+            while len(self.cache) > self.max_entries:
+                self.cache.popitem(last=False)
+                self.evicted += 1
+
+    async def verify_token(self, id_token: str, executor: Optional[Executor] = None) -> dict:
+        """캐시에 있으면 바로 반환, 없으면 executor에서 검증 후 저장 (검증 실패 시 예외 그대로 전달)"""
+        key = hashlib.sha256(id_token.encode("utf-8")).hexdigest()
+        claims = self._lookup(key)
+        if claims is None:
+            claims = await asyncio.get_running_loop().run_in_executor(executor, self.verify, id_token)
+            self._store(key, claims)
+        return claims
+
+    def clear(self):
+        with self.lock:
+            self.cache.clear()
+
+    def get_stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "total": len(self.cache),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "evicted": self.evicted
+        }
+
+class CertificatePrefetcher:
+    """
+    토큰 검증에 쓰는 Google 공개 인증서를 백그라운드에서 미리 갱신
+    - fetch(url, headers)는 검증기가 쓰는 것과 같은 HTTP 캐시(cache-control) 요청 객체를 사용해야 함
+    - 'no-cache'로 강제 재요청해 캐시를 새 응답으로 바꾸고, max-age의 refresh_ratio 시점에 다시 갱신
+      → 캐시 만료로 요청 경로의 토큰 검증이 네트워크를 기다리는 일이 없음
+    """
+    def __init__(self, fetch: Callable[..., object], cert_url: str, refresh_ratio: float = 0.8,
+                 fallback_interval: int = 3600, min_interval: int = 60):
+        self.fetch = fetch
+        self.cert_url = cert_url
+        self.refresh_ratio = refresh_ratio
+        self.fallback_interval = fallback_interval
+        self.min_interval = min_interval
+        self.refreshed = 0
+        self.errors = 0
+        self.last_refresh: Optional[float] = None
+        self.next_refresh: Optional[float] = None
+
+    def refresh(self) -> float:
+        """인증서를 다시 받아 캐시에 넣고 다음 갱신까지의 시간(초) 반환 (스레드에서 실행)"""
+        response = self.fetch(self.cert_url, headers={"Cache-Control": "no-cache"})
+        cache_control = (getattr(response, "headers", None) or {}).get("cache-control", "")
+        match = re.search(r"max-age=(\d+)", cache_control)
+        max_age = int(match.group(1)) if match else self.fallback_interval
+        self.refreshed += 1
+        self.last_refresh = time.time()
+        return max(max_age * self.refresh_ratio, self.min_interval)
+
+    async def refresh_loop(self):
+        while True:
+            try:
+                delay = await asyncio.to_thread(self.refresh)
+            except Exception as e:
+                self.errors += 1
+                delay = self.min_interval
+                logger.warning("⚠️ Firebase 공개 인증서 갱신 실패", extra=fields(error=str(e)))
+            self.next_refresh = time.time() + delay
+            await asyncio.sleep(delay)
+
+    def get_stats(self) -> dict:
+        return {
+            "refreshed": self.refreshed,
+            "errors": self.errors,
+            "last_refresh": self.last_refresh,
+            "next_refresh": self.next_refresh
+        }